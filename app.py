@@ -3,10 +3,10 @@ VoxaLab AI - Hugging Face Spaces Deployment
 Serves both FastAPI backend and React frontend
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 import os
 import sys
 from pathlib import Path
@@ -65,6 +65,10 @@ except Exception as e:
     logger.error(traceback.format_exc())
     math_tutor = None
 
+from services.rate_limiter import RateLimitExceeded
+from services.disconnect import ClientDisconnected
+from services import metrics
+
 # Create FastAPI app
 app = FastAPI(
     title="VoxaLab AI",
@@ -117,6 +121,84 @@ else:
 async def health():
     return {"status": "ok", "service": "VoxaLab AI"}
 
+@app.exception_handler(RateLimitExceeded)
+async def rate_limited(request: Request, exc: RateLimitExceeded):
+    """Mistral is saturated - tell the client honestly when to retry."""
+    return JSONResponse(
+        status_code=429,
+        content={
+            "detail": "AI service is busy. Please retry shortly.",
+            "model": exc.model,
+            "retry_after": exc.retry_after,
+            "queue_depth": exc.queue_depth,
+        },
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected(request: Request, exc: ClientDisconnected):
+    """Nobody is listening any more; 499 only shows up in access logs."""
+    return Response(status_code=499)
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness (separate from /health liveness): 503 while Whisper models load.
+    
+    A server whose models failed to load still reports ready - text endpoints
+    work and transcription degrades per request.
+    """
+    from services.transcription_pool import NOT_READY_RETRY_AFTER_SECONDS, transcription_pool
+    pool = transcription_pool.stats()
+    if transcription_pool.state == "loading":
+        return JSONResponse(
+            status_code=503,
+            content={"status": "loading", "transcription": pool},
+            headers={"Retry-After": str(NOT_READY_RETRY_AFTER_SECONDS)},
+        )
+    return {"status": "ready" if transcription_pool.state != "failed" else "degraded", "transcription": pool}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Process-local counters (cancelled work, ...)."""
+    return metrics.snapshot()
+
+@app.get("/metrics/memory")
+async def get_memory():
+    """Resident memory per transcription worker (RSS, PSS, shared, private)."""
+    from services.transcription_pool import transcription_pool
+    return transcription_pool.memory_report()
+
+@app.on_event("startup")
+async def startup():
+    """Load Whisper in the background so the server accepts requests right away."""
+    try:
+        from services.voxtral_service import WHISPER_AVAILABLE
+        from services.transcription_pool import transcription_pool
+        if WHISPER_AVAILABLE:
+            transcription_pool.start()
+    except Exception as e:
+        logger.warning(f"Transcription warmup not started: {e}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close pooled LLM/TTS connections and transcription workers on shutdown."""
+    try:
+        from services import llm_gateway
+        await llm_gateway.aclose()
+    except Exception as e:
+        logger.warning(f"LLM gateway shutdown error: {e}")
+    try:
+        from services.tts_service import tts_service
+        await tts_service.aclose()
+    except Exception as e:
+        logger.warning(f"TTS client shutdown error: {e}")
+    try:
+        from services.transcription_pool import transcription_pool
+        transcription_pool.shutdown()
+    except Exception as e:
+        logger.warning(f"Transcription pool shutdown error: {e}")
+
 # Serve React build files
 frontend_build_path = Path(__file__).parent / "frontend" / "build"
 
@@ -0,0 +1,54 @@
+"""
+Shared helpers for the speech-to-text benchmarks.
+
+Fixtures: a directory of audio files (wav/webm/mp3/m4a/ogg/flac), each with a
+reference transcript next to it under the same name with a .txt extension:
+
+    benchmarks/fixtures/asr/intro.wav
+    benchmarks/fixtures/asr/intro.txt
+
+No recordings are checked in - drop your own into the fixture directory (or
+point --fixtures elsewhere).
+"""
+
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+AUDIO_EXTENSIONS = {".wav", ".webm", ".mp3", ".m4a", ".ogg", ".flac"}
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / "fixtures" / "asr"
+
+
+def load_fixtures(directory: Path) -> List[Tuple[str, bytes, str]]:
+    """Return [(name, audio_bytes, reference_text)] for every audio file with a .txt reference."""
+    fixtures = []
+    for path in sorted(Path(directory).glob("*")):
+        if path.suffix.lower() not in AUDIO_EXTENSIONS:
+            continue
+        reference = path.with_suffix(".txt")
+        if not reference.exists():
+            print(f"⚠️ Skipping {path.name}: no {reference.name}")
+            continue
+        fixtures.append((path.name, path.read_bytes(), reference.read_text().strip()))
+    return fixtures
+
+
+def normalize(text: str) -> List[str]:
+    """Lower-case words without punctuation, for WER."""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> Tuple[int, int]:
+    """(word edit distance, reference word count) - sum both across fixtures for corpus WER."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1], len(ref)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ASR engines (openai-whisper vs. faster-whisper vs. stub) on CPU.
+
+Every backend transcribes the same decoded + VAD-trimmed fixture set (see
+benchmarks/asr_common.py) and reports:
+- load time
+- latency: mean and max seconds per clip, and RTF (inference / audio seconds)
+- memory: peak RSS of the process that loaded and ran the model
+- accuracy: WER against the reference transcripts
+
+Each backend runs in its own fresh process so peak memory is not polluted by
+the previous engine. Backends whose engine is not installed are skipped.
+
+Usage (from backend/):
+    python benchmarks/bench_asr_backends.py --size base
+    python benchmarks/bench_asr_backends.py --size small --int8 --backends whisper,faster-whisper
+"""
+
+import sys
+import time
+import argparse
+import resource
+import statistics
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.asr_common import DEFAULT_FIXTURES, load_fixtures, word_errors
+from services import asr_backends
+from services.audio_decode import SAMPLE_RATE, decode_audio
+from services.vad import trim_silence
+
+
+def run_backend(name: str, size: str, quantize: bool, clips, language: str):
+    """Load one backend and transcribe every clip (runs in a child process)."""
+    started = time.perf_counter()
+    backend = asr_backends.load_backend(name, size, quantize)
+    load_seconds = time.perf_counter() - started
+
+    backend.transcribe(clips[0][1], language)  # warm-up
+
+    latencies = []
+    errors = words = 0
+    for _, audio, reference in clips:
+        started = time.perf_counter()
+        text = backend.transcribe(audio, language)["text"]
+        latencies.append(time.perf_counter() - started)
+        e, n = word_errors(reference, text)
+        errors += e
+        words += n
+
+    audio_seconds = sum(len(audio) for _, audio, _ in clips) / SAMPLE_RATE
+    return {
+        "load_seconds": load_seconds,
+        "mean_seconds": statistics.mean(latencies),
+        "max_seconds": max(latencies),
+        "rtf": sum(latencies) / audio_seconds if audio_seconds else 0.0,
+        # ru_maxrss is KB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "wer": errors / words if words else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--backends", default=",".join(asr_backends.BACKENDS))
+    parser.add_argument("--size", default="base")
+    parser.add_argument("--int8", action="store_true", help="int8 weights (torch dynamic / CTranslate2 int8)")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        sys.exit(f"No fixtures found in {args.fixtures} (need <name>.<audio> + <name>.txt pairs)")
+
+    clips = [(name, trim_silence(decode_audio(data))[0], ref) for name, data, ref in fixtures]
+    total = sum(len(audio) for _, audio, _ in clips) / SAMPLE_RATE
+    print(f"{len(clips)} clips, {total:.1f}s of speech, model {args.size}{' int8' if args.int8 else ''}\n")
+
+    print(f"{'backend':<16}{'load s':>9}{'mean s':>9}{'max s':>9}{'RTF':>9}{'peak MB':>10}{'WER':>9}")
+    context = multiprocessing.get_context("spawn")
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        if not asr_backends.is_available(name):
+            print(f"{name:<16}  - not installed")
+            continue
+        try:
+            with context.Pool(1) as pool:
+                r = pool.apply(run_backend, (name, args.size, args.int8, clips, args.language))
+        except Exception as e:
+            print(f"{name:<16}  ✗ {e}")
+            continue
+        print(
+            f"{name:<16}{r['load_seconds']:>9.2f}{r['mean_seconds']:>9.3f}{r['max_seconds']:>9.3f}"
+            f"{r['rtf']:>9.3f}{r['peak_rss_mb']:>10.0f}{r['wer']:>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fused vs. two-call generation for /analysis/improved-answer.
+
+Compares wall-clock latency and token cost of
+- two-call path: IMPROVEMENT_PROMPT then FOLLOWUP_PROMPT (as the endpoint used to)
+- fused path:    FUSED_IMPROVEMENT_PROMPT (one call)
+
+Calls Mistral directly (no cache / single-flight), so it spends real quota.
+
+Usage (from backend/):
+    MISTRAL_API_KEY=... python benchmarks/bench_improved_answer.py --runs 5
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import mistral_service
+
+SAMPLES = [
+    (
+        "Tell me about a time you improved the performance of a system.",
+        "Our API was slow so I looked at the database and added some indexes. It got faster and people were happy.",
+        "Software Engineer",
+    ),
+    (
+        "Describe a conflict with a teammate and how you resolved it.",
+        "A colleague and I disagreed about the release date. We talked to the manager and picked a date.",
+        "Product Manager",
+    ),
+    (
+        "Tell me about a project you are proud of.",
+        "I built a dashboard for the sales team. It took three months and they use it every day now.",
+        "Data Scientist",
+    ),
+]
+
+
+def _tokens(message) -> int:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return int(usage.get("total_tokens", 0))
+
+
+async def run_two_call(question: str, answer: str, role: str):
+    llm = mistral_service.llm
+    started = time.perf_counter()
+    improved = await (mistral_service.IMPROVEMENT_PROMPT | llm).ainvoke(
+        {"question": question, "original_answer": answer, "role": role}
+    )
+    followup = await (mistral_service.FOLLOWUP_PROMPT | llm).ainvoke(
+        {"question": question, "answer": answer}
+    )
+    return time.perf_counter() - started, _tokens(improved) + _tokens(followup), 2
+
+
+async def run_fused(question: str, answer: str, role: str):
+    llm = mistral_service.llm
+    started = time.perf_counter()
+    fused = await (mistral_service.FUSED_IMPROVEMENT_PROMPT | llm).ainvoke(
+        {"question": question, "original_answer": answer, "role": role}
+    )
+    return time.perf_counter() - started, _tokens(fused), 1
+
+
+def summarize(name: str, results):
+    latencies = [r[0] for r in results]
+    tokens = [r[1] for r in results]
+    print(f"{name:10s} calls/req={results[0][2]}  "
+          f"latency p50={statistics.median(latencies):.2f}s max={max(latencies):.2f}s  "
+          f"tokens/req={statistics.mean(tokens):.0f}")
+
+
+async def main(runs: int):
+    if mistral_service.llm is None:
+        print("✗ MISTRAL_API_KEY not configured - nothing to benchmark")
+        return
+
+    two_call, fused = [], []
+    for i in range(runs):
+        for question, answer, role in SAMPLES:
+            two_call.append(await run_two_call(question, answer, role))
+            fused.append(await run_fused(question, answer, role))
+        print(f"run {i + 1}/{runs} done")
+
+    print()
+    summarize("two-call", two_call)
+    summarize("fused", fused)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=int(os.environ.get("BENCH_RUNS", "3")))
+    asyncio.run(main(parser.parse_args().runs))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Whisper model size and int8 quantization on CPU.
+
+For each model size x {fp32, int8} reports, over a fixture set:
+- load time
+- RTF (real-time factor): inference seconds / audio seconds (lower is faster)
+- WER (word error rate) against the reference transcripts
+
+Runs in-process (no pool, no batching) with the same decode + VAD path as
+the transcription workers, on the configured ASR backend (ASR_BACKEND;
+compare engines with bench_asr_backends.py). See benchmarks/asr_common.py for the fixture layout.
+
+Usage (from backend/):
+    python benchmarks/bench_whisper.py --sizes tiny,base,small
+    python benchmarks/bench_whisper.py --fixtures /path/to/clips --no-int8
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.asr_common import DEFAULT_FIXTURES, load_fixtures, word_errors
+from services import transcription_worker
+from services.audio_decode import SAMPLE_RATE, decode_audio
+from services.vad import trim_silence
+
+
+def run(size: str, quantize: bool, clips, language: str):
+    started = time.perf_counter()
+    model = transcription_worker.load_model(size, quantize)
+    load_seconds = time.perf_counter() - started
+
+    # Warm-up pass so the first clip doesn't pay one-off allocation costs
+    model.transcribe(clips[0][1], language=language)
+
+    audio_seconds = infer_seconds = 0.0
+    errors = words = 0
+    for _, audio, reference in clips:
+        started = time.perf_counter()
+        result = model.transcribe(audio, language=language)
+        infer_seconds += time.perf_counter() - started
+        audio_seconds += len(audio) / SAMPLE_RATE
+        e, n = word_errors(reference, result["text"])
+        errors += e
+        words += n
+
+    return {
+        "load_seconds": load_seconds,
+        "rtf": infer_seconds / audio_seconds if audio_seconds else 0.0,
+        "wer": errors / words if words else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--sizes", default="tiny,base,small")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--no-int8", action="store_true", help="skip the quantized variants")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        sys.exit(f"No fixtures found in {args.fixtures} (need <name>.<audio> + <name>.txt pairs)")
+
+    # Decode + trim once; every variant sees identical input
+    clips = [(name, trim_silence(decode_audio(data))[0], ref) for name, data, ref in fixtures]
+    total = sum(len(audio) for _, audio, _ in clips) / SAMPLE_RATE
+    print(f"{len(clips)} clips, {total:.1f}s of speech\n")
+
+    print(f"{'model':<12}{'load s':>9}{'RTF':>9}{'WER':>9}")
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        for quantize in ([False] if args.no_int8 else [False, True]):
+            label = f"{size}{'-int8' if quantize else ''}"
+            try:
+                r = run(size, quantize, clips, args.language)
+            except Exception as e:
+                print(f"{label:<12}  ✗ {e}")
+                continue
+            print(f"{label:<12}{r['load_seconds']:>9.2f}{r['rtf']:>9.3f}{r['wer']:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Body, HTTPException, Query, Request, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
-from services.voxtral_service import analyze_voice_answer, transcribe_audio
+from services.voxtral_service import analyze_voice_answer, transcribe_audio, transcribe_audio_bytes, transcription_stats, WHISPER_AVAILABLE
+from services.stream_transcriber import StreamingTranscriber, make_decoder
+from services.transcription_pool import TranscriptionNotReady, TranscriptionQueueFull, transcription_pool
+from services.transcription_batcher import transcription_batcher
+from services.rate_limiter import RateLimitExceeded
+from services import llm_gateway
 from services.scoring_engine import detect_filler_words, check_star_method
-from services.mistral_service import generate_improved_answer, generate_follow_up_questions, generate_coaching_feedback
-import base64
+from services.mistral_service import generate_improvement_bundle, generate_coaching_feedback, stream_coaching_feedback
+from services.streaming import sse_event
+from services.disconnect import cancel_on_disconnect
+import json
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,6 +27,7 @@ class FeedbackRequest(BaseModel):
     is_audio: bool = False
     language: str = "en"
     context: List[Dict] = []
+    role: str = "Software Engineer"
 
 class FollowUpRequest(BaseModel):
     session_id: str
@@ -39,8 +49,62 @@ class AnalyzeTextRequest(BaseModel):
     transcript: str
     role: str
 
+def transcription_busy(e: TranscriptionQueueFull) -> HTTPException:
+    """503 with Retry-After when the transcription queue is full or models are still loading."""
+    if isinstance(e, TranscriptionNotReady):
+        logger.warning(f"⚠️ Whisper still loading - asking client to retry in {e.retry_after}s")
+        detail = "Transcription service is starting up. Please retry shortly."
+    else:
+        logger.warning(f"⚠️ Transcription queue full - asking client to retry in {e.retry_after}s")
+        detail = "Transcription service is busy. Please retry shortly."
+    return HTTPException(
+        status_code=503,
+        detail=detail,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def feedback_response(coaching_data: Dict, answer_text: str, is_audio: bool) -> Dict:
+    """Build the /feedback response body from coaching data and local analysis."""
+    # Local analysis
+    filler_analysis = detect_filler_words(answer_text)
+    
+    return {
+        "user_answer": answer_text,
+        "coaching_feedback": coaching_data.get("feedback", ""),
+        "clarity_score": coaching_data.get("clarity_score", 7),
+        "depth_score": coaching_data.get("depth_score", 7),
+        "communication_score": coaching_data.get("communication_score", 7),
+        "strengths": coaching_data.get("strengths", []),
+        "improvements": coaching_data.get("improvements", []),
+        "follow_up_question": coaching_data.get("follow_up", None),
+        "filler_words": filler_analysis,
+        "word_count": len(answer_text.split()),
+        "transcription": answer_text if is_audio else None
+    }
+
+async def transcription_response(audio_bytes: bytes, language: str, quality: Optional[str] = None) -> dict:
+    """Transcribe audio bytes and build the /transcribe response body."""
+    transcript = await transcribe_audio_bytes(audio_bytes, language, quality)
+    
+    if not transcript or transcript.startswith("Demo:"):
+        logger.warning("⚠️ Whisper module not available - using demo transcription")
+        return {
+            "success": True,
+            "transcript": transcript,
+            "mode": "demo",
+            "note": "Audio transcription module not available. Please ensure Whisper is properly installed."
+        }
+    
+    logger.info(f"✓ Successfully transcribed audio ({len(transcript)} chars)")
+    return {
+        "success": True,
+        "transcript": transcript,
+        "mode": "real"
+    }
+
 @router.post("/audio")
-async def analyze_audio_answer(req: AnalyzeAudioRequest):
+@cancel_on_disconnect
+async def analyze_audio_answer(req: AnalyzeAudioRequest, request: Request):
     """Analyze audio recording: transcribe and provide feedback."""
     try:
         logger.info(f"Analyzing audio for session {req.session_id}")
@@ -74,6 +138,10 @@ async def analyze_audio_answer(req: AnalyzeAudioRequest):
             "word_count": len(transcript.split()),
             "status": "success"
         }
+    except TranscriptionQueueFull as e:
+        raise transcription_busy(e)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"❌ Error analyzing audio: {error_msg}")
@@ -100,7 +168,8 @@ async def analyze_audio_answer(req: AnalyzeAudioRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/feedback")
-async def analyze_answer(req: FeedbackRequest):
+@cancel_on_disconnect
+async def analyze_answer(req: FeedbackRequest, request: Request):
     """Comprehensive answer analysis with multi-language support."""
     try:
         logger.info(f"Analyzing answer for session {req.session_id} in language {req.language}")
@@ -120,22 +189,11 @@ async def analyze_answer(req: FeedbackRequest):
             context=req.context
         )
         
-        # Local analysis
-        filler_analysis = detect_filler_words(answer_text)
-        
-        return {
-            "user_answer": answer_text,
-            "coaching_feedback": coaching_data.get("feedback", ""),
-            "clarity_score": coaching_data.get("clarity_score", 7),
-            "depth_score": coaching_data.get("depth_score", 7),
-            "communication_score": coaching_data.get("communication_score", 7),
-            "strengths": coaching_data.get("strengths", []),
-            "improvements": coaching_data.get("improvements", []),
-            "follow_up_question": coaching_data.get("follow_up", None),
-            "filler_words": filler_analysis,
-            "word_count": len(answer_text.split()),
-            "transcription": answer_text if req.is_audio else None
-        }
+        return feedback_response(coaching_data, answer_text, req.is_audio)
+    except TranscriptionQueueFull as e:
+        raise transcription_busy(e)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"❌ Error analyzing answer: {error_msg}")
@@ -160,6 +218,50 @@ async def analyze_answer(req: FeedbackRequest):
         
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/feedback/stream")
+@cancel_on_disconnect
+async def analyze_answer_stream(req: FeedbackRequest, request: Request):
+    """
+    Streaming variant of /feedback over Server-Sent Events.
+    
+    Emits `transcript` (audio only), then a `field` event per coaching field as
+    soon as the model completes it, then `complete` with the /feedback body.
+    """
+    logger.info(f"Streaming feedback for session {req.session_id} in language {req.language}")
+    
+    answer_text = req.user_answer
+    
+    # Transcribe before the stream starts so queue-full still maps to 503
+    if req.is_audio and req.audio_base64:
+        try:
+            answer_text = await transcribe_audio(req.audio_base64)
+        except TranscriptionQueueFull as e:
+            raise transcription_busy(e)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    # Fail fast with 429 + Retry-After rather than opening a stream that would queue
+    llm_gateway.ensure_capacity("mistral-large-latest")
+    
+    async def event_stream():
+        if req.is_audio:
+            yield sse_event("transcript", {"text": answer_text})
+        async for event in stream_coaching_feedback(
+            question=req.question,
+            answer=answer_text,
+            role=req.role
+        ):
+            if event["event"] == "complete":
+                yield sse_event("complete", feedback_response(event["data"], answer_text, req.is_audio))
+            else:
+                yield sse_event(event["event"], event["data"])
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/followup")
 async def handle_follow_up(req: FollowUpRequest):
     """Handle follow-up question and answer."""
@@ -185,6 +287,8 @@ async def handle_follow_up(req: FollowUpRequest):
             "improvements": coaching_data.get("improvements", []),
             "follow_up_question": coaching_data.get("follow_up", None),
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"❌ Error processing follow-up: {error_msg}")
@@ -207,52 +311,178 @@ async def handle_follow_up(req: FollowUpRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/improved-answer")
-async def get_improved_answer(req: AnalyzeTextRequest):
-    """Get an example of an improved answer."""
+@cancel_on_disconnect
+async def get_improved_answer(req: AnalyzeTextRequest, request: Request, fused: Optional[bool] = Query(None)):
+    """
+    Get an example of an improved answer plus likely follow-up questions.
+    
+    One fused LLM call by default; `?fused=false` forces the two-call path.
+    """
     try:
-        improved = await generate_improved_answer(req.question, req.transcript, req.role)
-        follow_ups = await generate_follow_up_questions(req.question, req.transcript)
-        return {
-            "improved_answer": improved,
-            "follow_up_questions": follow_ups
-        }
+        return await generate_improvement_bundle(req.question, req.transcript, req.role, fused=fused)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/transcribe")
+@cancel_on_disconnect
 async def transcribe_only(
+    request: Request,
     file: UploadFile = File(...),
-    language: str = Form(default="en")
+    language: str = Form(default="en"),
+    quality: Optional[str] = Form(default=None)
 ):
-    """Transcribe audio file without analysis."""
+    """
+    Transcribe audio file without analysis.
+    
+    `quality` (fast/balanced/accurate) picks the Whisper model size.
+    """
     try:
         logger.info("Transcribing audio file")
         
-        # Read file bytes
+        # Read file bytes and transcribe them directly (no base64 round-trip)
         audio_bytes = await file.read()
-        
-        # Convert to base64
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        
-        # Transcribe
-        transcript = await transcribe_audio(audio_base64)
-        
-        if not transcript or transcript.startswith("Demo:"):
-            logger.warning("⚠️ Whisper module not available - using demo transcription")
-            return {
-                "success": True,
-                "transcript": transcript,
-                "mode": "demo",
-                "note": "Audio transcription module not available. Please ensure Whisper is properly installed."
-            }
-        
-        logger.info(f"✓ Successfully transcribed audio ({len(transcript)} chars)")
-        return {
-            "success": True,
-            "transcript": transcript,
-            "mode": "real"
-        }
+        return await transcription_response(audio_bytes, language, quality)
+    except TranscriptionQueueFull as e:
+        raise transcription_busy(e)
     except Exception as e:
         logger.error(f"✗ Transcription error: {str(e)}")
         logger.error(f"✗ Check if Whisper module is installed: pip install openai-whisper")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+
+@router.post("/transcribe/raw")
+@cancel_on_disconnect
+async def transcribe_raw(
+    request: Request,
+    audio_bytes: bytes = Body(..., media_type="application/octet-stream"),
+    language: str = Query("en"),
+    quality: Optional[str] = Query(None)
+):
+    """
+    Transcribe a raw binary request body (Content-Type: audio/webm, audio/wav, ...).
+    
+    Cheapest ingestion path: no multipart parsing and no base64.
+    """
+    try:
+        logger.info(f"Transcribing raw audio body ({request.headers.get('content-type', 'unknown type')})")
+        return await transcription_response(audio_bytes, language, quality)
+    except TranscriptionQueueFull as e:
+        raise transcription_busy(e)
+    except Exception as e:
+        logger.error(f"✗ Transcription error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+
+@router.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    audio_format: str = Query("webm", alias="format"),
+    language: str = Query("en")
+):
+    """
+    Live transcription while the user speaks.
+    
+    Client -> server: binary audio chunks (`?format=pcm` for 16 kHz mono s16le,
+    otherwise any ffmpeg-readable stream such as MediaRecorder webm/opus),
+    then a text frame `{"type": "stop"}` when recording ends.
+    
+    Server -> client (JSON): `partial` (unstable tail, replaced each pass),
+    `segment` (committed text), then `final` with the full transcript.
+    """
+    await websocket.accept()
+    if not WHISPER_AVAILABLE:
+        await websocket.send_json({"type": "error", "error": "Whisper not available on this server"})
+        await websocket.close(code=1011)
+        return
+    if transcription_pool.state == "loading":
+        await websocket.send_json({"type": "error", "error": "Transcription models are still loading - retry shortly"})
+        await websocket.close(code=1013)
+        return
+    
+    transcriber = StreamingTranscriber(language)
+    decoder = make_decoder(audio_format, transcriber.feed)
+    try:
+        await decoder.start()
+    except FileNotFoundError:
+        await websocket.send_json({"type": "error", "error": "ffmpeg not available - send format=pcm"})
+        await websocket.close(code=1011)
+        return
+    logger.info(f"Streaming transcription started (format={audio_format}, language={language})")
+    
+    async def transcribe_loop():
+        while True:
+            await transcriber.new_audio.wait()
+            if not transcriber.ready():
+                transcriber.new_audio.clear()
+                continue
+            try:
+                events = await transcriber.step()
+            except TranscriptionQueueFull as e:
+                # Skip this pass - the next one covers the same audio
+                logger.warning(f"⚠️ Stream pass skipped, transcription queue full ({e.retry_after}s)")
+                await asyncio.sleep(min(e.retry_after, 2))
+                continue
+            except Exception as e:
+                # Tell the client instead of dying silently while it keeps recording
+                logger.error(f"✗ Streaming transcription pass failed: {e}")
+                try:
+                    await websocket.send_json({"type": "error", "error": f"Transcription failed: {e}"})
+                    await websocket.close(code=1011)
+                except Exception:
+                    pass
+                return
+            for event in events:
+                await websocket.send_json(event)
+    
+    loop_task = asyncio.ensure_future(transcribe_loop())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                await decoder.write(message["bytes"])
+            elif message.get("text"):
+                try:
+                    command = json.loads(message["text"]).get("type")
+                except (ValueError, AttributeError):
+                    command = message["text"].strip()
+                if command == "stop":
+                    break
+        
+        # Drop any in-flight pass - finish() re-reads everything not yet committed
+        await decoder.close()
+        loop_task.cancel()
+        try:
+            await loop_task
+        except asyncio.CancelledError:
+            pass
+        for event in await transcriber.finish():
+            await websocket.send_json(event)
+        await websocket.close()
+        logger.info(f"✓ Streaming transcription finished ({len(transcriber.committed_text)} chars)")
+    except WebSocketDisconnect:
+        logger.info("Streaming transcription client disconnected")
+    except Exception as e:
+        logger.error(f"✗ Streaming transcription error: {e}")
+        try:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        loop_task.cancel()
+        decoder.kill()
+
+
+@router.get("/health")
+async def analysis_router_health():
+    """Transcription pipeline status: worker pool, batching and transcript cache."""
+    return {
+        "status": "operational",
+        "service": "analysis",
+        "whisper_available": WHISPER_AVAILABLE,
+        "pool": transcription_pool.stats(),
+        "batching": transcription_batcher.stats(),
+        "transcripts": transcription_stats(),
+    }
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+import os
 import logging
+from services.rate_limiter import RateLimitExceeded
 from services.math_tutor import (
     analyze_problem,
     validate_step,
@@ -19,10 +21,18 @@ from services.reasoning_coach import (
     detect_completion
 )
 from services.exercise_extractor import extract_exercise
+from services.response_cache import llm_cache
+from services import llm_gateway
+from services.fanout import SubCall, fan_out
+from services.disconnect import cancel_on_disconnect
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Per-call budgets for the concurrent /submit fan-out
+SUBMIT_ANALYZE_TIMEOUT = float(os.environ.get("MATH_SUBMIT_ANALYZE_TIMEOUT_SECONDS", "30"))
+SUBMIT_HINTS_TIMEOUT = float(os.environ.get("MATH_SUBMIT_HINTS_TIMEOUT_SECONDS", "30"))
+
 
 class ProblemAnalysisRequest(BaseModel):
     problem_text: str
@@ -117,6 +127,8 @@ async def start_reasoning_session(req: ReasoningCoachStartRequest):
             "coaching_mode": "step_by_step",
             "next_action": "request_student_answer"
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error starting reasoning session: {error_msg}")
@@ -163,6 +175,8 @@ async def validate_reasoning_step(req: ReasoningCoachStepRequest):
                 "is_on_track": validation.get("is_correct", False)
             }
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error validating step: {error_msg}")
@@ -201,6 +215,8 @@ async def get_adaptive_hint(req: ReasoningCoachHintRequest):
             "can_request_higher_level": req.hint_level < 4,
             "next_hint_level": req.hint_level + 1 if req.hint_level < 4 else 4
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error generating hint: {error_msg}")
@@ -238,6 +254,8 @@ async def reveal_full_solution(req: ReasoningCoachRevealRequest):
             },
             "coaching_session_complete": True
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error revealing solution: {error_msg}")
@@ -265,6 +283,8 @@ async def analyze_math_problem(req: ProblemAnalysisRequest):
     try:
         analysis = await analyze_problem(req.problem_text)
         return analysis
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -287,6 +307,8 @@ async def validate_math_step(req: StepValidationRequest):
         return feedback
     except HTTPException:
         raise
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -305,6 +327,8 @@ async def generate_complete_solution(req: SolutionGenerationRequest):
         return solution
     except HTTPException:
         raise
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -322,6 +346,8 @@ async def get_practice_problem(req: PracticeProblemRequest):
         return problem
     except HTTPException:
         raise
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -337,6 +363,8 @@ async def get_hint(req: HintRequest):
         return hint
     except HTTPException:
         raise
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -362,6 +390,8 @@ async def download_solution(req: DownloadSolutionRequest):
         return downloadable
     except HTTPException:
         raise
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -415,6 +445,8 @@ async def extract_math_exercise(
         
         return result
         
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -424,7 +456,9 @@ async def extract_math_exercise(
 
 
 @router.post("/submit")
+@cancel_on_disconnect
 async def submit_exercise(
+    request: Request,
     file: UploadFile = File(None),
     text_input: str = Form(None),
     user_attempt: str = Form(None)
@@ -498,11 +532,22 @@ async def submit_exercise(
                 "status": "error"
             }
         
-        # Step 2: Analyze problem (safe - has demo fallback)
-        problem_analysis = await analyze_problem(problem_text)
-        
-        # Step 3: Generate 3 SPECIFIC pedagogical hints tailored to the problem
-        hints_response = await generate_three_pedagogical_hints(problem_text, user_attempt or "")
+        # Steps 2+3: Analyze problem and generate 3 SPECIFIC pedagogical hints.
+        # The calls are independent, so run them concurrently; a timed-out or
+        # failed call falls back to {} and the defaults below fill its fields.
+        # Either way the call is listed in "partial".
+        results, partial = await fan_out(
+            SubCall("analysis", lambda: analyze_problem(problem_text), SUBMIT_ANALYZE_TIMEOUT, fallback={}),
+            SubCall("hints", lambda: generate_three_pedagogical_hints(problem_text, user_attempt or ""),
+                    SUBMIT_HINTS_TIMEOUT, fallback={}),
+            propagate=(RateLimitExceeded,)
+        )
+        # The services catch their own errors and return mode="fallback" dicts
+        for name, value in results.items():
+            if name not in partial and isinstance(value, dict) and value.get("mode") == "fallback":
+                partial[name] = value.get("error") or "service fallback"
+        problem_analysis = results["analysis"]
+        hints_response = results["hints"]
         
         # Step 4: Prepare chat context for interactive discussion
         chat_messages = [
@@ -535,6 +580,7 @@ async def submit_exercise(
                 "pedagogical_hints": hints_response.get('hints_list', [])
             },
             "user_attempt": user_attempt or None,
+            "partial": partial or None,
             "solution_template": {
                 "approach": "Step-by-step logical solution",
                 "steps_needed": problem_analysis.get('solution_steps_count', 3),
@@ -554,6 +600,8 @@ async def submit_exercise(
             ]
         }
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         import traceback
         logger.error(f"Error in submit_exercise: {str(e)}\n{traceback.format_exc()}")
@@ -631,5 +679,7 @@ async def math_router_health():
             "POST /hint - Get hints for a problem",
             "POST /analyze - Analyze problem topic",
             "GET /health - Health check"
-        ]
+        ],
+        "cache": llm_cache.stats(),
+        "llm": llm_gateway.stats()
     }
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from services.scoring_engine import generate_full_report, calculate_performance_metrics
+from services.rate_limiter import RateLimitExceeded
 from datetime import datetime
 
 router = APIRouter()
@@ -33,6 +34,8 @@ async def generate_report(req: GenerateReportRequest):
         report["role"] = req.role
         report["generated_at"] = datetime.now().isoformat()
         return report
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from services.scoring_engine import get_questions
+from services.streaming import sse_event
+from services.disconnect import cancel_on_disconnect
+from services.rate_limiter import RateLimitExceeded
+from services import llm_gateway
 import uuid
 import logging
 
@@ -25,6 +30,23 @@ class SubmitAnswerRequest(BaseModel):
     language: str = "en"
     role: str = "Software Engineer"
 
+def flatten_feedback(feedback_data: dict, session_id: str) -> dict:
+    """Flatten coaching feedback into the response structure the frontend expects."""
+    return {
+        "success": True,
+        "score": feedback_data.get("overall_score", 70),
+        "feedback": "Good Response",
+        "tips": feedback_data.get("coaching_tip", ""),
+        "strengths": feedback_data.get("key_strengths", []),
+        "improvements": feedback_data.get("areas_for_improvement", []),
+        "clarity_score": feedback_data.get("clarity_score", 7),
+        "structure_score": feedback_data.get("structure_score", 7),
+        "impact_score": feedback_data.get("impact_score", 7),
+        "filler_words": feedback_data.get("filler_words_noticed", []),
+        "star_method": feedback_data.get("star_method_evaluation", {}),
+        "session_id": session_id
+    }
+
 @router.get("/questions")
 async def get_role_questions(role: str = Query(...), language: str = Query("en")):
     """Get all questions for a specific role and language."""
@@ -122,7 +144,8 @@ async def get_current_question(session_id: str):
     }
 
 @router.post("/answer")
-async def submit_answer(req: SubmitAnswerRequest):
+@cancel_on_disconnect
+async def submit_answer(req: SubmitAnswerRequest, request: Request):
     """Submit an answer to get coaching feedback."""
     try:
         logger.info(f"Submitting answer for session {req.session_id}")
@@ -144,21 +167,9 @@ async def submit_answer(req: SubmitAnswerRequest):
             role=role
         )
         
-        # Flatten response structure for frontend
-        return {
-            "success": True,
-            "score": feedback_data.get("overall_score", 70),
-            "feedback": "Good Response",
-            "tips": feedback_data.get("coaching_tip", ""),
-            "strengths": feedback_data.get("key_strengths", []),
-            "improvements": feedback_data.get("areas_for_improvement", []),
-            "clarity_score": feedback_data.get("clarity_score", 7),
-            "structure_score": feedback_data.get("structure_score", 7),
-            "impact_score": feedback_data.get("impact_score", 7),
-            "filler_words": feedback_data.get("filler_words_noticed", []),
-            "star_method": feedback_data.get("star_method_evaluation", {}),
-            "session_id": req.session_id
-        }
+        return flatten_feedback(feedback_data, req.session_id)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"❌ Error processing answer: {error_msg}")
@@ -186,3 +197,38 @@ async def submit_answer(req: SubmitAnswerRequest):
         # For other errors, raise with appropriate status
         logger.error(f"✗ Failed to process answer: {error_msg[:200]}")
         raise HTTPException(status_code=500, detail=f"Error processing answer: {error_msg[:100]}")
+
+@router.post("/answer/stream")
+async def submit_answer_stream(req: SubmitAnswerRequest):
+    """
+    Streaming variant of /answer over Server-Sent Events.
+    
+    Emits a `field` event for each score field (technical_depth, communication,
+    strengths, ...) as soon as the model finishes it, then a `complete` event
+    whose data is exactly the /answer response body.
+    """
+    from services.mistral_service import stream_coaching_feedback
+    from services.scoring_engine import ROLE_MAPPING
+    
+    role = ROLE_MAPPING.get(req.role.lower(), req.role)
+    logger.info(f"Streaming feedback for session {req.session_id} (role '{role}')")
+    
+    # Fail fast with 429 + Retry-After rather than opening a stream that would queue
+    llm_gateway.ensure_capacity("mistral-large-latest")
+    
+    async def event_stream():
+        async for event in stream_coaching_feedback(
+            question=req.question,
+            answer=req.user_answer,
+            role=role
+        ):
+            if event["event"] == "complete":
+                yield sse_event("complete", flatten_feedback(event["data"], req.session_id))
+            else:
+                yield sse_event(event["event"], event["data"])
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
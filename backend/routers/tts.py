@@ -3,67 +3,99 @@ Text-to-Speech Router
 Handles audio generation endpoints with multi-language support
 """
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from services.tts_service import tts_service
+from typing import Optional
+from services.tts_service import TTS_PIPELINE_MIN_CHARS, TTSRequestError, TTSUnavailable, tts_service
+from services import question_audio
+from services.scoring_engine import get_questions
+import os
+import re
+import asyncio
 import logging
+import httpx
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Browser/CDN cache lifetime for synthesized clips
+TTS_CACHE_MAX_AGE_SECONDS = int(os.environ.get("TTS_CACHE_MAX_AGE_SECONDS", "86400"))
+
 class TextInput(BaseModel):
     """Text input for TTS"""
     text: str
     voice_id: str = None
     language: str = "en"
+    # Sentence-pipelined synthesis; default: on for texts >= TTS_PIPELINE_MIN_CHARS
+    pipelined: Optional[bool] = None
 
-@router.post("/speak")
-async def speak(input_data: TextInput):
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """True if an If-None-Match header lists etag (weak comparison) or is `*`."""
+    for token in if_none_match.split(","):
+        token = token.strip()
+        if token.startswith("W/"):
+            token = token[2:]
+        if token == "*" or token == etag:
+            return True
+    return False
+
+async def speech_response(text: str, voice_id: Optional[str], language: str, request: Request,
+                          pipelined: Optional[bool] = None, cacheable: bool = False):
     """
-    Convert text to speech with multi-language support
+    Stream synthesized speech with an ETag header.
     
-    Args:
-        input_data: TextInput with text, optional voice_id, and language code
-        
-    Returns:
-        Audio stream in MP3 format
+    The ETag is the audio cache key (text + voice + model + format). On
+    cacheable (GET) routes a client that already holds the clip gets 304
+    without any synthesis, and the clip is marked publicly cacheable.
+    Long texts are synthesized sentence by sentence in a pipeline.
     """
-    if not input_data.text or len(input_data.text.strip()) == 0:
+    if not text or len(text.strip()) == 0:
         raise HTTPException(status_code=400, detail="Text cannot be empty")
     
     # Limit text length for safety
-    if len(input_data.text) > 5000:
+    if len(text) > 5000:
         raise HTTPException(status_code=400, detail="Text too long (max 5000 characters)")
     
-    logger.info(f"Generating speech for language {input_data.language}")
+    if pipelined is None:
+        pipelined = len(text) >= TTS_PIPELINE_MIN_CHARS
+    # Pipelined audio is a different byte stream from a one-shot synthesis
+    etag = f'"{tts_service.cache_key(text, voice_id)}{"-p" if pipelined else ""}"'
+    cache_headers = {"ETag": etag}
+    if cacheable:
+        cache_headers["Cache-Control"] = f"public, max-age={TTS_CACHE_MAX_AGE_SECONDS}"
+        if etag_matches(etag, request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=cache_headers)
+    
+    logger.info(f"Generating speech for language {language}")
     
-    # Check if TTS service is available
-    if not tts_service.available:
+    try:
+        speak = tts_service.speak_pipelined if pipelined else tts_service.speak
+        audio = speak(text, voice_id=voice_id, language=language)
+        # Wait for the first chunk here so upstream errors still become HTTP errors
+        first_chunk = await audio.__anext__()
+    except TTSUnavailable:
         logger.warning("TTS service not available - ELEVENLABS_API_KEY may not be configured")
         raise HTTPException(
             status_code=503, 
             detail="Coach voice is not available. Please configure ELEVENLABS_API_KEY on HuggingFace Spaces settings."
         )
-    
-    try:
-        audio_bytes = await tts_service.speak(
-            input_data.text, 
-            voice_id=input_data.voice_id,
-            language=input_data.language
-        )
-        
-        if audio_bytes:
-            return StreamingResponse(
-                iter([audio_bytes]),
-                media_type="audio/mpeg",
-                headers={"Content-Disposition": "attachment; filename=audio.mp3"}
+    except StopAsyncIteration:
+        logger.warning("TTS service returned no audio - check ELEVENLABS_API_KEY")
+        raise HTTPException(status_code=503, detail="TTS service unavailable. Check ELEVENLABS_API_KEY configuration.")
+    except TTSRequestError as e:
+        if e.status == 401:
+            raise HTTPException(status_code=503, detail="TTS API key invalid. Verify ELEVENLABS_API_KEY is set correctly on HF Spaces.")
+        elif e.status == 429:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limited. Please try again later.",
+                headers={"Retry-After": e.retry_after} if e.retry_after else None
             )
         else:
-            logger.warning("TTS service returned None - check ELEVENLABS_API_KEY")
-            raise HTTPException(status_code=503, detail="TTS service unavailable. Check ELEVENLABS_API_KEY configuration.")
-    except HTTPException:
-        raise
+            raise HTTPException(status_code=503, detail=f"TTS service error: {str(e)[:100]}")
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="TTS service timed out. Please try again.")
     except Exception as e:
         logger.error(f"TTS Error: {str(e)}")
         if "401" in str(e) or "Unauthorized" in str(e) or "authentication" in str(e).lower():
@@ -72,12 +104,166 @@ async def speak(input_data: TextInput):
             raise HTTPException(status_code=429, detail="Rate limited. Please try again later.")
         else:
             raise HTTPException(status_code=503, detail=f"TTS service error: {str(e)[:100]}")
+    
+    async def audio_stream():
+        yield first_chunk
+        try:
+            async for chunk in audio:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent - the client gets a truncated clip
+            logger.error(f"TTS stream interrupted: {str(e)}")
+        finally:
+            # Client gone mid-clip - stop pulling from ElevenLabs
+            await audio.aclose()
+    
+    return StreamingResponse(
+        audio_stream(),
+        media_type="audio/mpeg",
+        headers={"Content-Disposition": "attachment; filename=audio.mp3", **cache_headers}
+    )
+
+@router.post("/speak")
+async def speak(input_data: TextInput, request: Request):
+    """
+    Convert text to speech with multi-language support
+    
+    Args:
+        input_data: TextInput with text, optional voice_id, and language code
+        
+    Returns:
+        Audio stream in MP3 format, forwarded chunk by chunk as it is synthesized
+        (repeat phrases come straight from the audio cache)
+    """
+    return await speech_response(input_data.text, input_data.voice_id, input_data.language, request,
+                                 input_data.pipelined)
+
+@router.get("/speak")
+async def speak_get(
+    request: Request,
+    text: str = Query(...),
+    voice_id: Optional[str] = Query(None),
+    language: str = Query("en"),
+    pipelined: Optional[bool] = Query(None)
+):
+    """Same as POST /speak, but cacheable by browsers and CDNs (usable as an <audio> src)."""
+    return await speech_response(text, voice_id, language, request, pipelined, cacheable=True)
 
 @router.get("/voices")
 async def get_voices():
     """Get available TTS voices"""
-    if not tts_service.available:
+    if not tts_service.is_available():
         return {"voices": [], "message": "ELEVENLABS_API_KEY not configured"}
     
     voices = await tts_service.get_available_voices()
     return {"voices": voices}
+
+@router.get("/health")
+async def tts_router_health():
+    """TTS status and time-to-first-audio."""
+    return {
+        "status": "operational" if tts_service.is_available() else "unavailable",
+        "service": "tts",
+        "stream": tts_service.stats()
+    }
+
+def parse_byte_range(header: str, size: int):
+    """
+    Parse a single `Range: bytes=...` header into (start, end) inclusive.
+    
+    Returns "ignore" for headers we serve in full (multi-range, other units,
+    invalid ranges), or None when the range cannot be satisfied (416).
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+    if not match or not any(match.groups()):
+        return "ignore"
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        # Syntactically invalid - RFC 9110 says ignore the header
+        return "ignore"
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+async def clip_response(path, request: Request) -> Response:
+    """Serve a pre-synthesized clip with ETag, long caching and HTTP range support."""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{path.stem}"',
+        # File names are content keys - a clip never changes under the same URL
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if etag_matches(headers["ETag"], request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    
+    data = await asyncio.to_thread(path.read_bytes)
+    byte_range = parse_byte_range(request.headers.get("range", ""), len(data)) if "range" in request.headers else "ignore"
+    if byte_range is None:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+    if byte_range != "ignore":
+        start, end = byte_range
+        return Response(
+            data[start:end + 1],
+            status_code=206,
+            media_type="audio/mpeg",
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(data)}"}
+        )
+    return Response(data, media_type="audio/mpeg", headers=headers)
+
+@router.get("/questions/manifest")
+async def question_audio_manifest(
+    role: Optional[str] = Query(None),
+    language: Optional[str] = Query(None),
+    voice_id: Optional[str] = Query(None)
+):
+    """Pre-synthesized question clips (optionally filtered), with their URLs."""
+    manifest = question_audio.load_manifest()
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Question audio has not been built (scripts/presynthesize_questions.py)")
+    clips = [
+        {**clip, "url": f"/tts/questions/audio/{clip['file']}"}
+        for clip in manifest["clips"]
+        if (not role or clip["role"] == role)
+        and (not language or clip["language"] == language)
+        and (not voice_id or clip["voice_id"] == voice_id)
+    ]
+    return {**manifest, "clips": clips}
+
+@router.get("/questions/audio/{file_name}")
+async def question_audio_file(file_name: str, request: Request):
+    """A pre-synthesized clip by file name (supports Range requests)."""
+    if not re.fullmatch(r"[0-9a-f]{64}\.mp3", file_name):
+        raise HTTPException(status_code=404, detail="Unknown clip")
+    path = question_audio.prebuilt_path(file_name[:-4])
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown clip")
+    return await clip_response(path, request)
+
+@router.get("/questions/{role}/{language}/{index}")
+async def question_audio_by_index(
+    role: str,
+    language: str,
+    index: int,
+    request: Request,
+    voice_id: Optional[str] = Query(None)
+):
+    """
+    Audio for question `index` as returned by /session/questions?role=&language=.
+    
+    Served from the pre-synthesized bank; a question that was not built yet
+    falls back to live synthesis (and is logged).
+    """
+    questions = get_questions(role, language)
+    if not 0 <= index < len(questions):
+        raise HTTPException(status_code=404, detail=f"No question {index} for role {role}")
+    text = questions[index]
+    path = question_audio.prebuilt_path(tts_service.cache_key(text, voice_id))
+    if path is not None:
+        return await clip_response(path, request)
+    logger.warning(f"⚠️ Question audio not pre-synthesized ({role} [{language}] #{index}) - synthesizing live")
+    return await speech_response(text, voice_id, language, request, cacheable=True)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Render the whole question bank to audio (build-time / admin job).
+
+Writes one MP3 per (question, voice) plus manifest.json into
+QUESTION_AUDIO_DIR (see services/question_audio.py). Existing clips are
+reused, so re-running after editing the bank only renders new questions.
+
+Usage (from backend/):
+    ELEVENLABS_API_KEY=... python scripts/presynthesize_questions.py
+    ELEVENLABS_API_KEY=... python scripts/presynthesize_questions.py --voices id1,id2 --force
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services import question_audio
+from services.tts_service import tts_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voices", default=os.getenv("ELEVENLABS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL"),
+                        help="comma-separated ElevenLabs voice IDs")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--force", action="store_true", help="re-render clips that already exist")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not tts_service.is_available():
+        sys.exit("ELEVENLABS_API_KEY is not set")
+
+    voices = [v.strip() for v in args.voices.split(",") if v.strip()]
+    manifest = asyncio.run(question_audio.build(voices, force=args.force, concurrency=args.concurrency))
+    total = sum(clip["bytes"] for clip in manifest["clips"])
+    print(f"{len(manifest['clips'])} clips, {total / 1024 / 1024:.1f} MB -> {question_audio.QUESTION_AUDIO_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Speech-to-text engines behind one interface.
+
+Transcription workers only talk to an ASRBackend, so switching engines is a
+configuration change - routers and services never see the difference:
+- "whisper": openai-whisper (PyTorch). int8 = torch dynamic quantization;
+  batches short clips through one whisper.decode() pass
+- "faster-whisper": CTranslate2 engine (pip install faster-whisper), usually
+  several times faster on CPU. int8 = compute_type="int8"
+- "stub": no model - a deterministic transcript derived from the audio
+  length, for tests and load tests
+
+Audio in is 16 kHz mono float32 (as produced by audio_decode).
+
+Configuration (environment variables):
+- ASR_BACKEND: whisper | faster-whisper | stub (default: whisper)
+- ASR_CPU_THREADS: faster-whisper intra-op threads per worker (default: 0 = engine default)
+"""
+
+import os
+import importlib.util
+from typing import Dict, List, Optional
+
+ASR_BACKEND = os.environ.get("ASR_BACKEND", "whisper").lower()
+ASR_CPU_THREADS = int(os.environ.get("ASR_CPU_THREADS", "0"))
+
+SAMPLE_RATE = 16000
+
+
+class ASRBackend:
+    """A loaded speech-to-text model."""
+
+    name = ""
+    module: Optional[str] = None  # package the engine imports
+
+    def __init__(self, model_size: str, quantize: bool = False):
+        self.model_size = model_size
+        self.quantize = quantize
+
+    @classmethod
+    def available(cls) -> bool:
+        return cls.module is None or importlib.util.find_spec(cls.module) is not None
+
+    def transcribe(self, audio, language: str = "en", prompt: str = "", window: bool = False) -> Dict:
+        """
+        Transcribe one clip.
+
+        `window=True` marks an independent streaming window / long-audio chunk:
+        no conditioning on previously decoded text, `prompt` as context.
+
+        Returns:
+            {"text", "segments": [{"start", "end", "text"}]} (seconds)
+        """
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: List, language: str = "en") -> List[str]:
+        """Transcribe several clips; engines that can batch override this."""
+        return [self.transcribe(audio, language)["text"] for audio in audios]
+
+
+def quantize_int8(model):
+    """
+    Apply torch dynamic int8 quantization to a Whisper model's Linear layers (CPU only).
+
+    Whisper wraps nn.Linear in a subclass that only adds dtype casting, which
+    quantize_dynamic does not recognise; in fp32 on CPU the subclass behaves
+    exactly like nn.Linear, so swap the class back before quantizing.
+    """
+    import torch
+    import whisper.model
+
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper on CPU."""
+
+    name = "whisper"
+    module = "whisper"
+
+    def __init__(self, model_size: str, quantize: bool = False):
+        super().__init__(model_size, quantize)
+        import whisper
+
+        self.model = whisper.load_model(model_size, device="cpu")
+        if quantize:
+            self.model = quantize_int8(self.model)
+
+    def transcribe(self, audio, language: str = "en", prompt: str = "", window: bool = False) -> Dict:
+        options = {"initial_prompt": prompt or None, "condition_on_previous_text": False} if window else {}
+        result = self.model.transcribe(audio, language=language, verbose=False, **options)
+        return {
+            "text": result["text"].strip(),
+            "segments": [
+                {"start": seg["start"], "end": seg["end"], "text": seg["text"].strip()}
+                for seg in result.get("segments", [])
+            ],
+        }
+
+    # model.transcribe() defaults: a first pass failing these is re-decoded
+    # at higher temperatures, and a silent one is dropped
+    COMPRESSION_RATIO_THRESHOLD = 2.4
+    LOGPROB_THRESHOLD = -1.0
+    NO_SPEECH_THRESHOLD = 0.6
+
+    def transcribe_batch(self, audios: List, language: str = "en") -> List[str]:
+        """
+        Stack the log-mel spectrograms of clips that fit in one 30 s window
+        and decode them together with whisper.decode(); longer clips go
+        through model.transcribe() one by one.
+
+        The batched pass is the same first pass model.transcribe() makes
+        (temperature 0, with timestamps). A clip that would need its
+        temperature fallback (repetitive or low-confidence output) is
+        re-transcribed alone, so batching never lowers quality.
+        """
+        import torch
+        import whisper
+
+        texts: List[Optional[str]] = [None] * len(audios)
+        batch_index = []
+        mels = []
+        for i, audio in enumerate(audios):
+            if len(audio) > whisper.audio.N_SAMPLES:
+                texts[i] = self.transcribe(audio, language)["text"]
+            else:
+                mels.append(whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels))
+                batch_index.append(i)
+
+        if mels:
+            options = whisper.DecodingOptions(language=language, fp16=False, temperature=0.0)
+            with torch.no_grad():
+                decoded = whisper.decode(self.model, torch.stack(mels).to(self.model.device), options)
+            for i, result in zip(batch_index, decoded):
+                low_confidence = result.avg_logprob < self.LOGPROB_THRESHOLD
+                if low_confidence and result.no_speech_prob > self.NO_SPEECH_THRESHOLD:
+                    texts[i] = ""
+                elif low_confidence or result.compression_ratio > self.COMPRESSION_RATIO_THRESHOLD:
+                    texts[i] = self.transcribe(audios[i], language)["text"]
+                else:
+                    texts[i] = result.text.strip()
+        return texts
+
+
+class FasterWhisperBackend(ASRBackend):
+    """faster-whisper (CTranslate2) on CPU."""
+
+    name = "faster-whisper"
+    module = "faster_whisper"
+
+    def __init__(self, model_size: str, quantize: bool = False):
+        super().__init__(model_size, quantize)
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(
+            model_size,
+            device="cpu",
+            compute_type="int8" if quantize else "float32",
+            cpu_threads=ASR_CPU_THREADS,
+        )
+
+    def transcribe(self, audio, language: str = "en", prompt: str = "", window: bool = False) -> Dict:
+        options = {"initial_prompt": prompt or None, "condition_on_previous_text": False} if window else {}
+        segments, _ = self.model.transcribe(audio, language=language, beam_size=5, **options)
+        # segments is a lazy generator - decoding happens while iterating
+        segments = [
+            {"start": seg.start, "end": seg.end, "text": seg.text.strip()}
+            for seg in segments
+        ]
+        return {"text": " ".join(seg["text"] for seg in segments).strip(), "segments": segments}
+
+
+class StubBackend(ASRBackend):
+    """Deterministic fake engine - same audio length, same transcript."""
+
+    name = "stub"
+
+    def transcribe(self, audio, language: str = "en", prompt: str = "", window: bool = False) -> Dict:
+        seconds = round(len(audio) / SAMPLE_RATE, 2)
+        if not seconds:
+            return {"text": "", "segments": []}
+        text = f"Stub transcript of {seconds} seconds of {language} audio."
+        return {"text": text, "segments": [{"start": 0.0, "end": seconds, "text": text}]}
+
+
+BACKENDS = {backend.name: backend for backend in (WhisperBackend, FasterWhisperBackend, StubBackend)}
+
+
+def backend_class(name: str = ASR_BACKEND):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown ASR backend '{name}' - choose one of {', '.join(BACKENDS)}")
+
+
+def is_available(name: str = ASR_BACKEND) -> bool:
+    """True if the backend's engine package is installed."""
+    try:
+        return backend_class(name).available()
+    except ValueError:
+        return False
+
+
+def load_backend(name: str, model_size: str, quantize: bool = False) -> ASRBackend:
+    """Load a model with the named engine."""
+    return backend_class(name)(model_size, quantize)
@@ -0,0 +1,189 @@
+"""
+Content-addressed cache for synthesized audio (TTS).
+
+Coach greetings, question-bank prompts and standard tips are the same
+strings over and over; each synthesis costs ElevenLabs quota and a second or
+more of latency. Keys hash (model, voice, format, normalized text), values
+are the raw audio bytes.
+
+- Memory tier: hot LRU bounded by total bytes
+- Disk tier: one file per key, LRU by file mtime (touched on every hit),
+  bounded by total bytes; writes are atomic (temp file + rename) so several
+  workers can share the directory
+- Hit/miss counters via stats()
+
+Configuration (environment variables):
+- TTS_CACHE_MEMORY_MAX_MB: memory tier size (default: 32)
+- TTS_CACHE_DISK_MAX_MB: disk tier size (default: 512, 0 disables the disk tier)
+- TTS_CACHE_DIR: disk tier directory (default: <tmp>/voxalab-cache)
+"""
+
+import os
+import asyncio
+import logging
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from services.response_cache import make_key, normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def audio_cache_key(text: str, voice_id: str, model: str, audio_format: str) -> str:
+    """Key for one synthesized clip - whitespace/Unicode variants of a text share it."""
+    return make_key("tts", model, voice_id, audio_format, normalize_text(text))
+
+
+class AudioCache:
+    """Two-tier (memory LRU + size-bounded disk LRU) cache for audio bytes."""
+
+    def __init__(self, name: str, memory_max_bytes: int, disk_max_bytes: int = 0,
+                 disk_dir: Optional[str] = None, extension: str = "mp3"):
+        self.name = name
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.extension = extension
+        self.disk_dir = Path(disk_dir) / name if disk_dir and disk_max_bytes > 0 else None
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            try:
+                self.disk_dir.mkdir(parents=True, exist_ok=True)
+                self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob(f"*/*.{extension}"))
+                logger.info(f"✓ {name} cache disk tier at {self.disk_dir} ({self._disk_bytes // 1024} KB)")
+            except Exception as e:
+                logger.error(f"✗ {name} cache disk tier disabled: {e}")
+                self.disk_dir = None
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # ------------------------------------------------------------------
+    # Disk tier (blocking - always called via asyncio.to_thread)
+    # ------------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.{self.extension}"
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # LRU: mark as recently used
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"{self.name} cache: unreadable entry {path.name}: {e}")
+            return None
+
+    def _disk_set(self, key: str, data: bytes):
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._disk_bytes += len(data) - previous
+        if self._disk_bytes > self.disk_max_bytes:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        """Delete least recently used files until the tier is 90% full."""
+        files = []
+        for path in self.disk_dir.glob(f"*/*.{self.extension}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        # Other workers write to the same directory - recount from disk
+        self._disk_bytes = sum(size for _, size, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        for _, size, path in sorted(files):
+            if self._disk_bytes <= target:
+                break
+            try:
+                path.unlink()
+                self._disk_bytes -= size
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio bytes, or None on miss."""
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.hits_memory += 1
+            return data
+
+        if self.disk_dir:
+            data = await asyncio.to_thread(self._disk_get, key)
+            if data is not None:
+                self._remember(key, data)
+                self.hits_disk += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, data: bytes):
+        """Store audio bytes in both tiers."""
+        if not data:
+            return
+        self._remember(key, data)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._disk_set, key, data)
+            except Exception as e:
+                logger.warning(f"{self.name} cache: disk write failed: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes."""
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "name": self.name,
+            "memory_entries": len(self._memory),
+            "memory_kb": self._memory_bytes // 1024,
+            "disk_kb": self._disk_bytes // 1024 if self.disk_dir else None,
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 3) if lookups else 0.0,
+            "disk_tier": str(self.disk_dir) if self.disk_dir else None,
+        }
+
+
+# Shared cache for synthesized speech
+tts_audio_cache = AudioCache(
+    "tts",
+    memory_max_bytes=int(float(os.environ.get("TTS_CACHE_MEMORY_MAX_MB", "32")) * 1024 * 1024),
+    disk_max_bytes=int(float(os.environ.get("TTS_CACHE_DISK_MAX_MB", "512")) * 1024 * 1024),
+    disk_dir=os.environ.get("TTS_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "voxalab-cache"),
+)
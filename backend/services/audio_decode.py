@@ -0,0 +1,55 @@
+"""
+In-memory audio decoding for Whisper.
+
+Pipes encoded audio (webm/opus, wav, mp3, m4a, ...) through ffmpeg's stdin
+and reads 16 kHz mono PCM back from its stdout, straight into a float32
+NumPy array - the same format whisper.load_audio() produces, but without a
+temp file on disk. The array can be passed directly to model.transcribe().
+"""
+
+import subprocess
+
+SAMPLE_RATE = 16000
+
+
+def ffmpeg_command(sample_rate: int = SAMPLE_RATE):
+    """ffmpeg args: any container on stdin -> mono s16le PCM on stdout."""
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+
+
+def decode_audio(data: bytes, sample_rate: int = SAMPLE_RATE):
+    """
+    Decode audio bytes to a mono float32 NumPy array in [-1, 1].
+
+    Raises:
+        ValueError if the data is empty or ffmpeg cannot decode it
+        RuntimeError if ffmpeg is not installed
+    """
+    if not data:
+        raise ValueError("Audio data is empty")
+
+    try:
+        process = subprocess.run(
+            ffmpeg_command(sample_rate),
+            input=data,
+            capture_output=True,
+            check=True,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg is not installed - required for audio decoding")
+    except subprocess.CalledProcessError as e:
+        detail = e.stderr.decode("utf-8", errors="ignore").strip().splitlines()
+        raise ValueError(f"Failed to decode audio: {detail[-1] if detail else 'ffmpeg error'}")
+
+    import numpy as np
+    return np.frombuffer(process.stdout, np.int16).astype(np.float32) / 32768.0
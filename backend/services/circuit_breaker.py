@@ -0,0 +1,163 @@
+"""
+Per-model circuit breaker for Mistral calls.
+
+When Mistral is down or very slow, waiting for the SDK timeout on every
+request only to fall back to demo scoring makes p99 latency tens of seconds.
+The breaker tracks consecutive failures and latency-SLO breaches per model:
+
+- closed: calls go through; failures/slow calls are counted
+- open: calls fail instantly with CircuitOpenError so services take their
+  local fallback path (dynamic demo scores, demo math JSON) in milliseconds
+- half_open: after the recovery period one probe call is let through; a fast
+  success closes the circuit, anything else re-opens it
+
+Every state change starts a new generation. before_call() returns the
+generation a call was admitted in, and results from an older generation
+(a slow call admitted before the trip, a late failure from before the
+recovery) are ignored, so only the half-open probe moves the circuit out
+of open/half_open.
+
+Configuration (environment variables):
+- LLM_BREAKER_FAILURES: consecutive failures/SLO breaches before opening (default: 5)
+- LLM_BREAKER_LATENCY_SLO_SECONDS: calls slower than this count as a breach (default: 20)
+- LLM_BREAKER_RECOVERY_SECONDS: how long to stay open before probing (default: 30)
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_LATENCY_SLO_SECONDS = float(os.environ.get("LLM_BREAKER_LATENCY_SLO_SECONDS", "20"))
+LLM_BREAKER_RECOVERY_SECONDS = float(os.environ.get("LLM_BREAKER_RECOVERY_SECONDS", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while its circuit is open."""
+
+    def __init__(self, model: str, retry_in: float):
+        self.model = model
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for {model} - LLM unavailable, next probe in {retry_in:.0f}s")
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a latency SLO and single half-open probe."""
+
+    def __init__(self, name: str, failure_threshold: int, latency_slo: float, recovery_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.recovery_seconds = recovery_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._generation = 0
+        self.opened_count = 0
+        self.short_circuited = 0
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._generation += 1
+
+    def _is_stale(self, generation: Optional[int]) -> bool:
+        return generation is not None and generation != self._generation
+
+    def _open(self, reason: str):
+        if self.state != OPEN:
+            self.opened_count += 1
+            logger.error(f"✗ Circuit for {self.name} OPEN ({reason}) - serving local fallbacks")
+        self._set_state(OPEN)
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def _close(self):
+        if self.state != CLOSED:
+            logger.info(f"✓ Circuit for {self.name} closed - LLM recovered")
+            self._set_state(CLOSED)
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def before_call(self) -> int:
+        """
+        Raise CircuitOpenError unless this call may go upstream.
+
+        Returns the generation to pass back to on_success/on_failure/release.
+        """
+        if self.state == OPEN:
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.recovery_seconds:
+                self.short_circuited += 1
+                raise CircuitOpenError(self.name, self.recovery_seconds - elapsed)
+            self._set_state(HALF_OPEN)
+            logger.info(f"Circuit for {self.name} half-open - probing")
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.short_circuited += 1
+                raise CircuitOpenError(self.name, 0)
+            self._probe_in_flight = True
+        return self._generation
+
+    def on_success(self, latency: float, generation: Optional[int] = None):
+        """Record a completed call; slow successes count as SLO breaches."""
+        if self._is_stale(generation):
+            return
+        if latency > self.latency_slo:
+            self.on_failure(f"latency {latency:.1f}s > SLO {self.latency_slo:.0f}s", generation)
+            return
+        self._close()
+
+    def on_failure(self, reason: str = "error", generation: Optional[int] = None):
+        """Record a failed (or SLO-breaching) call."""
+        if self._is_stale(generation):
+            return
+        if self.state == HALF_OPEN:
+            self._open(f"probe failed: {reason}")
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._open(f"{self._failures} consecutive failures, last: {reason}")
+
+    def release(self, generation: Optional[int] = None):
+        """Forget a call that gave no verdict on health (cancelled, 4xx, 429)."""
+        if self._is_stale(generation):
+            return
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened_count": self.opened_count,
+            "short_circuited": self.short_circuited,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    """Get (or create) the circuit breaker for a model."""
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker(
+            model,
+            failure_threshold=LLM_BREAKER_FAILURES,
+            latency_slo=LLM_BREAKER_LATENCY_SLO_SECONDS,
+            recovery_seconds=LLM_BREAKER_RECOVERY_SECONDS,
+        )
+    return _breakers[model]
+
+
+def stats() -> Dict:
+    return {model: breaker.stats() for model, breaker in _breakers.items()}
@@ -0,0 +1,69 @@
+"""
+Cancel in-flight work when the HTTP client goes away.
+
+If a user closes the tab or re-records while /analysis/audio is running, the
+transcription and LLM calls would otherwise finish and be thrown away.
+run_cancellable() runs the work as a task, polls request.is_disconnected()
+and cancels the task as soon as the client is gone. Cancellation propagates
+down: queued transcription jobs are dropped, and LLM HTTP requests are
+aborted once no other caller is waiting on them (see SingleFlight).
+"""
+
+import asyncio
+import functools
+import logging
+from typing import Any, Awaitable
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnected and its work was cancelled."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        super().__init__(f"Client disconnected from {endpoint} - work cancelled")
+
+
+async def run_cancellable(request, work: Awaitable[Any], endpoint: str) -> Any:
+    """
+    Await work, cancelling it if the client behind request disconnects.
+
+    Raises:
+        ClientDisconnected if the work was cancelled because the client left
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                metrics.incr("cancelled.requests")
+                metrics.incr(f"cancelled.requests.{endpoint}")
+                logger.info(f"⚠️ Client left {endpoint} - cancelled in-flight work")
+                raise ClientDisconnected(endpoint)
+    except asyncio.CancelledError:
+        # Server-side cancellation (shutdown, timeout) - don't leak the task
+        task.cancel()
+        raise
+
+
+def cancel_on_disconnect(endpoint):
+    """
+    Decorator for FastAPI endpoints that declare a `request: Request` param:
+    run the whole endpoint via run_cancellable so a client disconnect cancels
+    its transcription/LLM work.
+    """
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        request = kwargs.get("request")
+        if request is None:
+            return await endpoint(*args, **kwargs)
+        return await run_cancellable(request, endpoint(*args, **kwargs), request.url.path)
+    return wrapper
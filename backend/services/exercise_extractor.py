@@ -10,21 +10,14 @@ import re
 from typing import Dict, Optional, List
 from io import BytesIO
 import json
+from services import llm_gateway
+from services.rate_limiter import RateLimitExceeded
 
 logger = logging.getLogger(__name__)
 
-# Initialize Mistral client for text extraction
-api_key = os.environ.get("MISTRAL_API_KEY", "").strip()
-if api_key:
-    try:
-        from mistralai import Mistral
-        client = Mistral(api_key=api_key)
-        logger.info("✓ Mistral client initialized for exercise extraction")
-    except Exception as e:
-        logger.error(f"✗ Failed to initialize Mistral client: {e}")
-        client = None
-else:
-    client = None
+# Mistral access for text extraction goes through the shared async LLM gateway
+if llm_gateway.is_configured():
+    logger.info("✓ Exercise extraction using shared Mistral LLM gateway")
 
 
 async def extract_from_image(image_bytes: bytes, filename: str) -> Dict:
@@ -55,8 +48,8 @@ async def extract_from_image(image_bytes: bytes, filename: str) -> Dict:
             }
         
         # Use MathΣtral to identify and structure the exercise
-        if client:
-            response = client.chat.complete(
+        if llm_gateway.is_configured():
+            content = await llm_gateway.complete(
                 model="mathstral-7b",
                 messages=[
                     {
@@ -81,8 +74,6 @@ Respond with JSON:
                     }
                 ]
             )
-            
-            content = response.choices[0].message.content
             import re
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
             if json_match:
@@ -100,6 +91,8 @@ Respond with JSON:
             "filename": filename
         }
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error extracting from image: {str(e)}")
         return {
@@ -151,8 +144,8 @@ async def extract_from_pdf(pdf_bytes: bytes, filename: str) -> Dict:
             }
         
         # Use MathΣtral to parse and structure
-        if client:
-            response = client.chat.complete(
+        if llm_gateway.is_configured():
+            content = await llm_gateway.complete(
                 model="mathstral-7b",
                 messages=[
                     {
@@ -176,8 +169,6 @@ Respond with JSON:
                     }
                 ]
             )
-            
-            content = response.choices[0].message.content
             import re
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
             if json_match:
@@ -196,6 +187,8 @@ Respond with JSON:
             "full_text": extracted_text
         }
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error extracting from PDF: {str(e)}")
         return {
@@ -242,8 +235,8 @@ async def extract_from_latex(latex_text: str, filename: str = "exercise.tex") ->
         cleaned = re.sub(r'\\\[|\\\]', '', cleaned)
         cleaned = re.sub(r'\$\$|\$', '', cleaned)
         
-        if client:
-            response = client.chat.complete(
+        if llm_gateway.is_configured():
+            content = await llm_gateway.complete(
                 model="mathstral-7b",
                 messages=[
                     {
@@ -266,8 +259,6 @@ Output as JSON:
                     }
                 ]
             )
-            
-            content = response.choices[0].message.content
             import re
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
             if json_match:
@@ -286,6 +277,8 @@ Output as JSON:
             "original_latex": latex_text
         }
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error extracting from LaTeX: {str(e)}")
         return {
@@ -310,8 +303,8 @@ async def extract_from_text(text_content: str, filename: str = "exercise.txt") -
             }
         
         # Use MathΣtral to identify and structure problems
-        if client:
-            response = client.chat.complete(
+        if llm_gateway.is_configured():
+            content = await llm_gateway.complete(
                 model="mathstral-7b",
                 messages=[
                     {
@@ -334,8 +327,6 @@ Output as JSON:
                     }
                 ]
             )
-            
-            content = response.choices[0].message.content
             import re
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
             if json_match:
@@ -352,6 +343,8 @@ Output as JSON:
             "filename": filename
         }
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"❌ Error parsing text: {str(e)}")
         return {
@@ -380,6 +373,8 @@ async def extract_exercise(
         try:
             latex_text = file_bytes.decode('utf-8')
             return await extract_from_latex(latex_text, filename)
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error decoding LaTeX: {e}")
             return {
@@ -391,6 +386,8 @@ async def extract_exercise(
         try:
             text_content = file_bytes.decode('utf-8')
             return await extract_from_text(text_content, filename)
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error decoding text: {e}")
             return {
@@ -0,0 +1,78 @@
+"""
+Concurrent fan-out for endpoints that make several independent LLM calls.
+
+Instead of awaiting sub-calls one after another (latency = sum of round
+trips), run them together (latency ~ the slowest one). Each sub-call has its
+own timeout and fallback value, so one slow or failing call degrades its part
+of the response instead of the whole endpoint.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class SubCall:
+    """One independent sub-call of a fan-out: name, coroutine factory, timeout, fallback."""
+
+    def __init__(self, name: str, fn: Callable[[], Awaitable[Any]], timeout: float, fallback: Any = None):
+        self.name = name
+        self.fn = fn
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+async def fan_out(
+    *calls: SubCall,
+    propagate: Tuple[Type[BaseException], ...] = ()
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run sub-calls concurrently, each bounded by its own timeout.
+
+    Args:
+        calls: SubCall definitions (names must be unique)
+        propagate: exception types that should fail the whole fan-out
+            (e.g. RateLimitExceeded for an honest 429) instead of falling back;
+            the first one raised cancels the sub-calls still running
+
+    Returns:
+        (results, errors): results maps name -> value (fallback on timeout or
+        error); errors maps name -> reason for every sub-call that fell back
+    """
+    tasks = {
+        call.name: asyncio.ensure_future(asyncio.wait_for(call.fn(), timeout=call.timeout))
+        for call in calls
+    }
+    pending = set(tasks.values())
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                error = task.exception()
+                # Fail fast - no point waiting for siblings of a doomed response
+                if propagate and isinstance(error, propagate):
+                    raise error
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    outcomes = {name: task.exception() for name, task in tasks.items()}
+
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for call in calls:
+        error = outcomes[call.name]
+        if error is None:
+            results[call.name] = tasks[call.name].result()
+            continue
+        if isinstance(error, asyncio.TimeoutError):
+            reason = f"timed out after {call.timeout:g}s"
+        else:
+            reason = f"{type(error).__name__}: {error}"
+        logger.warning(f"⚠️ Sub-call '{call.name}' fell back ({reason})")
+        results[call.name] = call.fallback
+        errors[call.name] = reason
+    return results, errors
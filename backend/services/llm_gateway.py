@@ -0,0 +1,330 @@
+"""
+Shared async LLM gateway for every Mistral-backed service.
+
+All services (coaching, math tutor, reasoning coach, exercise extraction,
+reports, voice analysis) go through this module instead of creating their own
+synchronous `Mistral` clients. It provides:
+- One pooled, keep-alive HTTP connection pool per model
+- Non-blocking calls (`chat.complete_async` / `chain.ainvoke`) so a slow LLM
+  call never freezes the uvicorn event loop
+- Single-flight coalescing: identical concurrent prompts share one call
+- Adaptive per-model rate limiting with bounded queueing (RateLimitExceeded)
+- Per-model circuit breaker that fails fast (CircuitOpenError) while
+  Mistral is down or breaching its latency SLO, so callers fall back instantly
+- A single place to configure timeouts and connection limits
+"""
+
+import os
+import time
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from mistralai import Mistral
+
+from services import circuit_breaker, rate_limiter
+from services.rate_limiter import RateLimitExceeded
+from services.response_cache import make_key
+from services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Connection pool sizing per model (tune with env vars on HF Spaces)
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.environ.get("LLM_MAX_KEEPALIVE", "20"))
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "60"))
+
+# Lazily created per-model clients: {model_name: client}
+_clients: Dict[str, Mistral] = {}
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+_chat_models: Dict[str, Any] = {}
+
+# Identical concurrent prompts share one upstream call
+_single_flight = SingleFlight("llm")
+
+
+def get_api_key() -> str:
+    """Return the configured Mistral API key, or empty string if missing/placeholder."""
+    key = os.environ.get("MISTRAL_API_KEY", "").strip()
+    if key in ("your_mistral_api_key_here", "your-mistral-api-key-here"):
+        return ""
+    return key
+
+
+def is_configured() -> bool:
+    """True when a usable MISTRAL_API_KEY is available."""
+    return bool(get_api_key())
+
+
+def _rate_limit_hook(model: str):
+    """httpx response hook that feeds rate-limit headers to the model's limiter."""
+    limiter = rate_limiter.get_limiter(model)
+
+    async def observe_rate_limit_headers(response: httpx.Response):
+        limiter.observe_headers(response.headers)
+
+    return observe_rate_limit_headers
+
+
+def get_client(model: str) -> Optional[Mistral]:
+    """
+    Get (or create) the pooled async-capable Mistral client for a model.
+
+    Each model gets its own httpx.AsyncClient so connections are kept alive
+    and reused across requests instead of re-handshaking on every call.
+    """
+    if model in _clients:
+        return _clients[model]
+
+    api_key = get_api_key()
+    if not api_key:
+        return None
+
+    try:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            ),
+            timeout=LLM_TIMEOUT_SECONDS,
+            event_hooks={"response": [_rate_limit_hook(model)]},
+        )
+        client = Mistral(api_key=api_key, async_client=http_client)
+        _http_clients[model] = http_client
+        _clients[model] = client
+        logger.info(f"✓ LLM gateway: pooled client created for {model}")
+        return client
+    except Exception as e:
+        logger.error(f"✗ LLM gateway: failed to create client for {model}: {e}")
+        return None
+
+
+def get_chat_model(model: str = "mistral-large-latest"):
+    """
+    Get (or create) the shared LangChain chat model for a model name.
+
+    ChatMistralAI keeps its own pooled httpx.AsyncClient, so sharing one
+    instance per model gives every chain the same connection pool. That
+    client gets the same rate-limit header hook as get_client(), so chains
+    slow down before they hit a 429, not only after.
+    """
+    if model in _chat_models:
+        return _chat_models[model]
+
+    api_key = get_api_key()
+    if not api_key:
+        return None
+
+    try:
+        from langchain_mistralai import ChatMistralAI
+        chat_model = ChatMistralAI(
+            model=model,
+            api_key=api_key,
+            timeout=int(LLM_TIMEOUT_SECONDS),
+            max_concurrent_requests=LLM_MAX_CONNECTIONS,
+        )
+        async_client = getattr(chat_model, "async_client", None)
+        if isinstance(async_client, httpx.AsyncClient):
+            hooks = async_client.event_hooks
+            async_client.event_hooks = {**hooks, "response": [*hooks["response"], _rate_limit_hook(model)]}
+        else:
+            logger.warning(f"⚠️ LLM gateway: no httpx client on {model} chat model - rate-limit headers not observed")
+        _chat_models[model] = chat_model
+        logger.info(f"✓ LLM gateway: LangChain chat model created for {model}")
+        return chat_model
+    except Exception as e:
+        logger.error(f"✗ LLM gateway: failed to create chat model for {model}: {e}")
+        return None
+
+
+def _error_status(error: Exception) -> Optional[int]:
+    """HTTP status from a mistralai SDKError or httpx.HTTPStatusError, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _error_headers(error: Exception):
+    response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+def ensure_capacity(model: str):
+    """Raise RateLimitExceeded now if a new request for model would queue too long."""
+    rate_limiter.get_limiter(model).check_capacity()
+
+
+async def _admit(model: str, max_wait: Optional[float] = None) -> int:
+    """
+    Pass the circuit breaker, then wait (at most max_wait) for a rate-limit token.
+
+    Returns the breaker generation the call was admitted in.
+    """
+    breaker = circuit_breaker.get_breaker(model)
+    generation = breaker.before_call()
+    try:
+        await rate_limiter.get_limiter(model).acquire(max_wait)
+    except BaseException:
+        breaker.release(generation)
+        raise
+    return generation
+
+
+def _on_upstream_error(model: str, error: Exception, generation: int):
+    """Feed an upstream error to the limiter/breaker; return the error to raise."""
+    limiter = rate_limiter.get_limiter(model)
+    breaker = circuit_breaker.get_breaker(model)
+    status = _error_status(error)
+    if status == 429:
+        breaker.release(generation)
+        limiter.observe_headers(_error_headers(error))
+        limiter.on_rate_limited()
+        return RateLimitExceeded(model, limiter.retry_after(), limiter.queue_depth)
+    if status is not None and 400 <= status < 500 and status != 408:
+        # Our request was bad - says nothing about upstream health
+        breaker.release(generation)
+    else:
+        breaker.on_failure(type(error).__name__, generation)
+    return error
+
+
+def _can_retry(model: str, error: Exception, deadline: float) -> bool:
+    """True if an upstream 429 can be re-queued before the wait budget runs out."""
+    if not isinstance(error, RateLimitExceeded):
+        return False
+    remaining = deadline - time.monotonic()
+    if rate_limiter.get_limiter(model).estimated_wait() > remaining:
+        return False
+    logger.info(f"↻ 429 from {model} - re-queueing ({remaining:.1f}s of wait budget left)")
+    return True
+
+
+async def _guarded(model: str, fn):
+    """
+    Run fn() behind the model's circuit breaker and rate limiter.
+
+    An upstream 429 re-queues the call on the (now slower) limiter and
+    retries it; RateLimitExceeded is raised only once the total wait would
+    exceed the limiter's max queue wait.
+    """
+    deadline = time.monotonic() + rate_limiter.get_limiter(model).max_wait
+    while True:
+        generation = await _admit(model, deadline - time.monotonic())
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except Exception as e:
+            error = _on_upstream_error(model, e, generation)
+            if _can_retry(model, error, deadline):
+                continue
+            if error is e:
+                raise
+            raise error from e
+        except BaseException:
+            circuit_breaker.get_breaker(model).release(generation)
+            raise
+        break
+    rate_limiter.get_limiter(model).on_success()
+    circuit_breaker.get_breaker(model).on_success(time.monotonic() - started, generation)
+    return result
+
+
+async def complete(model: str, messages: List[Dict], **kwargs) -> str:
+    """
+    Run a non-blocking chat completion and return the message content.
+
+    Args:
+        model: Mistral model name (e.g. "mathstral-7b", "mistral-large-latest")
+        messages: Chat messages in Mistral format
+        **kwargs: Extra completion params (temperature, max_tokens, ...)
+
+    Returns:
+        The assistant message content
+
+    Raises:
+        RateLimitExceeded if the model's queue is full or upstream 429s outlast the wait budget;
+        CircuitOpenError if the model is failing and the circuit is open;
+        RuntimeError if the gateway is not configured; SDK errors otherwise
+    """
+    client = get_client(model)
+    if client is None:
+        raise RuntimeError("Mistral API key not configured")
+
+    async def call():
+        response = await client.chat.complete_async(model=model, messages=messages, **kwargs)
+        return response.choices[0].message.content
+
+    fingerprint = make_key("complete", model, messages, kwargs)
+    return await _single_flight.do(fingerprint, lambda: _guarded(model, call))
+
+
+async def invoke_chain(chain, inputs: Dict, model: str = "mistral-large-latest") -> Any:
+    """Run a LangChain runnable without blocking the event loop."""
+    if chain is None:
+        raise RuntimeError("LLM chain not initialized")
+
+    fingerprint = make_key("chain", id(chain), inputs)
+    return await _single_flight.do(fingerprint, lambda: _guarded(model, lambda: chain.ainvoke(inputs)))
+
+
+def stats() -> Dict:
+    """Gateway counters for health/debug endpoints."""
+    return {
+        "single_flight": _single_flight.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "circuit_breakers": circuit_breaker.stats(),
+    }
+
+
+async def stream_chain(chain, inputs: Dict, model: str = "mistral-large-latest") -> AsyncIterator[str]:
+    """
+    Stream a `prompt | llm` runnable, yielding text tokens as they arrive.
+
+    Use a chain without an output parser so raw tokens come through.
+    """
+    if chain is None:
+        raise RuntimeError("LLM chain not initialized")
+
+    deadline = time.monotonic() + rate_limiter.get_limiter(model).max_wait
+    while True:
+        generation = await _admit(model, deadline - time.monotonic())
+        started = time.monotonic()
+        first_token_latency = None
+        try:
+            async for chunk in chain.astream(inputs):
+                text = getattr(chunk, "content", chunk)
+                if text:
+                    if first_token_latency is None:
+                        first_token_latency = time.monotonic() - started
+                    yield text
+        except Exception as e:
+            error = _on_upstream_error(model, e, generation)
+            # A 429 can only be retried before any tokens reached the caller
+            if first_token_latency is None and _can_retry(model, error, deadline):
+                continue
+            if error is e:
+                raise
+            raise error from e
+        except BaseException:
+            circuit_breaker.get_breaker(model).release(generation)
+            raise
+        break
+    rate_limiter.get_limiter(model).on_success()
+    # Streams are judged on time-to-first-token, not total generation time
+    circuit_breaker.get_breaker(model).on_success(
+        first_token_latency if first_token_latency is not None else time.monotonic() - started,
+        generation,
+    )
+
+
+async def aclose():
+    """Close all pooled HTTP connections (call on app shutdown)."""
+    for model, http_client in list(_http_clients.items()):
+        try:
+            await http_client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing LLM client for {model}: {e}")
+    _http_clients.clear()
+    _clients.clear()
+    _chat_models.clear()
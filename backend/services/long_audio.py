@@ -0,0 +1,151 @@
+"""
+Parallel chunked transcription for long recordings.
+
+model.transcribe() walks a long answer in 30 s windows one after another on a
+single core. For recordings with more than LONG_AUDIO_MIN_SECONDS of audio,
+the worker that decoded the audio instead:
+- finds speech regions with VAD and cuts at the pauses between them, packing
+  regions into chunks of at most LONG_AUDIO_CHUNK_SECONDS (one Whisper window)
+- hard-cuts a region with no usable pause, overlapping the pieces by
+  LONG_AUDIO_OVERLAP_SECONDS
+- returns the chunks as 16 kHz s16le PCM
+
+The web process then transcribes the chunks in parallel across the
+transcription pool and merges them in order. Segments inside an overlap are
+kept from only one side of its midpoint, and leftover repeated words are
+stitched away. Wall-clock time scales down with the number of pool workers.
+
+Configuration (environment variables):
+- LONG_AUDIO_ENABLED: "false" keeps single-pass transcription (default: true)
+- LONG_AUDIO_MIN_SECONDS: audio length that switches to chunked mode (default: 60)
+- LONG_AUDIO_CHUNK_SECONDS: max chunk length (default: 30)
+- LONG_AUDIO_OVERLAP_SECONDS: overlap between hard-cut pieces (default: 1.0)
+"""
+
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from services import metrics, transcription_worker, vad
+from services.stream_transcriber import stitch
+from services.transcription_pool import transcription_pool
+
+logger = logging.getLogger(__name__)
+
+LONG_AUDIO_ENABLED = os.environ.get("LONG_AUDIO_ENABLED", "true").lower() in ("1", "true", "yes")
+LONG_AUDIO_MIN_SECONDS = float(os.environ.get("LONG_AUDIO_MIN_SECONDS", "60"))
+LONG_AUDIO_CHUNK_SECONDS = float(os.environ.get("LONG_AUDIO_CHUNK_SECONDS", "30"))
+LONG_AUDIO_OVERLAP_SECONDS = float(os.environ.get("LONG_AUDIO_OVERLAP_SECONDS", "1.0"))
+
+
+def _pieces(regions: List[Tuple[int, int]], chunk: int, overlap: int) -> List[Tuple[int, int, int]]:
+    """Speech regions as (start, end, overlap_with_previous) spans no longer than `chunk`."""
+    pieces = []
+    for start, end in regions:
+        pos, lead = start, 0
+        while end - pos > chunk:
+            pieces.append((pos, pos + chunk, lead))
+            pos, lead = pos + chunk - overlap, overlap
+        pieces.append((pos, end, lead))
+    return pieces
+
+
+def split_long_audio(audio, sample_rate: int = vad.SAMPLE_RATE) -> Optional[Tuple[List[Dict], Dict]]:
+    """
+    Split decoded audio into chunks at speech pauses (runs in a worker).
+
+    Returns:
+        None if the audio is short enough for a single pass, else
+        (chunks, vad_stats) with chunks [{"pcm", "seconds", "overlap"}]
+    """
+    import numpy as np
+
+    total = len(audio)
+    if not LONG_AUDIO_ENABLED or total < LONG_AUDIO_MIN_SECONDS * sample_rate:
+        return None
+
+    regions = vad.speech_regions(audio, sample_rate) if vad.VAD_ENABLED else [(0, total)]
+    chunk = int(LONG_AUDIO_CHUNK_SECONDS * sample_rate)
+    gap = np.zeros(int(vad.VAD_KEEP_GAP_SECONDS * sample_rate), dtype=audio.dtype)
+
+    # Pack consecutive pieces into chunks; a piece that overlaps the previous
+    # one always starts a new chunk so the overlap sits at a chunk boundary
+    groups: List[List[Tuple[int, int, int]]] = []
+    length = 0
+    for piece in _pieces(regions, chunk, int(LONG_AUDIO_OVERLAP_SECONDS * sample_rate)):
+        size = piece[1] - piece[0]
+        if groups and not piece[2] and length + len(gap) + size <= chunk:
+            groups[-1].append(piece)
+            length += len(gap) + size
+        else:
+            groups.append([piece])
+            length = size
+
+    chunks = []
+    for group in groups:
+        parts = []
+        for i, (start, end, _) in enumerate(group):
+            if i:
+                parts.append(gap)
+            parts.append(audio[start:end])
+        samples = np.concatenate(parts)
+        chunks.append({
+            "pcm": (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes(),
+            "seconds": len(samples) / sample_rate,
+            "overlap": group[0][2] / sample_rate,
+        })
+
+    speech = sum(end - start for start, end in regions)
+    stats = {
+        "audio_seconds": round(total / sample_rate, 2),
+        "speech_seconds": round(speech / sample_rate, 2),
+        "trimmed_seconds": round((total - speech) / sample_rate, 2),
+        "regions": len(regions),
+        "chunks": len(chunks),
+    }
+    return chunks, stats
+
+
+def merge_chunks(chunks: List[Dict], results: List[Dict]) -> str:
+    """Join per-chunk transcripts in order, de-duplicating text inside overlaps."""
+    text = ""
+    for i, (chunk, result) in enumerate(zip(chunks, results)):
+        segments = result.get("segments") or [{"start": 0.0, "end": chunk["seconds"], "text": result["text"]}]
+        # Each side of an overlap keeps only the segments on its side of the midpoint
+        if chunk["overlap"]:
+            segments = [s for s in segments if s["end"] > chunk["overlap"] / 2]
+        next_overlap = chunks[i + 1]["overlap"] if i + 1 < len(chunks) else 0.0
+        if next_overlap:
+            segments = [s for s in segments if s["start"] < chunk["seconds"] - next_overlap / 2]
+        piece = " ".join(s["text"] for s in segments if s["text"])
+        if chunk["overlap"]:
+            # Only a segment straddling the midpoint can repeat - about a second of words
+            piece = stitch(text, piece, max_overlap=6)
+        if piece:
+            text = f"{text} {piece}".strip()
+    return text
+
+
+async def transcribe_chunks(chunks: List[Dict], language: str, model_size: str) -> str:
+    """Transcribe chunks in parallel across the pool (at most one per worker at a time)."""
+    semaphore = asyncio.Semaphore(transcription_pool.workers)
+
+    async def run(chunk: Dict) -> Dict:
+        async with semaphore:
+            return await transcription_pool.submit(
+                transcription_worker.transcribe_pcm, chunk["pcm"], language, "", model_size
+            )
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunks]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        # On error or cancellation, don't leave sibling chunks queued
+        for task in tasks:
+            task.cancel()
+
+    metrics.incr("long_audio.recordings")
+    metrics.incr("long_audio.chunks", len(chunks))
+    logger.info(f"✓ Long recording transcribed in {len(chunks)} parallel chunks")
+    return merge_chunks(chunks, results)
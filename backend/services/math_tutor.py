@@ -7,22 +7,17 @@ import os
 import json
 import logging
 from typing import Dict, List, Optional
+from services import llm_gateway
+from services.rate_limiter import RateLimitExceeded
+from services.response_cache import llm_cache, make_key, normalize_text
 
 logger = logging.getLogger(__name__)
 
-# Initialize Mistral client with error handling
-api_key = os.environ.get("MISTRAL_API_KEY", "").strip()
-if not api_key:
+# Mistral access goes through the shared async LLM gateway
+if not llm_gateway.is_configured():
     logger.warning("⚠️ MISTRAL_API_KEY not found in environment - Math Tutor will use demo fallback")
-    client = None
 else:
-    try:
-        from mistralai import Mistral
-        client = Mistral(api_key=api_key)
-        logger.info("✓ Mistral client initialized successfully")
-    except Exception as e:
-        logger.error(f"✗ Failed to initialize Mistral client: {e}")
-        client = None
+    logger.info("✓ Math Tutor using shared Mistral LLM gateway")
 
 MATH_TUTOR_SYSTEM = """You are MathΣtral, an expert mathematical reasoning AI specialized in:
 - Algebra, Geometry, Trigonometry, Calculus, Linear Algebra, Differential Equations, Abstract Algebra
@@ -59,6 +54,10 @@ When complete, provide:
 - Mastery score (0.0-1.0) based on student's approach quality
 - Learning insights about the student's mathematical reasoning"""
 
+# Bump a version whenever its prompt changes so cached responses are not reused
+ANALYZE_PROMPT_VERSION = "analyze-v1"
+HINTS_PROMPT_VERSION = "three-hints-v1"
+
 LATEX_GENERATOR_PROMPT = """You are a LaTeX formatting expert. Convert mathematical solutions into clean, properly formatted LaTeX.
 
 Requirements:
@@ -77,7 +76,7 @@ async def analyze_problem(problem_text: str) -> Dict:
     Analyze a math problem to classify topic, difficulty, and concepts needed.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.warning("Mistral client not available, using demo mode for problem analysis")
             return {
                 "topic": "Advanced Mathematics",
@@ -90,7 +89,12 @@ async def analyze_problem(problem_text: str) -> Dict:
                 "mode": "demo"
             }
         
-        response = client.chat.complete(
+        cache_key = make_key("mathstral-7b", ANALYZE_PROMPT_VERSION, normalize_text(problem_text))
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {
@@ -117,13 +121,12 @@ Respond with JSON:
             ]
         )
         
-        content = response.choices[0].message.content
-        
         # Parse JSON response
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
             analysis = json.loads(json_match.group())
+            await llm_cache.set(cache_key, analysis)
             return analysis
         
         return {
@@ -135,6 +138,8 @@ Respond with JSON:
             "first_question": "What approach would you use to solve this?",
             "solution_steps_count": "Multiple"
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"✗ Error analyzing problem: {error_msg}")
@@ -172,7 +177,7 @@ async def validate_step(problem_text: str, step_number: int, student_step: str,
     Validate a student's mathematical step and provide feedback.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.warning("Mistral client not available, using demo mode for step validation")
             return {
                 "is_correct": True,
@@ -207,7 +212,7 @@ Validate this step and respond with JSON:
   "suggestion": "What to try instead (if wrong)"
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {
@@ -221,8 +226,6 @@ Validate this step and respond with JSON:
             ]
         )
         
-        content = response.choices[0].message.content
-        
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
@@ -238,6 +241,8 @@ Validate this step and respond with JSON:
             "next_question": "Try again",
             "reasoning_quality_score": 0
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"✗ Error validating step: {error_msg}")
@@ -275,7 +280,7 @@ async def generate_solution(problem_text: str, student_solution: str) -> Dict:
     Generate complete solution with LaTeX and conceptual summary.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.warning("Mistral client not available, using demo mode for solution generation")
             return {
                 "full_solution": f"Your solution approach: {student_solution}\n\nMathematical Solution:\nLet α be irrational.\nBy Dirichlet's Pigeonhole Principle, for any N, there exist integers m, n with 1 ≤ n ≤ N such that |mα - n| < 1/N.\nThis means {mα} < 1/N, so the fractional part gets arbitrarily close to 0.\nSimilarly, by considering the sequence {nα} for n = 1, 2, ..., N, we can make {nα} approach any value in [0,1).\nBy Weyl's Equidistribution Theorem, the sequence {nα} is equidistributed modulo 1.\nTherefore, the fractional parts {nα} are dense in [0,1].",
@@ -290,7 +295,7 @@ async def generate_solution(problem_text: str, student_solution: str) -> Dict:
                 "mode": "demo"
             }
         
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {
@@ -322,8 +327,6 @@ Output as JSON:
             ]
         )
         
-        content = response.choices[0].message.content
-        
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
@@ -341,6 +344,8 @@ Output as JSON:
             "mastery_score": 0.5,
             "learning_insights": "Analysis in progress"
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"✗ Error generating solution: {error_msg}")
@@ -381,7 +386,7 @@ async def generate_practice_problem(topic: str, difficulty: int) -> Dict:
     Generate a similar practice problem based on topic and difficulty.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.warning("Mistral client not available, using demo mode for practice problem generation")
             return {
                 "problem": f"Generate a proof that for an irrational number α, the sequence {{nα}} is dense in [0,1]",
@@ -394,7 +399,7 @@ async def generate_practice_problem(topic: str, difficulty: int) -> Dict:
                 "mode": "demo"
             }
         
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {
@@ -415,8 +420,6 @@ Respond with JSON:
             ]
         )
         
-        content = response.choices[0].message.content
-        
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
@@ -428,6 +431,8 @@ Respond with JSON:
             "hint_sequence": [],
             "solution_overview": ""
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"✗ Error generating practice problem: {error_msg}")
@@ -456,13 +461,13 @@ Respond with JSON:
         }
 
 
-def format_latex_solution(solution_text: str) -> str:
+async def format_latex_solution(solution_text: str) -> str:
     """
     Ensure solution is properly formatted as LaTeX.
     """
     try:
         # Request LaTeX formatting from MathΣtral
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {
@@ -476,7 +481,9 @@ def format_latex_solution(solution_text: str) -> str:
             ]
         )
         
-        return response.choices[0].message.content
+        return content
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error formatting LaTeX: {e}")
         return solution_text
@@ -488,7 +495,7 @@ async def generate_hint(problem_text: str, student_progress: str = "") -> Dict:
     Does NOT give away the answer.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.warning("Mistral client not available, using demo hint")
             return {
                 "hint": "Try breaking the problem into smaller parts. What's the first thing you need to find?",
@@ -515,7 +522,7 @@ Output as JSON:
   "common_error_to_avoid": "One common mistake students make here"
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {
@@ -529,14 +536,14 @@ Output as JSON:
             ]
         )
         
-        content = response.choices[0].message.content
-        
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
             return json.loads(json_match.group())
         return json.loads(content)
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error generating hint: {error_msg}")
@@ -564,7 +571,7 @@ async def generate_three_pedagogical_hints(problem_text: str, user_attempt: str
     These hints are problem-specific and guide students step-by-step.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.warning("Mistral client not available, using demo hints")
             return {
                 "hint_1": "Start by identifying what you know and what you need to find.",
@@ -573,6 +580,14 @@ async def generate_three_pedagogical_hints(problem_text: str, user_attempt: str
                 "mode": "demo"
             }
         
+        cache_key = make_key(
+            "mathstral-7b", HINTS_PROMPT_VERSION,
+            normalize_text(problem_text), normalize_text(user_attempt)
+        )
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""Generate 3 SPECIFIC PEDAGOGICAL HINTS for this math problem.
         
 PROBLEM: {problem_text}
@@ -599,7 +614,7 @@ Output as JSON:
   "hint_3": "Hint about near-completion (e.g., 'Now verify your pattern holds for the general case')"
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {
@@ -613,19 +628,18 @@ Output as JSON:
             ]
         )
         
-        content = response.choices[0].message.content
-        
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
             hints = json.loads(json_match.group())
-            logger.info(f"Generated specific hints for problem: {hints}")
-            return hints
-        
-        hints = json.loads(content)
+        else:
+            hints = json.loads(content)
         logger.info(f"Generated specific hints for problem: {hints}")
+        await llm_cache.set(cache_key, hints)
         return hints
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error generating pedagogical hints: {error_msg}")
@@ -0,0 +1,28 @@
+"""
+Process-local counters for health/debug endpoints.
+
+Deliberately tiny: named integer/float counters that services bump with
+incr() and the /metrics endpoint reads with snapshot(). Names use dots,
+e.g. "cancelled.llm_calls" or "cancelled.requests./analysis/audio".
+"""
+
+from collections import defaultdict
+from typing import Dict, Union
+
+Number = Union[int, float]
+
+_counters: Dict[str, Number] = defaultdict(int)
+
+
+def incr(name: str, amount: Number = 1):
+    """Add amount to a named counter."""
+    _counters[name] += amount
+
+
+def get(name: str) -> Number:
+    return _counters.get(name, 0)
+
+
+def snapshot() -> Dict[str, Number]:
+    """Copy of all counters, sorted by name."""
+    return dict(sorted(_counters.items()))
@@ -20,18 +20,23 @@ Using: mistralai SDK with Mistral Large 3 model
 import os
 import json
 import re
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from mistralai import Mistral
+from typing import AsyncIterator, Dict, List, Optional
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from langchain_mistralai import ChatMistralAI
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.runnables import RunnablePassthrough
+from services import llm_gateway
+from services.rate_limiter import RateLimitExceeded
+from services.streaming import IncrementalJSONParser
 
 logger = logging.getLogger(__name__)
 
+# One fused LLM call for /analysis/improved-answer instead of two (set "false" to compare)
+FUSED_IMPROVEMENT_ENABLED = os.environ.get("FUSED_IMPROVEMENT_PROMPT", "true").lower() in ("1", "true", "yes")
+
 # Initialize Mistral client - handle missing API key gracefully
-api_key = os.environ.get("MISTRAL_API_KEY", "").strip()
+api_key = llm_gateway.get_api_key()
 
 # Log API key status for debugging
 if api_key:
@@ -39,20 +44,23 @@ if api_key:
 else:
     logger.warning("✗ MISTRAL_API_KEY not found in environment")
 
-client = None
 llm = None
+# Kept for existing imports (verification scripts): the gateway's pooled
+# Mistral client, or None without an API key
+client = None
 
 try:
-    if api_key and api_key != "your_mistral_api_key_here":
-        client = Mistral(api_key=api_key)
-        llm = ChatMistralAI(model="mistral-large-latest", api_key=api_key)
+    if api_key:
+        # Shared pooled chat model from the LLM gateway (non-blocking ainvoke)
+        llm = llm_gateway.get_chat_model("mistral-large-latest")
+        client = llm_gateway.get_client("mistral-large-latest")
         logger.info("✓ Mistral client initialized successfully")
     else:
         logger.warning("⚠️ MISTRAL_API_KEY not set or placeholder value - AI coaching will use demo fallback")
 except Exception as e:
     logger.error(f"✗ Failed to initialize Mistral client: {e}")
-    client = None
     llm = None
+    client = None
 
 # ============================================================================
 # PROMPT TEMPLATES - Define coaching templates with LangChain
@@ -156,6 +164,44 @@ Respond as JSON:
 Respond with ONLY valid JSON, no additional text.
 """)
 
+# Fused template: STAR rewrite + follow-up questions in ONE round trip.
+# Both conditioned on the same question/answer, so one call replaces
+# IMPROVEMENT_PROMPT + FOLLOWUP_PROMPT for /analysis/improved-answer.
+FUSED_IMPROVEMENT_PROMPT = ChatPromptTemplate.from_template("""
+You are an interview coach helping a candidate perfect their answer, and an
+interviewer preparing to probe it deeper.
+
+1. Create an EXCELLENT example answer demonstrating the STAR method clearly.
+   Make it realistic, specific, and interview-worthy (2-3 minutes / 300-400 words).
+2. Based on the candidate's ORIGINAL answer, generate 3 sharp follow-up questions that:
+   dig into decision-making, challenge assumptions or trade-offs, and assess learning.
+
+Role: {role}
+Original Question: {question}
+Their Current Answer: {original_answer}
+
+Format your response as JSON:
+{{
+  "improved_answer": "Full STAR-structured answer here...",
+  "star_breakdown": {{
+    "situation": "What was the context?",
+    "task": "What were you responsible for?",
+    "action": "What specific steps did you take?",
+    "result": "What was the quantifiable outcome?"
+  }},
+  "key_improvements": ["improvement1", "improvement2", "improvement3"],
+  "why_this_works": "Explanation of why this approach is effective",
+  "followup_questions": [
+    "Question 1?",
+    "Question 2?",
+    "Question 3?"
+  ],
+  "question_focus": ["problem_solving", "technical_depth", "learning"]
+}}
+
+Respond with ONLY valid JSON, no additional text.
+""")
+
 # Template for comprehensive session report
 REPORT_PROMPT = ChatPromptTemplate.from_template("""
 You are generating a professional interview performance report.
@@ -198,19 +244,131 @@ json_parser = JsonOutputParser()
 
 if llm is not None:
     coaching_chain = COACHING_PROMPT | llm | json_parser
+    # Same prompt without the parser - streams raw tokens for SSE endpoints
+    coaching_stream_chain = COACHING_PROMPT | llm
     improvement_chain = IMPROVEMENT_PROMPT | llm | json_parser
     followup_chain = FOLLOWUP_PROMPT | llm | json_parser
+    fused_improvement_chain = FUSED_IMPROVEMENT_PROMPT | llm | json_parser
     report_chain = REPORT_PROMPT | llm | json_parser
 else:
     coaching_chain = None
+    coaching_stream_chain = None
     improvement_chain = None
     followup_chain = None
+    fused_improvement_chain = None
     report_chain = None
 
 # ============================================================================
 # SERVICE FUNCTIONS - High-level API for coaching operations
 # ============================================================================
 
+def _calculate_dynamic_score(answer_text: str) -> int:
+    """Calculate a dynamic demo score based on answer quality indicators."""
+    score = 3  # Base score
+    
+    # Bonus for length (well-developed answer)
+    if len(answer_text.split()) > 50:
+        score += 2
+    if len(answer_text.split()) > 100:
+        score += 1
+        
+    # Bonus for numbers and metrics
+    if any(char.isdigit() for char in answer_text):
+        score += 2
+        
+    # Bonus for STAR method indicators
+    if any(word in answer_text.lower() for word in ['because', 'first', 'then', 'result', 'impact', 'improve']):
+        score += 1.5
+        
+    # Bonus for structured thinking words
+    if any(word in answer_text.lower() for word in ['approach', 'strategy', 'decision', 'trade-off', 'consider']):
+        score += 1
+        
+    # Bonus for technical depth indicators
+    if any(word in answer_text.lower() for word in ['algorithm', 'database', 'api', 'architecture', 'optimize', 'performance']):
+        score += 1
+    
+    # Cap at reasonable maximum for demo
+    return min(int(score), 9)
+
+
+def _demo_coaching_feedback(answer: str) -> Dict:
+    """Dynamic demo feedback used when the coaching chain is not configured."""
+    demo_score = _calculate_dynamic_score(answer)
+    
+    return {
+        "clarity_score": demo_score - 1 if demo_score > 1 else 3,
+        "structure_score": demo_score,
+        "impact_score": demo_score - 1 if demo_score > 2 else 2,
+        "overall_score": demo_score,
+        "key_strengths": ["Good effort", "Clear communication"],
+        "areas_for_improvement": ["Add more specific examples", "Quantify outcomes"],
+        "coaching_tip": "Great start! Try adding specific metrics to strengthen your answer.",
+        "filler_words_noticed": [],
+        "star_method_evaluation": {
+            "situation": "detected",
+            "task": "detected",
+            "action": "detected",
+            "result": "detected"
+        }
+    }
+
+
+def _error_coaching_feedback(answer: str, error: Exception) -> Dict:
+    """Log an LLM error and return dynamic demo feedback instead."""
+    error_msg = str(error)
+    logger.error(f"✗ Error in coaching feedback: {error_msg}")
+    
+    # Log specific error types
+    if "401" in error_msg or "Unauthorized" in error_msg:
+        logger.error("✗ 401 UNAUTHORIZED: MISTRAL_API_KEY is invalid, expired, or not set correctly on HF Spaces")
+        logger.error("✗ Please check that MISTRAL_API_KEY environment variable is set in HF Spaces settings")
+    elif "403" in error_msg:
+        logger.error("✗ 403 FORBIDDEN: API key may not have permission for this endpoint")
+    elif "Invalid request" in error_msg or "Bad request" in error_msg:
+        logger.error("✗ Bad request: Check the request format and parameters")
+    
+    # Use dynamic demo score on error
+    demo_score = _calculate_dynamic_score(answer)
+    
+    return {
+        "clarity_score": demo_score - 1 if demo_score > 1 else 3,
+        "structure_score": demo_score,
+        "impact_score": demo_score - 1 if demo_score > 2 else 2,
+        "overall_score": demo_score,
+        "key_strengths": ["Clear communication", "Good pacing"],
+        "areas_for_improvement": ["Add quantifiable metrics", "Provide more context"],
+        "coaching_tip": "Solid answer! Consider adding specific numbers and timelines to make it even stronger.",
+        "filler_words_noticed": [],
+        "star_method_evaluation": {
+            "situation": "detected",
+            "task": "detected",
+            "action": "detected",
+            "result": "detected"
+        }
+    }
+
+
+def _normalize_coaching_result(result: Dict) -> Dict:
+    """Ensure all required feedback fields exist with fallbacks."""
+    return {
+        "clarity_score": result.get("clarity_score", 7),
+        "structure_score": result.get("structure_score", 7),
+        "impact_score": result.get("impact_score", 7),
+        "overall_score": result.get("overall_score", 7),
+        "key_strengths": result.get("key_strengths", ["Good effort", "Clear communication"]),
+        "areas_for_improvement": result.get("areas_for_improvement", ["Add more specific examples", "Quantify outcomes"]),
+        "coaching_tip": result.get("coaching_tip", "Great start! Try adding specific metrics to strengthen your answer."),
+        "filler_words_noticed": result.get("filler_words_noticed", []),
+        "star_method_evaluation": result.get("star_method_evaluation", {
+            "situation": "detected",
+            "task": "detected",
+            "action": "detected",
+            "result": "detected"
+        })
+    }
+
+
 async def generate_coaching_feedback(
     question: str, 
     answer: str, 
@@ -230,114 +388,74 @@ async def generate_coaching_feedback(
     Returns:
         Dict with scores, feedback, and coaching tips
     """
-    # Helper function to calculate dynamic demo score
-    def calculate_dynamic_score(answer_text: str) -> int:
-        """Calculate a dynamic demo score based on answer quality indicators."""
-        score = 3  # Base score
-        
-        # Bonus for length (well-developed answer)
-        if len(answer_text.split()) > 50:
-            score += 2
-        if len(answer_text.split()) > 100:
-            score += 1
-            
-        # Bonus for numbers and metrics
-        if any(char.isdigit() for char in answer_text):
-            score += 2
-            
-        # Bonus for STAR method indicators
-        if any(word in answer_text.lower() for word in ['because', 'first', 'then', 'result', 'impact', 'improve']):
-            score += 1.5
-            
-        # Bonus for structured thinking words
-        if any(word in answer_text.lower() for word in ['approach', 'strategy', 'decision', 'trade-off', 'consider']):
-            score += 1
-            
-        # Bonus for technical depth indicators
-        if any(word in answer_text.lower() for word in ['algorithm', 'database', 'api', 'architecture', 'optimize', 'performance']):
-            score += 1
-        
-        # Cap at reasonable maximum for demo
-        return min(int(score), 9)
-    
     try:
         if coaching_chain is None:
             logger.warning("⚠️ Coaching chain not initialized - using dynamic demo scoring")
-            demo_score = calculate_dynamic_score(answer)
-            
-            return {
-                "clarity_score": demo_score - 1 if demo_score > 1 else 3,
-                "structure_score": demo_score,
-                "impact_score": demo_score - 1 if demo_score > 2 else 2,
-                "overall_score": demo_score,
-                "key_strengths": ["Good effort", "Clear communication"],
-                "areas_for_improvement": ["Add more specific examples", "Quantify outcomes"],
-                "coaching_tip": "Great start! Try adding specific metrics to strengthen your answer.",
-                "filler_words_noticed": [],
-                "star_method_evaluation": {
-                    "situation": "detected",
-                    "task": "detected",
-                    "action": "detected",
-                    "result": "detected"
-                }
-            }
+            return _demo_coaching_feedback(answer)
         
         # Invoke chain with input variables
-        result = coaching_chain.invoke({
+        result = await llm_gateway.invoke_chain(coaching_chain, {
             "question": question,
             "answer": answer,
             "role": role
         })
         
-        # Ensure all required fields exist with fallbacks
-        return {
-            "clarity_score": result.get("clarity_score", 7),
-            "structure_score": result.get("structure_score", 7),
-            "impact_score": result.get("impact_score", 7),
-            "overall_score": result.get("overall_score", 7),
-            "key_strengths": result.get("key_strengths", ["Good effort", "Clear communication"]),
-            "areas_for_improvement": result.get("areas_for_improvement", ["Add more specific examples", "Quantify outcomes"]),
-            "coaching_tip": result.get("coaching_tip", "Great start! Try adding specific metrics to strengthen your answer."),
-            "filler_words_noticed": result.get("filler_words_noticed", []),
-            "star_method_evaluation": result.get("star_method_evaluation", {
-                "situation": "detected",
-                "task": "detected",
-                "action": "detected",
-                "result": "detected"
-            })
-        }
+        return _normalize_coaching_result(result)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
-        error_msg = str(e)
-        logger.error(f"✗ Error in coaching feedback: {error_msg}")
-        
-        # Log specific error types
-        if "401" in error_msg or "Unauthorized" in error_msg:
-            logger.error("✗ 401 UNAUTHORIZED: MISTRAL_API_KEY is invalid, expired, or not set correctly on HF Spaces")
-            logger.error("✗ Please check that MISTRAL_API_KEY environment variable is set in HF Spaces settings")
-        elif "403" in error_msg:
-            logger.error("✗ 403 FORBIDDEN: API key may not have permission for this endpoint")
-        elif "Invalid request" in error_msg or "Bad request" in error_msg:
-            logger.error("✗ Bad request: Check the request format and parameters")
-        
-        # Use dynamic demo score on error
-        demo_score = calculate_dynamic_score(answer)
-        
-        return {
-            "clarity_score": demo_score - 1 if demo_score > 1 else 3,
-            "structure_score": demo_score,
-            "impact_score": demo_score - 1 if demo_score > 2 else 2,
-            "overall_score": demo_score,
-            "key_strengths": ["Clear communication", "Good pacing"],
-            "areas_for_improvement": ["Add quantifiable metrics", "Provide more context"],
-            "coaching_tip": "Solid answer! Consider adding specific numbers and timelines to make it even stronger.",
-            "filler_words_noticed": [],
-            "star_method_evaluation": {
-                "situation": "detected",
-                "task": "detected",
-                "action": "detected",
-                "result": "detected"
-            }
-        }
+        return _error_coaching_feedback(answer, e)
+
+
+async def stream_coaching_feedback(
+    question: str,
+    answer: str,
+    role: str
+) -> AsyncIterator[Dict]:
+    """
+    Stream coaching feedback field by field as the LLM generates it.
+    
+    Yields:
+        {"event": "field", "data": {"name": ..., "value": ...}} for each
+        top-level COACHING_PROMPT field as soon as its value is complete, then
+        {"event": "complete", "data": <same dict as generate_coaching_feedback>}
+        or, when Mistral is rate limited, a final
+        {"event": "error", "data": {"error": "rate_limited", "retry_after": ...}}
+    """
+    if coaching_stream_chain is None:
+        logger.warning("⚠️ Coaching chain not initialized - using dynamic demo scoring")
+        yield {"event": "complete", "data": _demo_coaching_feedback(answer)}
+        return
+    
+    parser = IncrementalJSONParser()
+    try:
+        async for token in llm_gateway.stream_chain(coaching_stream_chain, {
+            "question": question,
+            "answer": answer,
+            "role": role
+        }):
+            for name, value in parser.feed(token):
+                yield {"event": "field", "data": {"name": name, "value": value}}
+    except RateLimitExceeded as e:
+        # Honest backpressure instead of fake scores
+        yield {"event": "error", "data": {
+            "error": "rate_limited",
+            "detail": str(e),
+            "retry_after": e.retry_after,
+            "queue_depth": e.queue_depth,
+        }}
+        return
+    except Exception as e:
+        # Fields already sent stay valid; finish with the demo payload
+        yield {"event": "complete", "data": _error_coaching_feedback(answer, e)}
+        return
+
+    if not parser.done:
+        error = ValueError("Coaching response was not a complete JSON object")
+        yield {"event": "complete", "data": _error_coaching_feedback(answer, error)}
+        return
+
+    yield {"event": "complete", "data": _normalize_coaching_result(parser.fields)}
 
 
 async def generate_improved_answer(
@@ -374,7 +492,7 @@ async def generate_improved_answer(
                 "why_this_works": "This approach demonstrates clear problem-solving methodology."
             }
         
-        result = improvement_chain.invoke({
+        result = await llm_gateway.invoke_chain(improvement_chain, {
             "question": question,
             "original_answer": original_answer,
             "role": role
@@ -391,6 +509,8 @@ async def generate_improved_answer(
             "key_improvements": result.get("key_improvements", ["More specific examples", "Quantified results", "Clear structure"]),
             "why_this_works": result.get("why_this_works", "This approach demonstrates clear problem-solving methodology.")
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error generating improvement suggestions: {e}")
         return {
@@ -443,7 +563,7 @@ async def generate_follow_up_questions(
                 ]
             }
         
-        result = followup_chain.invoke({
+        result = await llm_gateway.invoke_chain(followup_chain, {
             "question": question,
             "answer": answer
         })
@@ -456,6 +576,8 @@ async def generate_follow_up_questions(
             ]),
             "question_focus": result.get("question_focus", ["deeper_context", "decision_making", "impact"])
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error generating follow-up questions: {e}")
         return {
@@ -468,6 +590,67 @@ async def generate_follow_up_questions(
         }
 
 
+async def generate_improvement_bundle(
+    question: str,
+    original_answer: str,
+    role: str,
+    fused: Optional[bool] = None
+) -> Dict:
+    """
+    Improved STAR answer plus follow-up questions for /analysis/improved-answer.
+    
+    Fused mode (default, FUSED_IMPROVEMENT_PROMPT env) gets both from one LLM
+    call; otherwise the two chains run as separate calls. If the fused call
+    fails or returns incomplete JSON, falls back to the two-call path.
+    
+    Returns:
+        {"improved_answer": <generate_improved_answer dict>,
+         "follow_up_questions": <generate_follow_up_questions dict>}
+    """
+    if fused is None:
+        fused = FUSED_IMPROVEMENT_ENABLED
+    
+    if fused and fused_improvement_chain is not None:
+        try:
+            result = await llm_gateway.invoke_chain(fused_improvement_chain, {
+                "question": question,
+                "original_answer": original_answer,
+                "role": role
+            })
+            if result.get("improved_answer") and result.get("followup_questions"):
+                return {
+                    "improved_answer": {
+                        "improved_answer": result["improved_answer"],
+                        "star_breakdown": result.get("star_breakdown", {
+                            "situation": "Unknown",
+                            "task": "Unknown",
+                            "action": "Unknown",
+                            "result": "Unknown"
+                        }),
+                        "key_improvements": result.get("key_improvements", ["More specific examples", "Quantified results", "Clear structure"]),
+                        "why_this_works": result.get("why_this_works", "This approach demonstrates clear problem-solving methodology.")
+                    },
+                    "follow_up_questions": {
+                        "followup_questions": result["followup_questions"],
+                        "question_focus": result.get("question_focus", ["deeper_context", "decision_making", "impact"])
+                    }
+                }
+            logger.warning("⚠️ Fused improvement response incomplete - using two-call path")
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Fused improvement call failed ({e}) - using two-call path")
+    
+    improved, follow_ups = await asyncio.gather(
+        generate_improved_answer(question, original_answer, role),
+        generate_follow_up_questions(question, original_answer)
+    )
+    return {
+        "improved_answer": improved,
+        "follow_up_questions": follow_ups
+    }
+
+
 async def generate_comprehensive_report(
     role: str,
     session_answers: List[Dict],
@@ -518,7 +701,7 @@ async def generate_comprehensive_report(
                 "total_questions": num_questions
             }
         
-        result = report_chain.invoke({
+        result = await llm_gateway.invoke_chain(report_chain, {
             "role": role,
             "num_questions": num_questions,
             "avg_score": round(avg_score, 1),
@@ -537,6 +720,8 @@ async def generate_comprehensive_report(
             "average_score": round(avg_score, 1),
             "total_questions": num_questions
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error generating report: {e}")
         return {
@@ -560,7 +745,7 @@ async def generate_improved_answer_legacy(question: str, original_answer: str, r
     Used if LangChain integration unavailable.
     """
     try:
-        response = client.chat.complete(
+        return await llm_gateway.complete(
             model="mistral-large-latest",
             messages=[{
                 "role": "user",
@@ -574,7 +759,8 @@ Label: Situation, Task, Action, Result clearly.
                 """
             }]
         )
-        return response.choices[0].message.content
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         return f"Error generating improved answer: {str(e)}"
 
@@ -0,0 +1,151 @@
+"""
+Pre-synthesized audio for the static question banks.
+
+Every question in QUESTION_BANK_MULTI_LANGUAGE and QUESTION_BANK is fixed
+text, so it is rendered once - at build time or by an admin - instead of on
+demand:
+
+    python scripts/presynthesize_questions.py --voices <voice_id>,...
+
+build() writes one MP3 per (question text, voice) into QUESTION_AUDIO_DIR,
+named by the same content key the TTS audio cache uses, plus manifest.json
+listing (role, language, index, voice_id) -> file. /tts/questions/...
+serves the files with HTTP range support, and TTSService.speak() checks the
+directory before calling ElevenLabs, so reading a question aloud never hits
+the TTS API once the bank is built.
+
+Configuration (environment variables):
+- QUESTION_AUDIO_DIR: where clips and manifest.json live (default: backend/question_audio)
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.scoring_engine import QUESTION_BANK, QUESTION_BANK_MULTI_LANGUAGE
+
+logger = logging.getLogger(__name__)
+
+QUESTION_AUDIO_DIR = Path(os.environ.get("QUESTION_AUDIO_DIR") or Path(__file__).resolve().parent.parent / "question_audio")
+MANIFEST_NAME = "manifest.json"
+
+_manifest: Optional[Dict] = None
+
+
+def iter_questions() -> Iterator[Tuple[str, str, int, str]]:
+    """Every (role, language, index, text) across both banks; English fallback bank included."""
+    seen = set()
+    banks = [
+        (role, language, questions)
+        for role, by_language in QUESTION_BANK_MULTI_LANGUAGE.items()
+        for language, questions in by_language.items()
+    ] + [(role, "en", questions) for role, questions in QUESTION_BANK.items()]
+    for role, language, questions in banks:
+        for index, text in enumerate(questions):
+            if (role, language, text) in seen:
+                continue
+            seen.add((role, language, text))
+            yield role, language, index, text
+
+
+def clip_path(key: str) -> Path:
+    return QUESTION_AUDIO_DIR / f"{key}.mp3"
+
+
+def prebuilt_path(key: str) -> Optional[Path]:
+    """Path of a pre-synthesized clip for a TTS cache key, if one was built."""
+    path = clip_path(key)
+    return path if path.is_file() else None
+
+
+def load_manifest(reload: bool = False) -> Optional[Dict]:
+    """Read manifest.json (cached after the first call); None if not built."""
+    global _manifest
+    if _manifest is not None and not reload:
+        return _manifest
+    try:
+        with open(QUESTION_AUDIO_DIR / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            _manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"✗ Unreadable question audio manifest: {e}")
+        return None
+    return _manifest
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+async def build(voice_ids: List[str], force: bool = False, concurrency: int = 4) -> Dict:
+    """
+    Synthesize every question for every voice and write the manifest.
+
+    Clips already on disk are kept unless force=True, so re-running after a
+    question bank edit only renders the new questions.
+    """
+    from services.tts_service import TTS_MODEL, TTS_OUTPUT_FORMAT, tts_service
+
+    semaphore = asyncio.Semaphore(concurrency)
+    clips: List[Dict] = []
+    rendered = 0
+
+    async def render(role: str, language: str, index: int, text: str, voice_id: str):
+        nonlocal rendered
+        key = tts_service.cache_key(text, voice_id)
+        path = clip_path(key)
+        if force or not path.exists():
+            async with semaphore:
+                audio = b"".join([chunk async for chunk in tts_service.speak(text, voice_id=voice_id, language=language)])
+            await asyncio.to_thread(_write_atomic, path, audio)
+            rendered += 1
+            logger.info(f"✓ {role} [{language}] #{index} ({voice_id[:8]}): {len(audio)} bytes")
+        data = await asyncio.to_thread(path.read_bytes)
+        clips.append({
+            "role": role,
+            "language": language,
+            "index": index,
+            "voice_id": voice_id,
+            "text": text,
+            "file": path.name,
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        })
+
+    await asyncio.gather(*(
+        render(role, language, index, text, voice_id)
+        for voice_id in voice_ids
+        for role, language, index, text in iter_questions()
+    ))
+
+    clips.sort(key=lambda c: (c["voice_id"], c["role"], c["language"], c["index"]))
+    manifest = {
+        "generated_at": int(time.time()),
+        "model": TTS_MODEL,
+        "format": TTS_OUTPUT_FORMAT,
+        "voices": voice_ids,
+        "clips": clips,
+    }
+    await asyncio.to_thread(
+        _write_atomic, QUESTION_AUDIO_DIR / MANIFEST_NAME,
+        json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+    )
+    load_manifest(reload=True)
+    logger.info(f"✓ Question audio: {len(clips)} clips ({rendered} newly rendered) in {QUESTION_AUDIO_DIR}")
+    return manifest
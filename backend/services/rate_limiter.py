@@ -0,0 +1,196 @@
+"""
+Adaptive per-model rate limiter for Mistral calls.
+
+Each model gets a token bucket that:
+- Queues callers (FIFO) with a bounded wait instead of firing into a 429
+- Halves its rate on every observed 429 and honours Retry-After
+- Creeps back up (additive increase) after successful calls
+- Reads rate-limit headers (remaining / reset) from every response
+- Rejects immediately with RateLimitExceeded when the estimated wait is
+  over the bound, so routers can answer 429 + Retry-After honestly
+
+Configuration (environment variables):
+- LLM_RATE_PER_SECOND: default requests/second per model (default: 5)
+- LLM_RATE_LIMITS: per-model overrides, e.g. "mistral-large-latest=1,mathstral-7b=2"
+- LLM_RATE_BURST: bucket size (default: 10)
+- LLM_MAX_QUEUE_WAIT_SECONDS: longest a request may queue (default: 10)
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_RATE_PER_SECOND = float(os.environ.get("LLM_RATE_PER_SECOND", "5"))
+LLM_RATE_BURST = float(os.environ.get("LLM_RATE_BURST", "10"))
+LLM_MAX_QUEUE_WAIT_SECONDS = float(os.environ.get("LLM_MAX_QUEUE_WAIT_SECONDS", "10"))
+
+
+def _parse_rate_overrides(raw: str) -> Dict[str, float]:
+    overrides = {}
+    for item in raw.split(","):
+        if "=" in item:
+            model, rate = item.split("=", 1)
+            try:
+                overrides[model.strip()] = float(rate)
+            except ValueError:
+                logger.warning(f"Ignoring invalid LLM_RATE_LIMITS entry: {item}")
+    return overrides
+
+
+LLM_RATE_LIMITS = _parse_rate_overrides(os.environ.get("LLM_RATE_LIMITS", ""))
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a model's queue is too deep or upstream keeps returning 429."""
+
+    def __init__(self, model: str, retry_after: int, queue_depth: int = 0):
+        self.model = model
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+        super().__init__(f"Rate limit for {model} - retry in {retry_after}s ({queue_depth} queued)")
+
+
+def _header_number(headers, *needles: str) -> Optional[float]:
+    """Find the first numeric header whose name contains all needles."""
+    for name, value in headers.items():
+        lowered = name.lower()
+        if all(n in lowered for n in needles):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket with AIMD rate adaptation and a bounded FIFO queue."""
+
+    def __init__(self, model: str, rate: float, burst: float, max_wait: float):
+        self.model = model
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = max(0.05, rate / 20)
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+        self.rate_limited_count = 0
+        self.rejected_count = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests currently waiting for a token."""
+        return self._waiting
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def estimated_wait(self, position: Optional[int] = None) -> float:
+        """Seconds until a request at the given queue position gets a token."""
+        self._refill()
+        position = self._waiting if position is None else position
+        blocked = max(0.0, self._blocked_until - time.monotonic())
+        deficit = max(0.0, position + 1 - self._tokens)
+        return blocked + deficit / self.rate
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.estimated_wait()))
+
+    def check_capacity(self, max_wait: Optional[float] = None):
+        """Raise RateLimitExceeded without queueing if the wait is over the bound."""
+        if self.estimated_wait() > (self.max_wait if max_wait is None else max_wait):
+            self.rejected_count += 1
+            raise RateLimitExceeded(self.model, self.retry_after(), self._waiting)
+
+    async def acquire(self, max_wait: Optional[float] = None):
+        """
+        Wait (bounded) for a token; raise RateLimitExceeded if the queue is too deep.
+
+        max_wait overrides the limiter's bound, e.g. with what is left of a
+        caller's budget when re-queueing after an upstream 429.
+        """
+        self.check_capacity(max_wait)
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    self._refill()
+                    now = time.monotonic()
+                    if now >= self._blocked_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+                    await asyncio.sleep(delay)
+        finally:
+            self._waiting -= 1
+
+    def on_success(self):
+        """Additive increase back toward the configured rate."""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease after an upstream 429."""
+        self.rate_limited_count += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        logger.warning(f"⚠️ 429 from {self.model} - rate lowered to {self.rate:.2f} req/s")
+
+    def observe_headers(self, headers):
+        """Adapt to rate-limit headers on any upstream response."""
+        retry_after = _header_number(headers, "retry-after")
+        remaining = _header_number(headers, "ratelimit", "remaining")
+        reset = _header_number(headers, "ratelimit", "reset")
+
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        if remaining is not None:
+            self._refill()
+            self._tokens = min(self._tokens, remaining)
+            if remaining <= 0 and reset:
+                # Some APIs send an epoch timestamp instead of seconds
+                if reset > 3600:
+                    reset = max(0.0, reset - time.time())
+                self._blocked_until = max(self._blocked_until, time.monotonic() + reset)
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model,
+            "rate_per_second": round(self.rate, 3),
+            "max_rate_per_second": self.max_rate,
+            "queue_depth": self._waiting,
+            "estimated_wait_seconds": round(self.estimated_wait(), 2),
+            "rate_limited_count": self.rate_limited_count,
+            "rejected_count": self.rejected_count,
+        }
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+
+def get_limiter(model: str) -> AdaptiveRateLimiter:
+    """Get (or create) the limiter for a model."""
+    if model not in _limiters:
+        _limiters[model] = AdaptiveRateLimiter(
+            model,
+            rate=LLM_RATE_LIMITS.get(model, LLM_RATE_PER_SECOND),
+            burst=LLM_RATE_BURST,
+            max_wait=LLM_MAX_QUEUE_WAIT_SECONDS,
+        )
+    return _limiters[model]
+
+
+def stats() -> Dict:
+    return {model: limiter.stats() for model, limiter in _limiters.items()}
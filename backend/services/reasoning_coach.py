@@ -7,22 +7,20 @@ import os
 import json
 import logging
 from typing import Dict, List, Optional
+from services import llm_gateway
+from services.rate_limiter import RateLimitExceeded
+from services.response_cache import llm_cache, make_key, normalize_text
 
 logger = logging.getLogger(__name__)
 
-# Initialize Mistral client - Try real API, fall back to demo if unavailable
-try:
-    from mistralai import Mistral
-    api_key = os.environ.get("MISTRAL_API_KEY", "").strip()
-    if api_key:
-        client = Mistral(api_key=api_key)
-        logger.info("✓ Mistral client initialized for reasoning coach with mathstral-7b")
-    else:
-        logger.warning("⚠️ MISTRAL_API_KEY not set - Using demo mode")
-        client = None
-except Exception as e:
-    logger.warning(f"⚠️ Failed to initialize Mistral, using demo mode: {e}")
-    client = None
+# Mistral access goes through the shared async LLM gateway - demo mode if no key
+if llm_gateway.is_configured():
+    logger.info("✓ Reasoning coach using shared Mistral LLM gateway with mathstral-7b")
+else:
+    logger.warning("⚠️ MISTRAL_API_KEY not set - Using demo mode")
+
+# Bump whenever the classification prompt changes so cached responses are not reused
+CLASSIFY_PROMPT_VERSION = "classify-v1"
 
 REASONING_COACH_SYSTEM = """You are MathΣtral Reasoning Coach, an expert mathematical tutor specialized in:
 - Problem classification and difficulty assessment
@@ -48,7 +46,7 @@ async def classify_problem(problem_text: str) -> Dict:
     Uses Mistral mathstral-7b for intelligent analysis.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.info("Using demo problem classification")
             return {
                 "topic": "Mathematics",
@@ -60,6 +58,11 @@ async def classify_problem(problem_text: str) -> Dict:
                 "mode": "demo"
             }
         
+        cache_key = make_key("mathstral-7b", CLASSIFY_PROMPT_VERSION, normalize_text(problem_text))
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""Classify this math problem:
 
 PROBLEM: {problem_text}
@@ -82,7 +85,7 @@ Output as JSON:
   "first_question": "Open-ended question that guides without solving"
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {"role": "system", "content": REASONING_COACH_SYSTEM},
@@ -91,16 +94,18 @@ Output as JSON:
             temperature=0.7,
             max_tokens=800
         )
-        
-        content = response.choices[0].message.content
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
             result = json.loads(json_match.group())
             logger.info(f"✓ Problem classified by Mistral: {result.get('topic')}")
-            return result
-        return json.loads(content)
+        else:
+            result = json.loads(content)
+        await llm_cache.set(cache_key, result)
+        return result
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.warning(f"Error classifying problem, using demo: {e}")
         return {
@@ -125,7 +130,7 @@ async def validate_step(
     Returns: correctness, error type, explanation, next hint level
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.info("Using demo step validation")
             return {
                 "is_correct": True,
@@ -171,7 +176,7 @@ Output as JSON:
   "next_action": "request_next_step"
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {"role": "system", "content": REASONING_COACH_SYSTEM},
@@ -180,8 +185,6 @@ Output as JSON:
             temperature=0.5,
             max_tokens=600
         )
-        
-        content = response.choices[0].message.content
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
@@ -190,6 +193,8 @@ Output as JSON:
             return result
         return json.loads(content)
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.warning(f"Error validating step, using demo: {e}")
         return {
@@ -225,7 +230,7 @@ async def generate_adaptive_hint(
             4: "Almost give away the answer - guide to the final step"
         }
         
-        if not client:
+        if not llm_gateway.is_configured():
             logger.info(f"Using demo hint level {hint_level}")
             demo_hints = {
                 1: "Think about what information you have and what you need to find.",
@@ -261,7 +266,7 @@ Output as JSON:
   "direction": "What direction to move in"
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {"role": "system", "content": REASONING_COACH_SYSTEM},
@@ -270,8 +275,6 @@ Output as JSON:
             temperature=0.6,
             max_tokens=400
         )
-        
-        content = response.choices[0].message.content
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
@@ -284,6 +287,8 @@ Output as JSON:
         result["hint_level"] = hint_level
         return result
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.warning(f"Error generating hint, using demo: {e}")
         demo_hints = {
@@ -309,7 +314,7 @@ async def generate_final_solution(
     Generate complete step-by-step solution using Mistral with LaTeX formatting.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.info("Using demo solution generation")
             return {
                 "solution_steps": [
@@ -356,7 +361,7 @@ Output as JSON:
   "practice_problems": ["problem1", "problem2"]
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {"role": "system", "content": REASONING_COACH_SYSTEM},
@@ -365,8 +370,6 @@ Output as JSON:
             temperature=0.5,
             max_tokens=1200
         )
-        
-        content = response.choices[0].message.content
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
@@ -375,6 +378,8 @@ Output as JSON:
             return result
         return json.loads(content)
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.warning(f"Error generating solution, using demo: {e}")
         return {
@@ -398,7 +403,7 @@ async def detect_completion(
     Determine if the student has completed the solution logically using Mistral.
     """
     try:
-        if not client:
+        if not llm_gateway.is_configured():
             logger.info("Using demo completion detection")
             return {
                 "is_complete": False,
@@ -428,7 +433,7 @@ Output as JSON:
   "next_step": "Verify the final answer and conclude"
 }}"""
 
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mathstral-7b",
             messages=[
                 {"role": "system", "content": REASONING_COACH_SYSTEM},
@@ -437,8 +442,6 @@ Output as JSON:
             temperature=0.5,
             max_tokens=300
         )
-        
-        content = response.choices[0].message.content
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
@@ -447,6 +450,8 @@ Output as JSON:
             return result
         return json.loads(content)
     
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.warning(f"Error detecting completion, using demo: {e}")
         return {
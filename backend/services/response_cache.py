@@ -0,0 +1,182 @@
+"""
+Content-addressed response cache with a memory LRU tier and optional disk tier.
+
+Used in front of deterministic-enough LLM calls (math problem analysis,
+pedagogical hints, problem classification) so popular problems are answered
+in milliseconds without spending API quota, and in front of Whisper so a
+re-submitted recording is not transcribed twice.
+
+- Memory tier: per-process LRU with TTL
+- Disk tier (optional): one JSON file per key, shared by every worker that
+  points at the same directory; writes are atomic (temp file + rename)
+- Hit/miss counters via stats()
+
+Configuration (environment variables):
+- LLM_CACHE_MAX_ENTRIES: memory tier size (default: 2048)
+- LLM_CACHE_TTL_SECONDS: entry lifetime (default: 7 days)
+- LLM_CACHE_DIR: enable the shared disk tier in this directory (default: off)
+- TRANSCRIPT_CACHE_MAX_ENTRIES: transcript memory tier size (default: 512)
+- TRANSCRIPT_CACHE_TTL_SECONDS: transcript lifetime (default: 1 day)
+- TRANSCRIPT_CACHE_DIR: transcript disk tier directory (default: off)
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize problem text so trivially different submissions share a key."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split())
+
+
+def make_key(*parts: Any) -> str:
+    """Build a content-addressed cache key from (model, template version, input...)."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + optional disk) cache with TTL and hit/miss counters."""
+
+    def __init__(self, name: str, max_entries: int = 2048, ttl_seconds: float = 7 * 24 * 3600,
+                 disk_dir: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) / name if disk_dir else None
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            try:
+                self.disk_dir.mkdir(parents=True, exist_ok=True)
+                logger.info(f"✓ {name} cache disk tier at {self.disk_dir}")
+            except Exception as e:
+                logger.error(f"✗ {name} cache disk tier disabled: {e}")
+                self.disk_dir = None
+
+    def _expired(self, created: float) -> bool:
+        return time.time() - created > self.ttl_seconds
+
+    def _remember(self, key: str, value: Any, created: float):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Disk tier (blocking - always called via asyncio.to_thread)
+    # ------------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"{self.name} cache: unreadable entry {path.name}: {e}")
+            return None
+        if self._expired(entry["created"]):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        return entry["created"], entry["value"]
+
+    def _disk_set(self, key: str, value: Any, created: float):
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None on miss/expiry."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry[1]
+            del self._memory[key]
+
+        if self.disk_dir:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                self._remember(key, entry[1], entry[0])
+                self.hits_disk += 1
+                return entry[1]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        """Store a JSON-serializable value in both tiers."""
+        created = time.time()
+        self._remember(key, value, created)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._disk_set, key, value, created)
+            except Exception as e:
+                logger.warning(f"{self.name} cache: disk write failed: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current memory tier size."""
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 3) if lookups else 0.0,
+            "disk_tier": str(self.disk_dir) if self.disk_dir else None,
+        }
+
+
+# Shared cache for LLM responses (math tutor / reasoning coach)
+llm_cache = ResponseCache(
+    "llm",
+    max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "2048")),
+    ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    disk_dir=os.environ.get("LLM_CACHE_DIR") or None,
+)
+
+# Shared cache for Whisper transcripts (keyed by audio hash + model config)
+transcript_cache = ResponseCache(
+    "transcripts",
+    max_entries=int(os.environ.get("TRANSCRIPT_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=float(os.environ.get("TRANSCRIPT_CACHE_TTL_SECONDS", str(24 * 3600))),
+    disk_dir=os.environ.get("TRANSCRIPT_CACHE_DIR") or None,
+)
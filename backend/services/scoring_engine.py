@@ -1,13 +1,10 @@
 import os
 import json
-from mistralai import Mistral
 import logging
+from services import llm_gateway
 
 logger = logging.getLogger(__name__)
 
-# Initialize Mistral client - requires MISTRAL_API_KEY in environment
-client = Mistral(api_key=os.environ.get("MISTRAL_API_KEY", "").strip())
-
 # Role mapping from frontend aliases to actual roles
 ROLE_MAPPING = {
     "java": "Software Engineer",
@@ -275,7 +272,7 @@ async def generate_full_report(sessions: list, role: str) -> dict:
         for i, s in enumerate(sessions)
     ])
     
-    response = client.chat.complete(
+    report_text = await llm_gateway.complete(
         model="mistral-large-latest",
         messages=[{
             "role": "user",
@@ -297,7 +294,7 @@ async def generate_full_report(sessions: list, role: str) -> dict:
     )
     
     return {
-        "report": response.choices[0].message.content,
+        "report": report_text,
         "sessions_count": len(sessions),
         "avg_score": sum(s.get("overall", 5) for s in sessions) / len(sessions) if sessions else 0
     }
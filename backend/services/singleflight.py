@@ -0,0 +1,79 @@
+"""
+Single-flight coalescing for identical in-flight async calls.
+
+When many callers ask for the same thing at once (e.g. a class of 30 students
+submitting the same worksheet), only the first caller runs the upstream call;
+everyone else with the same key waits on it and shares its result or error.
+If every waiting caller is cancelled (e.g. all clients disconnected), the
+upstream call is cancelled too instead of finishing for nobody.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one upstream call."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() once per key at a time and share the result.
+
+        The upstream call runs as its own task and each caller awaits it
+        through asyncio.shield, so one caller being cancelled does not cancel
+        the shared call for the others. When the last waiter is cancelled the
+        shared call is cancelled as well.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f"{self.name} single-flight: joined in-flight call {key[:12]}")
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finished(k, t))
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(task) == 1 and not task.done():
+                task.cancel()
+                self.cancelled += 1
+                metrics.incr(f"cancelled.{self.name}_calls")
+                logger.debug(f"{self.name} single-flight: no waiters left, cancelled {key[:12]}")
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        self._waiters.pop(task, None)
+        # Mark the error as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Upstream calls made vs. callers that joined an in-flight call."""
+        return {
+            "name": self.name,
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.calls,
+            "coalesced_calls": self.coalesced,
+            "cancelled_calls": self.cancelled,
+        }
@@ -0,0 +1,272 @@
+"""
+Incremental (live) transcription for the /analysis/stream WebSocket.
+
+Audio arrives in small chunks while the user speaks. Every STREAM_STEP_SECONDS
+of new audio, Whisper re-transcribes a sliding window that starts a little
+before the last committed point (STREAM_OVERLAP_SECONDS of context):
+
+- Segments that end well before the window edge are stable - they are
+  committed and sent as `segment` events, and the window slides past them
+- The unstable tail is sent as a `partial` event and re-transcribed next step
+- Text re-transcribed from the overlap is stitched away by matching the
+  longest word overlap with what was already committed
+- On stop only the short uncommitted tail is left to decode, so the `final`
+  transcript is ready almost immediately
+
+Input is 16 kHz mono s16le PCM; other formats (webm/opus from MediaRecorder)
+go through an ffmpeg pipe decoder first.
+
+Configuration (environment variables):
+- STREAM_WINDOW_SECONDS: longest window before forcing a commit (default: 15);
+  past it the audio is committed even without a segment boundary
+- STREAM_STEP_SECONDS: new audio needed before the next pass (default: 1.0)
+- STREAM_OVERLAP_SECONDS: context re-decoded before the commit point (default: 1.0)
+- STREAM_STABLE_MARGIN_SECONDS: segments ending within this of the window edge stay partial (default: 1.5)
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from services import transcription_worker
+from services.audio_decode import SAMPLE_RATE, ffmpeg_command
+from services.transcription_pool import transcription_pool
+
+logger = logging.getLogger(__name__)
+
+STREAM_WINDOW_SECONDS = float(os.environ.get("STREAM_WINDOW_SECONDS", "15"))
+STREAM_STEP_SECONDS = float(os.environ.get("STREAM_STEP_SECONDS", "1.0"))
+STREAM_OVERLAP_SECONDS = float(os.environ.get("STREAM_OVERLAP_SECONDS", "1.0"))
+STREAM_STABLE_MARGIN_SECONDS = float(os.environ.get("STREAM_STABLE_MARGIN_SECONDS", "1.5"))
+
+BYTES_PER_SAMPLE = 2
+
+
+def _norm(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch(committed: str, new_text: str, max_overlap: int = 12) -> str:
+    """
+    Drop the words at the start of new_text that repeat the end of committed.
+
+    Uses the longest suffix/prefix word match (punctuation and case ignored).
+    """
+    old_words = [_norm(w) for w in committed.split()[-max_overlap:]]
+    new_words = new_text.split()
+    new_norm = [_norm(w) for w in new_words]
+    for size in range(min(len(old_words), len(new_words)), 0, -1):
+        if old_words[-size:] == new_norm[:size]:
+            return " ".join(new_words[size:])
+    return new_text
+
+
+class StreamingTranscriber:
+    """Sliding-window incremental transcription state for one stream."""
+
+    def __init__(self, language: str = "en"):
+        self.language = language
+        self._pcm = bytearray()
+        self._base = 0          # absolute sample index of self._pcm[0]
+        self._committed = 0     # absolute sample index transcribed for good
+        self._last_pass = 0     # total samples at the last pass
+        self.committed_text = ""
+        self.new_audio = asyncio.Event()
+
+    @property
+    def total_samples(self) -> int:
+        return self._base + len(self._pcm) // BYTES_PER_SAMPLE
+
+    def feed(self, pcm: bytes):
+        """Append 16 kHz mono s16le PCM."""
+        self._pcm.extend(pcm)
+        self.new_audio.set()
+
+    def ready(self) -> bool:
+        """True when enough new audio arrived for another pass."""
+        return self.total_samples - self._last_pass >= STREAM_STEP_SECONDS * SAMPLE_RATE
+
+    def _window(self):
+        start = max(self._base, self._committed - int(STREAM_OVERLAP_SECONDS * SAMPLE_RATE))
+        offset = (start - self._base) * BYTES_PER_SAMPLE
+        return start, bytes(self._pcm[offset:])
+
+    def _commit(self, start: int, segments: List[Dict], upto: float) -> List[Dict]:
+        """Commit segments ending at or before `upto` seconds into the window."""
+        events = []
+        for seg in segments:
+            if seg["end"] > upto:
+                break
+            text = stitch(self.committed_text, seg["text"])
+            seg_end = start + int(seg["end"] * SAMPLE_RATE)
+            if seg_end <= self._committed:
+                continue
+            if text:
+                self.committed_text = f"{self.committed_text} {text}".strip()
+                events.append({
+                    "type": "segment",
+                    "text": text,
+                    "start": round(self._committed / SAMPLE_RATE, 2),
+                    "end": round(seg_end / SAMPLE_RATE, 2),
+                })
+            self._committed = seg_end
+        self._drop_committed_audio()
+        return events
+
+    def _force_commit(self, start: int, segments: List[Dict], upto: float) -> List[Dict]:
+        """
+        Commit everything up to `upto` seconds into the window, boundary or not.
+
+        A segment that straddles `upto` is committed whole; its words are
+        re-decoded from the overlap next pass and stitched away.
+        """
+        cut = start + int(upto * SAMPLE_RATE)
+        if cut <= self._committed:
+            return []
+        text = " ".join(
+            seg["text"] for seg in segments
+            if seg["start"] < upto and start + int(seg["end"] * SAMPLE_RATE) > self._committed
+        )
+        text = stitch(self.committed_text, text)
+        events = []
+        if text:
+            self.committed_text = f"{self.committed_text} {text}".strip()
+            events.append({
+                "type": "segment",
+                "text": text,
+                "start": round(self._committed / SAMPLE_RATE, 2),
+                "end": round(cut / SAMPLE_RATE, 2),
+            })
+        self._committed = cut
+        self._drop_committed_audio()
+        return events
+
+    def _drop_committed_audio(self):
+        """Drop audio nobody will re-read (keep the overlap context)."""
+        keep_from = max(self._base, self._committed - int(STREAM_OVERLAP_SECONDS * SAMPLE_RATE))
+        del self._pcm[:(keep_from - self._base) * BYTES_PER_SAMPLE]
+        self._base = keep_from
+
+    async def _transcribe(self, pcm: bytes) -> Dict:
+        return await transcription_pool.submit(
+            transcription_worker.transcribe_pcm, pcm, self.language, self.committed_text[-200:]
+        )
+
+    async def step(self) -> List[Dict]:
+        """Run one pass over the current window; return segment/partial events."""
+        self.new_audio.clear()
+        self._last_pass = self.total_samples
+        start, pcm = self._window()
+        if not pcm:
+            return []
+
+        result = await self._transcribe(pcm)
+        segments = result["segments"]
+        window_seconds = len(pcm) / BYTES_PER_SAMPLE / SAMPLE_RATE
+
+        stable_upto = window_seconds - STREAM_STABLE_MARGIN_SECONDS
+        if window_seconds > STREAM_WINDOW_SECONDS:
+            # Never let the window grow unbounded - commit all but the overlap
+            stable_upto = max(stable_upto, window_seconds - STREAM_OVERLAP_SECONDS)
+        events = self._commit(start, segments, stable_upto)
+
+        uncommitted = (start + len(pcm) // BYTES_PER_SAMPLE - self._committed) / SAMPLE_RATE
+        if uncommitted > STREAM_WINDOW_SECONDS:
+            # No segment boundary to commit at (one long segment) - cut anyway
+            events += self._force_commit(start, segments, stable_upto)
+            tail = " ".join(seg["text"] for seg in segments if seg["start"] >= stable_upto)
+        else:
+            tail = " ".join(seg["text"] for seg in segments if seg["end"] > stable_upto)
+        partial = stitch(self.committed_text, tail)
+        if partial:
+            events.append({"type": "partial", "text": partial})
+        return events
+
+    async def finish(self) -> List[Dict]:
+        """Transcribe the uncommitted tail and return the last segment plus `final`."""
+        events = []
+        start, pcm = self._window()
+        if self.total_samples > self._committed and pcm:
+            result = await self._transcribe(pcm)
+            events = self._commit(start, result["segments"], float("inf"))
+        events.append({
+            "type": "final",
+            "text": self.committed_text,
+            "duration": round(self.total_samples / SAMPLE_RATE, 2),
+        })
+        return events
+
+
+class PcmDecoder:
+    """Pass-through for clients that already send 16 kHz mono s16le PCM."""
+
+    def __init__(self, on_pcm):
+        self._on_pcm = on_pcm
+        self._carry = b""
+
+    async def start(self):
+        pass
+
+    async def write(self, chunk: bytes):
+        # Keep sample alignment if a chunk splits a 16-bit sample
+        data = self._carry + chunk
+        cut = len(data) - len(data) % BYTES_PER_SAMPLE
+        self._carry = data[cut:]
+        if cut:
+            self._on_pcm(data[:cut])
+
+    async def close(self):
+        pass
+
+    def kill(self):
+        pass
+
+
+class FfmpegStreamDecoder(PcmDecoder):
+    """Decode a streamed container (webm/opus, ogg, ...) through a live ffmpeg pipe."""
+
+    def __init__(self, on_pcm):
+        super().__init__(on_pcm)
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            *ffmpeg_command(SAMPLE_RATE),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def _read(self):
+        while True:
+            data = await self._process.stdout.read(SAMPLE_RATE * BYTES_PER_SAMPLE // 10)
+            if not data:
+                break
+            await super().write(data)
+
+    async def write(self, chunk: bytes):
+        self._process.stdin.write(chunk)
+        await self._process.stdin.drain()
+
+    async def close(self):
+        """Flush ffmpeg and wait until all decoded PCM has been fed."""
+        self._process.stdin.close()
+        await self._reader
+        await self._process.wait()
+
+    def kill(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+
+
+def make_decoder(audio_format: str, on_pcm) -> PcmDecoder:
+    """Decoder for the client's audio format ("pcm" or any ffmpeg-readable container)."""
+    if audio_format in ("pcm", "s16le"):
+        return PcmDecoder(on_pcm)
+    return FfmpegStreamDecoder(on_pcm)
@@ -0,0 +1,85 @@
+"""
+Streaming helpers for token-by-token LLM responses.
+
+- IncrementalJSONParser: feed raw LLM tokens, get back each top-level JSON
+  field as soon as its value is complete
+- sse_event: format a Server-Sent Event frame
+"""
+
+import json
+from typing import Any, List, Tuple
+
+
+class IncrementalJSONParser:
+    """
+    Incrementally parse a streamed JSON object, one top-level field at a time.
+
+    Text before the opening brace (e.g. a ```json fence) is ignored. A field is
+    emitted once the comma or closing brace after its value arrives, so string
+    and list values are never emitted half-written.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self.done = False
+        self.fields = {}
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Add streamed text and return newly completed (key, value) pairs."""
+        completed = []
+        if self.done or not text:
+            return completed
+
+        self._buffer += text
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                # Skip anything before the top-level object starts
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._close_member(self._pos))
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                completed.extend(self._close_member(self._pos))
+                self._member_start = self._pos + 1
+
+            self._pos += 1
+
+        return completed
+
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        member = self._buffer[self._member_start:end].strip()
+        if not member:
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return []
+        self.fields.update(parsed)
+        return list(parsed.items())
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
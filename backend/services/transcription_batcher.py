@@ -0,0 +1,133 @@
+"""
+Micro-batching scheduler for Whisper transcription.
+
+When many users submit short answers at the same moment, running one
+encoder pass per request wastes CPU. The batcher holds requests for at most
+WHISPER_BATCH_MAX_WAIT_MS, then sends up to WHISPER_BATCH_SIZE of them (same
+language and model size) to one worker as a single transcribe_batch job, which stacks their
+log-mel spectrograms and decodes them together.
+
+- WHISPER_BATCH_SIZE <= 1 disables batching (one transcribe job per request)
+- A caller cancelled while still waiting is dropped from its batch
+- TranscriptionQueueFull from the pool is passed to every caller in the batch
+- A request left alone after the wait runs as a regular transcribe job
+- Batched clips are decoded together (whisper.decode), which can differ
+  slightly from a single model.transcribe() pass, so decode_mode is part of
+  the transcript cache key
+
+Configuration (environment variables):
+- WHISPER_BATCH_SIZE: max requests per batch (default: 4)
+- WHISPER_BATCH_MAX_WAIT_MS: longest a request waits for batch-mates (default: 25)
+"""
+
+import os
+import asyncio
+import logging
+from typing import Dict, List, Set, Tuple
+
+from services import metrics, transcription_worker
+from services.transcription_pool import WHISPER_MODEL_SIZE, transcription_pool
+
+logger = logging.getLogger(__name__)
+
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "4"))
+WHISPER_BATCH_MAX_WAIT_MS = float(os.environ.get("WHISPER_BATCH_MAX_WAIT_MS", "25"))
+
+
+class TranscriptionBatcher:
+    """Collect concurrent transcription requests into small batches."""
+
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        # (language, model_size) -> [(audio_bytes, future)]
+        self._pending: Dict[Tuple[str, str], List[Tuple[bytes, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        # Running batches - the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Future] = set()
+        self.batches = 0
+        self.batched_requests = 0
+
+    @property
+    def decode_mode(self) -> str:
+        """"batch" when requests go through transcribe_batch, else "single"."""
+        return "batch" if self.max_batch > 1 else "single"
+
+    async def submit(self, audio_bytes: bytes, language: str = "en", model_size: str = WHISPER_MODEL_SIZE) -> Dict:
+        """Transcribe audio bytes, possibly together with concurrent requests."""
+        if self.max_batch <= 1:
+            return await transcription_pool.submit(transcription_worker.transcribe, audio_bytes, language, model_size)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = (language, model_size)
+        queue = self._pending.setdefault(group, [])
+        queue.append((audio_bytes, future))
+
+        if len(queue) >= self.max_batch:
+            self._flush(group)
+        elif group not in self._timers:
+            self._timers[group] = loop.call_later(self.max_wait, self._flush, group)
+
+        result = await future
+        if "error" in result:
+            raise ValueError(result["error"])
+        return result
+
+    def _flush(self, group: Tuple[str, str]):
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        queue = self._pending.pop(group, [])
+        # Skip callers that were cancelled (e.g. client disconnected) while waiting
+        live = [(audio, future) for audio, future in queue if not future.done()]
+        if live:
+            task = asyncio.ensure_future(self._run_batch(group, live))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, group: Tuple[str, str], batch: List[Tuple[bytes, asyncio.Future]]):
+        language, model_size = group
+        self.batches += 1
+        self.batched_requests += len(batch)
+        metrics.incr("whisper.batches")
+        metrics.incr("whisper.batched_requests", len(batch))
+        if len(batch) > 1:
+            logger.info(f"Whisper micro-batch of {len(batch)} requests ({language}, {model_size})")
+
+        try:
+            if len(batch) == 1:
+                # Nobody to batch with - take the regular single-pass job
+                results = [await transcription_pool.submit(
+                    transcription_worker.transcribe, batch[0][0], language, model_size
+                )]
+            else:
+                results = await transcription_pool.submit(
+                    transcription_worker.transcribe_batch, [audio for audio, _ in batch], language, model_size
+                )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "waiting": sum(len(q) for q in self._pending.values()),
+        }
+
+
+# Shared batcher in front of the transcription pool
+transcription_batcher = TranscriptionBatcher(WHISPER_BATCH_SIZE, WHISPER_BATCH_MAX_WAIT_MS)
@@ -0,0 +1,285 @@
+"""
+Transcription Worker Pool
+Runs speech-to-text inference in dedicated worker processes, off the event loop.
+
+- Each worker process holds its own preloaded model, loaded with the
+  configured ASR backend (ASR_BACKEND, see asr_backends)
+- Jobs beyond the worker count wait in a bounded queue
+- When the queue is full, callers get TranscriptionQueueFull with a
+  Retry-After estimate so routers can answer 503 instead of stalling
+- Cancelling the awaiting caller drops a still-queued job; a job already
+  running in a worker cannot be interrupted and is left to finish
+- start() (called from app startup) spawns the workers and loads their models
+  in the background; until that finishes, submit() raises TranscriptionNotReady
+  (503 + Retry-After) instead of queueing behind a cold model load. A pool that
+  was never started keeps the old behaviour and starts workers on first job.
+
+Configuration (environment variables):
+- WHISPER_WORKERS: number of worker processes (default: min(2, CPU count))
+- WHISPER_QUEUE_SIZE: jobs allowed to wait beyond running ones (default: 8)
+- WHISPER_MODEL_SIZE: Whisper model to preload in each worker (default: base)
+- WHISPER_ALLOWED_SIZES: sizes a per-request quality hint may pick (default: tiny,base,small)
+- WHISPER_QUANTIZE_INT8: "true" applies torch dynamic int8 quantization to
+  Linear layers at load time (default: false)
+- WHISPER_START_METHOD: spawn | forkserver (default: spawn). forkserver loads
+  the default model once in the fork server and forks workers that share the
+  weights copy-on-write, so WHISPER_WORKERS can follow the core count without
+  multiplying resident memory (Linux/macOS only)
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from services import metrics, transcription_worker
+from services.asr_backends import ASR_BACKEND
+
+logger = logging.getLogger(__name__)
+
+WHISPER_WORKERS = int(os.environ.get("WHISPER_WORKERS", str(max(1, min(2, os.cpu_count() or 1)))))
+WHISPER_QUEUE_SIZE = int(os.environ.get("WHISPER_QUEUE_SIZE", "8"))
+WHISPER_MODEL_SIZE = os.environ.get("WHISPER_MODEL_SIZE", "base")
+WHISPER_ALLOWED_SIZES = [s.strip() for s in os.environ.get("WHISPER_ALLOWED_SIZES", "tiny,base,small").split(",") if s.strip()]
+WHISPER_QUANTIZE_INT8 = os.environ.get("WHISPER_QUANTIZE_INT8", "false").lower() in ("1", "true", "yes")
+WHISPER_START_METHOD = os.environ.get("WHISPER_START_METHOD", "spawn").lower()
+
+# Per-request quality hints -> model size
+QUALITY_PRESETS = {"fast": "tiny", "balanced": "base", "accurate": "small"}
+
+
+def resolve_model_size(quality: Optional[str]) -> str:
+    """Map a quality hint (fast/balanced/accurate or a size name) to an allowed model size."""
+    if not quality:
+        return WHISPER_MODEL_SIZE
+    size = QUALITY_PRESETS.get(quality.lower(), quality.lower())
+    if size not in WHISPER_ALLOWED_SIZES:
+        logger.warning(f"⚠️ Quality hint '{quality}' not allowed - using {WHISPER_MODEL_SIZE}")
+        return WHISPER_MODEL_SIZE
+    return size
+
+
+def process_memory(pid: int) -> Optional[Dict]:
+    """RSS / PSS / shared / private MB of a process from /proc (Linux), else None."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return None
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "rss_mb": mb(fields.get("Rss", 0)),
+        "pss_mb": mb(fields.get("Pss", 0)),
+        "shared_mb": mb(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)),
+        "private_mb": mb(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+    }
+
+
+class TranscriptionQueueFull(Exception):
+    """Raised when the transcription queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Transcription queue is full - retry in {retry_after}s")
+
+
+class TranscriptionNotReady(TranscriptionQueueFull):
+    """Raised while worker models are still loading - answered like a full queue (503)."""
+
+    def __init__(self, retry_after: int):
+        Exception.__init__(self, f"Transcription models are still loading - retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+# Retry-After sent while models are loading
+NOT_READY_RETRY_AFTER_SECONDS = 5
+
+
+class TranscriptionPool:
+    """Bounded process pool for Whisper transcription jobs."""
+
+    def __init__(self, workers: int, queue_size: int, model_size: str, quantize: bool = False,
+                 start_method: str = "spawn", backend: str = ASR_BACKEND):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.model_size = model_size
+        self.quantize = quantize
+        self.start_method = start_method
+        self.backend = backend
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        # idle (never started) -> loading -> ready | failed
+        self.state = "idle"
+        self._load_seconds: Optional[float] = None
+        # Background model load - kept here, the loop only holds weak references to tasks
+        self._warm_task: Optional[asyncio.Task] = None
+        # Moving average of job duration, used for Retry-After estimates
+        self._avg_job_seconds = 5.0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of jobs running or waiting at once."""
+        return self.workers + self.queue_size
+
+    def _mp_context(self):
+        if self.start_method == "forkserver":
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                # Load the model once in the fork server; workers inherit it
+                context.set_forkserver_preload(["services.whisper_preload"])
+                return context
+            logger.warning("⚠️ forkserver not supported on this platform - using spawn")
+        return multiprocessing.get_context("spawn")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(
+                f"Starting transcription pool: {self.workers} workers, queue size {self.queue_size}, "
+                f"start method {self.start_method}"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._mp_context(),
+                initializer=transcription_worker.init_worker,
+                initargs=(self.model_size, self.quantize, self.backend),
+            )
+        return self._executor
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self) -> Optional[asyncio.Task]:
+        """Spawn workers and load their models in the background (non-blocking)."""
+        if self.state != "idle":
+            return None
+        self.state = "loading"
+        self._warm_task = asyncio.ensure_future(self._warm_up())
+        return self._warm_task
+
+    async def _warm_up(self):
+        started = time.monotonic()
+        try:
+            executor = self._get_executor()
+            # A worker only takes jobs after its initializer loaded the model,
+            # so one no-op job per worker completes once the models are in
+            await asyncio.gather(*(
+                asyncio.wrap_future(executor.submit(transcription_worker.warmup))
+                for _ in range(self.workers)
+            ))
+        except Exception as e:
+            # Jobs still get through - workers retry the load on first use
+            self.state = "failed"
+            logger.error(f"✗ Whisper model loading failed: {e}")
+            return
+        self._load_seconds = time.monotonic() - started
+        self.state = "ready"
+        logger.info(f"✓ Transcription workers ready ({self.model_size}) in {self._load_seconds:.1f}s")
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up."""
+        waiting = max(1, self._pending - self.workers + 1)
+        return max(1, math.ceil(self._avg_job_seconds * waiting / self.workers))
+
+    async def submit(self, fn, *args):
+        """
+        Run fn(*args) in a worker process and await its result.
+
+        Raises:
+            TranscriptionNotReady while start() is still loading models
+            TranscriptionQueueFull if running + waiting jobs are at capacity
+        """
+        if self.state == "loading":
+            raise TranscriptionNotReady(NOT_READY_RETRY_AFTER_SECONDS)
+        if self._pending >= self.capacity:
+            raise TranscriptionQueueFull(self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        future = self._get_executor().submit(fn, *args)
+        self._pending += 1
+        # Count the job until the worker is really done with it, even if the
+        # caller gave up on it earlier
+        future.add_done_callback(lambda f: self._notify_done(loop, f, started))
+
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM) - rebuild the pool for the next job
+            logger.error("✗ Transcription pool broken - restarting workers")
+            self._executor = None
+            raise
+        except asyncio.CancelledError:
+            if future.cancel():
+                metrics.incr("cancelled.transcription_jobs_queued")
+                logger.info("Transcription job cancelled before it started")
+            else:
+                metrics.incr("cancelled.transcription_jobs_running")
+                logger.info("Transcription caller gone - running job will finish unused")
+            raise
+
+    def _notify_done(self, loop, future, started: float):
+        # Runs on the executor's management thread
+        try:
+            loop.call_soon_threadsafe(self._job_done, future, started)
+        except RuntimeError:
+            pass  # event loop already closed (shutdown)
+
+    def _job_done(self, future, started: float):
+        self._pending -= 1
+        if not future.cancelled():
+            elapsed = time.monotonic() - started
+            self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+
+    def stats(self) -> Dict:
+        """Current pool load for health/debug endpoints."""
+        return {
+            "state": self.state,
+            "load_seconds": round(self._load_seconds, 2) if self._load_seconds is not None else None,
+            "backend": self.backend,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "model_size": self.model_size,
+            "quantized_int8": self.quantize,
+            "start_method": self.start_method,
+            "pending_jobs": self._pending,
+            "avg_job_seconds": round(self._avg_job_seconds, 2),
+        }
+
+    def memory_report(self) -> Dict:
+        """Per-process memory of the web process and each worker (PSS splits shared weight pages)."""
+        processes = getattr(self._executor, "_processes", None) or {}
+        workers = {str(pid): process_memory(pid) for pid in list(processes)}
+        known = [m for m in workers.values() if m]
+        return {
+            "start_method": self.start_method,
+            "web_process": process_memory(os.getpid()),
+            "workers": workers,
+            "workers_total_rss_mb": round(sum(m["rss_mb"] for m in known), 1),
+            "workers_total_pss_mb": round(sum(m["pss_mb"] for m in known), 1),
+        }
+
+    def shutdown(self):
+        """Stop worker processes (call on app shutdown)."""
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            self._warm_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.state = "idle"
+
+
+# Shared pool (workers start in the background at app startup)
+transcription_pool = TranscriptionPool(
+    WHISPER_WORKERS, WHISPER_QUEUE_SIZE, WHISPER_MODEL_SIZE, WHISPER_QUANTIZE_INT8, WHISPER_START_METHOD
+)
@@ -0,0 +1,152 @@
+"""
+Speech-to-text transcription worker (runs inside transcription pool processes).
+
+Each worker process loads its own model once in `init_worker` and keeps it
+for the lifetime of the process (other sizes requested through a quality
+hint are loaded on first use and kept too). In forkserver mode the model is
+already there, inherited from the fork server (see whisper_preload). The
+engine is whichever ASR backend is configured (see asr_backends). Nothing in
+this module touches the asyncio event loop - it is only ever called through
+the transcription pool.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional
+
+from services import asr_backends
+
+logger = logging.getLogger(__name__)
+
+# Models held by this worker process: {model_size: ASRBackend}. The default
+# size is preloaded by init_worker; other sizes load on first request.
+_MODELS: Dict[str, asr_backends.ASRBackend] = {}
+_MODEL_SIZE = "base"
+_QUANTIZE_INT8 = False
+_BACKEND = asr_backends.ASR_BACKEND
+
+
+def load_model(model_size: str, quantize: bool = False, backend: Optional[str] = None) -> asr_backends.ASRBackend:
+    """Load a model on CPU with the configured (or given) ASR backend, optionally int8."""
+    return asr_backends.load_backend(backend or _BACKEND, model_size, quantize)
+
+
+def init_worker(model_size: str = "base", quantize: bool = False, backend: str = asr_backends.ASR_BACKEND):
+    """Process-pool initializer: preload the default model in this worker."""
+    global _MODEL_SIZE, _QUANTIZE_INT8, _BACKEND
+    if model_size in _MODELS and _QUANTIZE_INT8 == quantize and _BACKEND == backend:
+        # Forked from a fork server that already holds the weights (whisper_preload)
+        logging.warning(f"[worker {os.getpid()}] ✓ Using preloaded {backend} {model_size} model (shared)")
+        return
+    _MODEL_SIZE = model_size
+    _QUANTIZE_INT8 = quantize
+    _BACKEND = backend
+    try:
+        label = f"{backend} {model_size}{' int8' if quantize else ''}"
+        logging.warning(f"[worker {os.getpid()}] Loading {label} model...")
+        _MODELS[model_size] = load_model(model_size, quantize)
+        logging.warning(f"[worker {os.getpid()}] ✓ {backend} model loaded")
+    except Exception as e:
+        # Leave it unloaded - get_model() retries on first job
+        logging.error(f"[worker {os.getpid()}] Failed to preload {backend} model: {e}")
+
+
+def get_model(model_size: Optional[str] = None) -> asr_backends.ASRBackend:
+    """Return this worker's model for a size, loading it on first use."""
+    model_size = model_size or _MODEL_SIZE
+    if model_size not in _MODELS:
+        _MODELS[model_size] = load_model(model_size, _QUANTIZE_INT8)
+    return _MODELS[model_size]
+
+
+def warmup() -> bool:
+    """No-op job used to check that a worker has its model loaded."""
+    return get_model() is not None
+
+
+def transcribe(audio_bytes: bytes, language: str = "en", model_size: Optional[str] = None) -> Dict:
+    """
+    Transcribe encoded audio bytes with this worker's model.
+
+    Audio is decoded through an ffmpeg pipe straight into a 16 kHz float32
+    array - no temp file, no second copy on disk - and silence is trimmed by
+    VAD before inference. Long recordings are not transcribed here: they come
+    back split at pauses so the caller can spread them over the pool.
+
+    Returns:
+        Dict with "text" (stripped transcript) and "vad" (trimming stats),
+        or "chunks" and "vad" for long recordings (see long_audio)
+    """
+    from services.audio_decode import decode_audio
+    from services.long_audio import split_long_audio
+    from services.vad import trim_silence
+
+    model = get_model(model_size)
+    decoded = decode_audio(audio_bytes)
+    split = split_long_audio(decoded)
+    if split is not None:
+        return {"chunks": split[0], "vad": split[1]}
+    audio, vad_stats = trim_silence(decoded)
+    if len(audio) == 0:
+        return {"text": "", "vad": vad_stats}
+    result = model.transcribe(audio, language=language)
+    return {"text": result["text"], "vad": vad_stats}
+
+
+def transcribe_pcm(pcm: bytes, language: str = "en", prompt: str = "", model_size: Optional[str] = None) -> Dict:
+    """
+    Transcribe raw 16 kHz mono s16le PCM (one streaming window or long-audio chunk).
+
+    Returns:
+        Dict with "text" and "segments" ([{"start", "end", "text"}], seconds
+        relative to the start of the window)
+    """
+    import numpy as np
+
+    model = get_model(model_size)
+    audio = np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+    return model.transcribe(audio, language=language, prompt=prompt, window=True)
+
+
+def transcribe_batch(items: List[bytes], language: str = "en", model_size: Optional[str] = None) -> List[Dict]:
+    """
+    Transcribe several recordings in one job.
+
+    Each item is decoded and VAD-trimmed, then all non-empty clips go to the
+    backend together (openai-whisper decodes short clips as one stacked
+    batch). Long recordings come back as chunks (see transcribe).
+
+    Returns:
+        One dict per item, in order: {"text", "vad"}, {"chunks", "vad"} or {"error"}
+    """
+    from services.audio_decode import decode_audio
+    from services.long_audio import split_long_audio
+    from services.vad import trim_silence
+
+    model = get_model(model_size)
+    results: List[Optional[Dict]] = [None] * len(items)
+    batch_items = []
+    audios = []
+
+    for i, audio_bytes in enumerate(items):
+        try:
+            decoded = decode_audio(audio_bytes)
+            split = split_long_audio(decoded)
+            if split is not None:
+                results[i] = {"chunks": split[0], "vad": split[1]}
+                continue
+            audio, vad_stats = trim_silence(decoded)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+            continue
+        if len(audio) == 0:
+            results[i] = {"text": "", "vad": vad_stats}
+        else:
+            audios.append(audio)
+            batch_items.append((i, vad_stats))
+
+    if audios:
+        for (i, vad_stats), text in zip(batch_items, model.transcribe_batch(audios, language)):
+            results[i] = {"text": text, "vad": vad_stats}
+
+    return results
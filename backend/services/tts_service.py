@@ -1,16 +1,127 @@
 """
 ElevenLabs Text-to-Speech Service
 Converts coach responses to natural-sounding audio
+
+ElevenLabs is called over its REST API with a shared httpx.AsyncClient
+(keep-alive connection pool, per-request timeouts), never with the blocking
+SDK, and at most TTS_MAX_CONCURRENCY syntheses run at once per process.
+A synthesis gives its slot back as soon as ElevenLabs has sent the whole
+clip, however slowly the client is reading it.
+
+speak() is an async iterator: MP3 chunks are forwarded as ElevenLabs
+produces them, so playback can start long before synthesis finishes.
+Time-to-first-chunk is recorded (stats() and the tts.* metrics counters).
+Finished clips go into the TTS audio cache (see audio_cache), so repeated
+phrases are served without calling ElevenLabs - even without an API key.
+Pre-synthesized question-bank clips (see question_audio) are served the same way.
+
+speak_pipelined() is for long texts (coaching feedback): the text is split
+into sentences that are synthesized concurrently and streamed back in order,
+so time-to-first-audio is that of the first sentence, whatever the length.
+
+Configuration (environment variables):
+- TTS_MAX_CONCURRENCY: ElevenLabs requests in flight per process (default: 8)
+- TTS_MAX_KEEPALIVE: idle pooled connections kept open (default: 8)
+- TTS_CONNECT_TIMEOUT_SECONDS: connect timeout (default: 5)
+- TTS_TIMEOUT_SECONDS: max wait for each response chunk (default: 30)
+- TTS_VOICES_TTL_SECONDS: how long the /tts/voices list is cached (default: 3600)
+- TTS_PIPELINE_MIN_CHARS: texts at least this long use the pipeline by default (default: 300)
+- TTS_PIPELINE_CHUNK_CHARS: sentences after the first are grouped up to this size per request (default: 250)
+- TTS_PIPELINE_CONCURRENCY: sentence requests in flight per text (default: 3)
 """
 
 import os
+import re
+import time
+import asyncio
 import logging
-from io import BytesIO
-from elevenlabs.client import ElevenLabs
-from elevenlabs import play
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from services import metrics, question_audio
+from services.audio_cache import audio_cache_key, tts_audio_cache
 
 logger = logging.getLogger(__name__)
 
+
+class TTSUnavailable(Exception):
+    """Raised when ElevenLabs is not configured or the client failed to start."""
+
+
+class TTSRequestError(Exception):
+    """Non-2xx answer from ElevenLabs."""
+
+    def __init__(self, status: int, detail: str, retry_after: Optional[str] = None):
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+        super().__init__(f"ElevenLabs {status}: {detail}")
+
+
+ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
+
+TTS_MAX_CONCURRENCY = int(os.environ.get("TTS_MAX_CONCURRENCY", "8"))
+TTS_MAX_KEEPALIVE = int(os.environ.get("TTS_MAX_KEEPALIVE", "8"))
+TTS_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("TTS_CONNECT_TIMEOUT_SECONDS", "5"))
+TTS_TIMEOUT_SECONDS = float(os.environ.get("TTS_TIMEOUT_SECONDS", "30"))
+TTS_VOICES_TTL_SECONDS = float(os.environ.get("TTS_VOICES_TTL_SECONDS", "3600"))
+
+TTS_MODEL = "eleven_monolingual_v1"
+TTS_OUTPUT_FORMAT = "mp3_44100_128"
+
+# Chunk size when replaying a cached clip
+CACHED_CHUNK_BYTES = 64 * 1024
+
+TTS_PIPELINE_MIN_CHARS = int(os.environ.get("TTS_PIPELINE_MIN_CHARS", "300"))
+TTS_PIPELINE_CHUNK_CHARS = int(os.environ.get("TTS_PIPELINE_CHUNK_CHARS", "250"))
+TTS_PIPELINE_CONCURRENCY = int(os.environ.get("TTS_PIPELINE_CONCURRENCY", "3"))
+
+# Whitespace after ./!/?/… (optionally followed by a closing quote or bracket),
+# or right after CJK full-width sentence punctuation
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]]))\s+|(?<=[。！？])\s*")
+
+
+# Titles and Latin abbreviations whose period does not end a sentence
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "e.g", "i.e", "cf", "approx"}
+
+
+def _ends_with_abbreviation(sentence: str) -> bool:
+    """True for "... Dr." or an initial like "... J." (but not "I.")."""
+    if not sentence.endswith("."):
+        return False
+    word = sentence.rsplit(None, 1)[-1][:-1]
+    return word.lower() in _ABBREVIATIONS or (len(word) == 1 and word.isupper() and word != "I")
+
+
+def split_sentences(text: str, chunk_chars: int = TTS_PIPELINE_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into synthesis requests at sentence boundaries.
+    
+    A period after an abbreviation or initial ("Dr. Lee", "e.g. this",
+    "J. Smith") or one followed by a lowercase word is not a boundary.
+    The first sentence stays on its own (it decides time-to-first-audio);
+    the following ones are grouped up to chunk_chars so a long text does not
+    turn into dozens of tiny requests.
+    """
+    sentences: List[str] = []
+    for part in _SENTENCE_END.split(text.strip()):
+        part = part.strip()
+        if not part:
+            continue
+        if sentences and (_ends_with_abbreviation(sentences[-1]) or part[0].islower()):
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    pieces: List[str] = []
+    for sentence in sentences:
+        if len(pieces) > 1 and len(pieces[-1]) + 1 + len(sentence) <= chunk_chars:
+            pieces[-1] = f"{pieces[-1]} {sentence}"
+        else:
+            pieces.append(sentence)
+    return pieces
+
+
 class TTSService:
     """Text-to-Speech service using ElevenLabs - with lazy initialization"""
     
@@ -19,6 +130,15 @@ class TTSService:
         self.client = None
         self.available = False
         self._initialized = False
+        self.voice_id = os.getenv("ELEVENLABS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL")
+        self.streams = 0
+        # Moving average of seconds until the first audio chunk
+        self._avg_first_chunk_seconds = None
+        self._semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENCY)
+        self._in_flight = 0
+        # /tts/voices cache: (fetched_at, voices)
+        self._voices: Optional[tuple] = None
+        self._voices_lock = asyncio.Lock()
         
     def _init_client(self):
         """Lazy initialization of ElevenLabs client (called on first use)"""
@@ -39,7 +159,16 @@ class TTSService:
             return
         
         try:
-            self.client = ElevenLabs(api_key=api_key)
+            self.client = httpx.AsyncClient(
+                base_url=ELEVENLABS_API_URL,
+                headers={"xi-api-key": api_key},
+                limits=httpx.Limits(
+                    max_connections=TTS_MAX_CONCURRENCY,
+                    max_keepalive_connections=TTS_MAX_KEEPALIVE,
+                ),
+                # read = longest gap between two audio chunks
+                timeout=httpx.Timeout(TTS_TIMEOUT_SECONDS, connect=TTS_CONNECT_TIMEOUT_SECONDS),
+            )
             self.voice_id = os.getenv("ELEVENLABS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL")
             self.available = True
             logger.info("✓ ElevenLabs TTS service initialized successfully")
@@ -49,67 +178,199 @@ class TTSService:
             self.client = None
             self.available = False
         
-    async def speak(self, text: str, voice_id: str = None, language: str = "en") -> bytes:
+    def is_available(self) -> bool:
+        """Initialize the client if needed and report whether synthesis can run."""
+        self._init_client()
+        return self.available
+    
+    def _record_first_chunk(self, seconds: float):
+        self.streams += 1
+        if self._avg_first_chunk_seconds is None:
+            self._avg_first_chunk_seconds = seconds
+        else:
+            self._avg_first_chunk_seconds = 0.8 * self._avg_first_chunk_seconds + 0.2 * seconds
+        metrics.incr("tts.streams")
+        metrics.incr("tts.first_chunk_seconds", seconds)
+        logger.info(f"🔊 TTS: first audio chunk after {seconds * 1000:.0f} ms")
+    
+    def _log_error(self, error: Exception):
+        error_msg = str(error)
+        logger.error(f"✗ TTS Error: {error_msg}")
+        
+        # Log specific error types
+        if isinstance(error, httpx.TimeoutException):
+            logger.error(f"✗ TIMEOUT: ElevenLabs did not answer in time ({type(error).__name__})")
+        elif "401" in error_msg or "Unauthorized" in error_msg or "authentication" in error_msg.lower():
+            logger.error("✗ 401 UNAUTHORIZED: ELEVENLABS_API_KEY is invalid or expired")
+            logger.error("   Check: https://elevenlabs.io/app/api-keys")
+        elif "429" in error_msg or "rate" in error_msg.lower():
+            logger.error("✗ 429 RATE LIMITED: Too many requests to ElevenLabs - please wait and try again")
+        elif "400" in error_msg or "Invalid request" in error_msg:
+            logger.error(f"✗ 400 BAD REQUEST: Check text or voice parameters")
+        else:
+            logger.error(f"✗ Service error: {error_msg[:100]}")
+    
+    def cache_key(self, text: str, voice_id: str = None) -> str:
+        """Audio cache key (also used as the ETag) for a text and voice."""
+        return audio_cache_key(text, voice_id or self.voice_id, TTS_MODEL, TTS_OUTPUT_FORMAT)
+    
+    async def speak(self, text: str, voice_id: str = None, language: str = "en") -> AsyncIterator[bytes]:
         """
-        Convert text to speech
+        Convert text to speech, yielding MP3 chunks as soon as they arrive
         
         Args:
             text: Text to convert to speech
             voice_id: Optional voice ID override
             language: Language code (default: "en")
             
-        Returns:
-            Audio bytes in MP3 format, or None if failed
+        Yields:
+            MP3 audio chunks
+            
+        Raises:
+            TTSUnavailable if ELEVENLABS_API_KEY is not configured (and the clip is not cached)
+            ElevenLabs errors (auth, rate limit, bad request) - logged, then re-raised
         """
-        # Lazy initialization on first use
-        self._init_client()
+        # Use provided voice_id or default
+        use_voice_id = voice_id or self.voice_id
+        cache_key = self.cache_key(text, use_voice_id)
+        cached = await tts_audio_cache.get(cache_key)
+        if cached is not None:
+            metrics.incr("tts.cache_hits")
+            logger.info(f"✓ TTS: cache hit ({len(cached)} bytes)")
+        else:
+            prebuilt = question_audio.prebuilt_path(cache_key)
+            if prebuilt is not None:
+                cached = await asyncio.to_thread(prebuilt.read_bytes)
+                metrics.incr("tts.prebuilt_hits")
+                logger.info(f"✓ TTS: pre-synthesized clip {prebuilt.name}")
+        if cached is not None:
+            for offset in range(0, len(cached), CACHED_CHUNK_BYTES):
+                yield cached[offset:offset + CACHED_CHUNK_BYTES]
+            return
         
-        if not self.client:
+        # Lazy initialization on first use
+        if not self.is_available():
             logger.error("✗ ElevenLabs client not initialized - ELEVENLABS_API_KEY not set")
-            return None
+            raise TTSUnavailable("ElevenLabs client not initialized - ELEVENLABS_API_KEY not set")
         
-        if not self.available:
-            logger.error("✗ ElevenLabs service not available")
-            return None
-            
+        logger.info(f"🔊 TTS: Streaming audio with voice {use_voice_id[:8]}... for text length {len(text)}")
+        
+        # The upstream read runs on its own, so a slow client never holds a
+        # concurrency slot or pooled connection - it only drains the queue
+        queue: asyncio.Queue = asyncio.Queue()
+        producer = asyncio.ensure_future(self._read_upstream(text, use_voice_id, queue))
+        parts = []
         try:
-            # Use provided voice_id or default
-            use_voice_id = voice_id or self.voice_id
-            
-            logger.info(f"🔊 TTS: Generating audio with voice {use_voice_id[:8]}... for text length {len(text)}")
-            
-            audio = self.client.generate(
-                text=text,
-                voice=use_voice_id,
-                model="eleven_monolingual_v1"
-            )
-            
-            # Convert generator to bytes
-            audio_bytes = BytesIO()
-            for chunk in audio:
-                audio_bytes.write(chunk)
-            
-            audio_bytes.seek(0)
-            result = audio_bytes.getvalue()
-            logger.info(f"✓ TTS: Successfully generated {len(result)} bytes of audio")
-            return result
-            
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                parts.append(item)
+                yield item
+        finally:
+            # Client gone mid-clip - stop pulling from ElevenLabs
+            producer.cancel()
+        
+        # Only complete clips are cached (a client that left early closes us above)
+        await tts_audio_cache.set(cache_key, b"".join(parts))
+    
+    async def _read_upstream(self, text: str, voice_id: str, queue: asyncio.Queue):
+        """Stream one synthesis into queue: MP3 chunks, then None (done) or the error."""
+        started = time.monotonic()
+        total = 0
+        try:
+            async with self._semaphore:
+                self._in_flight += 1
+                try:
+                    async with self.client.stream(
+                        "POST",
+                        f"/text-to-speech/{voice_id}/stream",
+                        params={"output_format": TTS_OUTPUT_FORMAT},
+                        json={"text": text, "model_id": TTS_MODEL},
+                    ) as response:
+                        if response.status_code >= 400:
+                            body = (await response.aread()).decode("utf-8", errors="ignore")
+                            raise TTSRequestError(response.status_code, body[:200], response.headers.get("retry-after"))
+                        async for chunk in response.aiter_bytes():
+                            if not chunk:
+                                continue
+                            if not total:
+                                self._record_first_chunk(time.monotonic() - started)
+                            total += len(chunk)
+                            queue.put_nowait(chunk)
+                finally:
+                    self._in_flight -= 1
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"✗ TTS Error: {error_msg}")
-            
-            # Log specific error types
-            if "401" in error_msg or "Unauthorized" in error_msg or "authentication" in error_msg.lower():
-                logger.error("✗ 401 UNAUTHORIZED: ELEVENLABS_API_KEY is invalid or expired")
-                logger.error("   Check: https://elevenlabs.io/app/api-keys")
-            elif "429" in error_msg or "rate" in error_msg.lower():
-                logger.error("✗ 429 RATE LIMITED: Too many requests to ElevenLabs - please wait and try again")
-            elif "400" in error_msg or "Invalid request" in error_msg:
-                logger.error(f"✗ 400 BAD REQUEST: Check text or voice parameters")
-            else:
-                logger.error(f"✗ Service error: {error_msg[:100]}")
-            
-            return None
+            self._log_error(e)
+            queue.put_nowait(e)
+            return
+        
+        logger.info(f"✓ TTS: Streamed {total} bytes of audio in {time.monotonic() - started:.2f}s")
+        queue.put_nowait(None)
+    
+    async def speak_pipelined(self, text: str, voice_id: str = None, language: str = "en",
+                              concurrency: int = TTS_PIPELINE_CONCURRENCY) -> AsyncIterator[bytes]:
+        """
+        Sentence-pipelined speak(): synthesize sentences concurrently, stream in order
+        
+        At most `concurrency` sentences are in flight. The sentence currently
+        being played is forwarded chunk by chunk; later ones buffer until
+        their turn. Each sentence goes through speak(), so it is cached on
+        its own and reused by any other text containing it.
+        
+        Raises:
+            Same as speak(), when the failing sentence's turn comes
+        """
+        sentences = split_sentences(text)
+        if len(sentences) <= 1:
+            async for chunk in self.speak(text, voice_id=voice_id, language=language):
+                yield chunk
+            return
+        
+        logger.info(f"🔊 TTS: pipelining {len(sentences)} sentences ({len(text)} chars, {concurrency} in flight)")
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        queues = [asyncio.Queue() for _ in sentences]
+        
+        async def synthesize(sentence: str, queue: asyncio.Queue):
+            async with semaphore:
+                audio = self.speak(sentence, voice_id=voice_id, language=language)
+                try:
+                    async for chunk in audio:
+                        queue.put_nowait(chunk)
+                    queue.put_nowait(None)
+                except Exception as e:
+                    queue.put_nowait(e)
+                finally:
+                    await audio.aclose()
+        
+        tasks = [asyncio.ensure_future(synthesize(s, q)) for s, q in zip(sentences, queues)]
+        try:
+            for queue in queues:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            # Client gone or a sentence failed - stop the remaining requests
+            for task in tasks:
+                task.cancel()
+    
+    def stats(self) -> Dict:
+        """Streams served and average time to first audio chunk."""
+        avg = self._avg_first_chunk_seconds
+        return {
+            "available": self.available,
+            "in_flight": self._in_flight,
+            "max_concurrency": TTS_MAX_CONCURRENCY,
+            "cache": tts_audio_cache.stats(),
+            "streams": self.streams,
+            "avg_first_chunk_ms": round(avg * 1000) if avg is not None else None,
+        }
     
     async def get_available_voices(self):
         """Get list of available voices"""
@@ -118,20 +379,36 @@ class TTSService:
         
         if not self.client or not self.available:
             return []
-            
-        try:
-            voices = self.client.voices.get_all()
-            return [
-                {
-                    "id": voice.voice_id,
-                    "name": voice.name,
-                    "preview_url": voice.preview_url if hasattr(voice, 'preview_url') else None
-                }
-                for voice in voices
-            ]
-        except Exception as e:
-            logger.error(f"Error fetching voices: {e}")
-            return []
+        
+        # One fetch per TTL, shared by concurrent callers
+        async with self._voices_lock:
+            if self._voices and time.monotonic() - self._voices[0] < TTS_VOICES_TTL_SECONDS:
+                return self._voices[1]
+            try:
+                response = await self.client.get("/voices")
+                response.raise_for_status()
+                voices = [
+                    {
+                        "id": voice["voice_id"],
+                        "name": voice.get("name"),
+                        "preview_url": voice.get("preview_url")
+                    }
+                    for voice in response.json().get("voices", [])
+                ]
+                self._voices = (time.monotonic(), voices)
+                return voices
+            except Exception as e:
+                logger.error(f"Error fetching voices: {e}")
+                # Serve the stale list rather than nothing
+                return self._voices[1] if self._voices else []
+    
+    async def aclose(self):
+        """Close pooled ElevenLabs connections (call on app shutdown)."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+            self.available = False
+            self._initialized = False
 
 # Initialize TTS service (lazy loading - actual client init happens on first use)
 tts_service = TTSService()
@@ -0,0 +1,138 @@
+"""
+Voice-activity detection: trim silence before Whisper.
+
+Interview recordings have long thinking pauses and mic-on-before/after
+silence, and Whisper spends full 30 s decode windows on them. trim_silence()
+finds speech regions and returns audio with:
+- leading and trailing silence removed
+- internal gaps longer than VAD_MAX_GAP_SECONDS shortened to VAD_KEEP_GAP_SECONDS
+  (a short pause is kept so words on either side don't run together)
+
+Backends:
+- "energy" (default): NumPy frame energy + zero-crossing rate, adaptive to
+  the recording's noise floor
+- "webrtc": webrtcvad if installed (pip install webrtcvad), else energy
+
+Configuration (environment variables):
+- VAD_ENABLED: "false" disables trimming (default: true)
+- VAD_BACKEND: energy | webrtc (default: energy)
+- VAD_AGGRESSIVENESS: webrtcvad mode 0-3 (default: 2)
+- VAD_PADDING_SECONDS: speech padding on each side of a region (default: 0.2)
+- VAD_MAX_GAP_SECONDS: internal silences longer than this are shortened (default: 1.0)
+- VAD_KEEP_GAP_SECONDS: silence kept in place of a long gap (default: 0.3)
+"""
+
+import os
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "true").lower() in ("1", "true", "yes")
+VAD_BACKEND = os.environ.get("VAD_BACKEND", "energy").lower()
+VAD_AGGRESSIVENESS = int(os.environ.get("VAD_AGGRESSIVENESS", "2"))
+VAD_PADDING_SECONDS = float(os.environ.get("VAD_PADDING_SECONDS", "0.2"))
+VAD_MAX_GAP_SECONDS = float(os.environ.get("VAD_MAX_GAP_SECONDS", "1.0"))
+VAD_KEEP_GAP_SECONDS = float(os.environ.get("VAD_KEEP_GAP_SECONDS", "0.3"))
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03  # 30 ms - also a frame size webrtcvad accepts
+
+
+def _energy_speech_frames(audio, frame: int):
+    """Per-frame speech mask from log energy with a ZCR assist for fricatives."""
+    import numpy as np
+
+    n = len(audio) // frame
+    frames = audio[:n * frame].reshape(n, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    energy_db = 20 * np.log10(rms + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    # Threshold adapts to this recording's noise floor, but is capped so a
+    # recording with no silence in it can't push soft speech under the bar
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = min(max(noise_floor + 10.0, -50.0), -35.0)
+    voiced = energy_db > threshold
+    # Unvoiced consonants (s, f, sh): quieter but high zero-crossing rate
+    unvoiced = (energy_db > threshold - 6.0) & (zcr > 0.15) & (zcr < 0.5)
+    return voiced | unvoiced
+
+
+def _webrtc_speech_frames(audio, frame: int):
+    import numpy as np
+    import webrtcvad
+
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    n = len(pcm) // frame
+    return np.array([
+        vad.is_speech(pcm[i * frame:(i + 1) * frame].tobytes(), SAMPLE_RATE)
+        for i in range(n)
+    ], dtype=bool)
+
+
+def speech_regions(audio, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """Padded speech regions as (start_sample, end_sample), merged across short gaps."""
+    frame = int(FRAME_SECONDS * sample_rate)
+    if len(audio) < frame:
+        return [(0, len(audio))] if len(audio) else []
+
+    mask = None
+    if VAD_BACKEND == "webrtc" and sample_rate == SAMPLE_RATE:
+        try:
+            mask = _webrtc_speech_frames(audio, frame)
+        except ImportError:
+            logger.warning("webrtcvad not installed - using energy VAD")
+    if mask is None:
+        mask = _energy_speech_frames(audio, frame)
+
+    pad = int(VAD_PADDING_SECONDS * sample_rate)
+    regions: List[Tuple[int, int]] = []
+    start = None
+    for i, is_speech in enumerate(list(mask) + [False]):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            s = max(0, start * frame - pad)
+            e = min(len(audio), i * frame + pad)
+            if regions and s - regions[-1][1] <= int(VAD_MAX_GAP_SECONDS * sample_rate):
+                regions[-1] = (regions[-1][0], e)
+            else:
+                regions.append((s, e))
+            start = None
+    return regions
+
+
+def trim_silence(audio, sample_rate: int = SAMPLE_RATE):
+    """
+    Remove leading/trailing silence and shorten long internal gaps.
+
+    Returns:
+        (trimmed_audio, stats) where stats has audio_seconds, speech_seconds,
+        trimmed_seconds and regions
+    """
+    import numpy as np
+
+    total = len(audio)
+    stats: Dict = {"audio_seconds": round(total / sample_rate, 2)}
+    if not VAD_ENABLED or total == 0:
+        stats.update({"speech_seconds": stats["audio_seconds"], "trimmed_seconds": 0.0, "regions": 1})
+        return audio, stats
+
+    regions = speech_regions(audio, sample_rate)
+    gap = np.zeros(int(VAD_KEEP_GAP_SECONDS * sample_rate), dtype=audio.dtype)
+    pieces = []
+    for i, (s, e) in enumerate(regions):
+        if i:
+            pieces.append(gap)
+        pieces.append(audio[s:e])
+    trimmed = np.concatenate(pieces) if pieces else audio[:0]
+
+    stats.update({
+        "speech_seconds": round(len(trimmed) / sample_rate, 2),
+        "trimmed_seconds": round((total - len(trimmed)) / sample_rate, 2),
+        "regions": len(regions),
+    })
+    return trimmed, stats
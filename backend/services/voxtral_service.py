@@ -4,8 +4,16 @@ import json
 import re
 import logging
 import io
-import tempfile
-from mistralai import Mistral
+import hashlib
+from typing import Optional
+from services import asr_backends, llm_gateway
+from services.rate_limiter import RateLimitExceeded
+from services import metrics, vad
+from services.response_cache import make_key, transcript_cache
+from services.singleflight import SingleFlight
+from services.transcription_pool import TranscriptionQueueFull, WHISPER_QUANTIZE_INT8, resolve_model_size
+from services.transcription_batcher import transcription_batcher
+from services.long_audio import transcribe_chunks
 
 # =============================================================================
 # MISTRAL HACKATHON: PrepCoach AI - Using Mistral AI for prep & coaching
@@ -15,42 +23,28 @@ from mistralai import Mistral
 # Supports: Interview prep, career coaching, exam prep, skill training
 # =============================================================================
 
-# Try to import whisper for audio transcription
-WHISPER_AVAILABLE = False
-WHISPER_MODEL = None
+# Speech-to-text runs in the transcription worker pool - each worker process
+# loads its own model, so the web process only checks that the configured
+# ASR backend's engine is installed (name kept for existing imports)
+WHISPER_AVAILABLE = asr_backends.is_available(asr_backends.ASR_BACKEND)
 
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-    logging.warning("✓ Whisper module imported successfully")
-    # Preload the base model for faster transcription
-    try:
-        logging.warning("Loading Whisper base model... this may take a minute on first run")
-        WHISPER_MODEL = whisper.load_model("base", device="cpu")
-        logging.warning("✓✓✓ WHISPER MODEL LOADED - Real audio transcription is READY ✓✓✓")
-    except Exception as e:
-        logging.error(f"Failed to preload Whisper model: {e}")
-        logging.warning("Whisper module available but model loading failed - will try on first transcription")
-        WHISPER_AVAILABLE = True  # Module works, just model load failed
-except ImportError as e:
-    logging.error(f"✗ Whisper import failed: {e}")
+if WHISPER_AVAILABLE:
+    logging.warning(f"✓ ASR backend '{asr_backends.ASR_BACKEND}' available - transcription runs in the worker pool")
+else:
+    logging.error(f"✗ ASR backend '{asr_backends.ASR_BACKEND}' not installed")
     logging.error("Audio transcription will use demo fallback")
-    WHISPER_AVAILABLE = False
-    WHISPER_MODEL = None
-except Exception as e:
-    logging.error(f"✗ Unexpected error with Whisper: {e}")
-    WHISPER_AVAILABLE = False
-    WHISPER_MODEL = None
 
 logger = logging.getLogger(__name__)
 
-# Initialize Mistral client - make sure MISTRAL_API_KEY is set in .env
-api_key = os.environ.get("MISTRAL_API_KEY", "").strip()
-if not api_key or api_key == "":
-    logger.warning("MISTRAL_API_KEY not set in environment")
-    api_key = ""
+# Bump when the transcription pipeline changes in a way that changes output
+TRANSCRIPT_CACHE_VERSION = "v1"
 
-client = Mistral(api_key=api_key)
+# Identical recordings in flight at the same time (double submit, retries) share one job
+_transcribe_flight = SingleFlight("transcripts")
+
+# Mistral access goes through the shared async LLM gateway - set MISTRAL_API_KEY in .env
+if not llm_gateway.is_configured():
+    logger.warning("MISTRAL_API_KEY not set in environment")
 
 COACH_SYSTEM_PROMPT = """You are Alex, a world-class senior technical recruiter and interview coach with 15 years of experience at FAANG companies.
 
@@ -69,11 +63,11 @@ async def analyze_voice_answer(transcript: str, question: str, role: str) -> dic
     In production, this would use Voxtral-Realtime directly.
     """
     try:
-        if not client or not api_key:
+        if not llm_gateway.is_configured():
             logger.error("Mistral client not properly initialized")
             raise Exception("Mistral API key not configured")
         
-        response = client.chat.complete(
+        content = await llm_gateway.complete(
             model="mistral-large-latest",
             messages=[
                 {"role": "system", "content": COACH_SYSTEM_PROMPT},
@@ -105,8 +99,6 @@ Please provide:
             ]
         )
         
-        content = response.choices[0].message.content
-        
         # Parse feedback and scores
         import json, re
         json_match = re.search(r'\{[\s\S]*"scores"[\s\S]*\}', content)
@@ -130,6 +122,8 @@ Please provide:
             "overall": scores_data.get("overall", 5),
             "tip": scores_data.get("tip", "Keep practicing!")
         }
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing answer: {e}")
         # Return graceful fallback
@@ -145,13 +139,38 @@ Please provide:
         }
 
 
-async def transcribe_audio(audio_base64: str) -> str:
+async def _transcribe(audio_bytes: bytes, language: str, model_size: str) -> dict:
+    """One Whisper pass, or a parallel chunked pass for long recordings."""
+    result = await transcription_batcher.submit(audio_bytes, language, model_size)
+    if "chunks" in result:
+        text = await transcribe_chunks(result["chunks"], language, model_size)
+        return {"text": text, "vad": result["vad"]}
+    return result
+
+
+def transcript_cache_key(audio_bytes: bytes, language: str, model_size: str) -> str:
+    """Hash of the audio bytes plus every setting that changes Whisper's output."""
+    return make_key(
+        asr_backends.ASR_BACKEND, TRANSCRIPT_CACHE_VERSION, model_size, WHISPER_QUANTIZE_INT8, language,
+        transcription_batcher.decode_mode,
+        vad.VAD_ENABLED, vad.VAD_BACKEND, vad.VAD_PADDING_SECONDS, vad.VAD_MAX_GAP_SECONDS,
+        vad.VAD_KEEP_GAP_SECONDS, hashlib.sha256(audio_bytes).hexdigest(),
+    )
+
+
+async def transcribe_audio_bytes(audio_bytes: bytes, language: str = "en", quality: Optional[str] = None) -> str:
     """
-    Transcribe audio using OpenAI's Whisper model (free, open-source).
-    Falls back to demo text if Whisper is not available.
+    Transcribe raw encoded audio bytes (webm/opus, wav, mp3, ...) with Whisper.
+    
+    Binary ingestion path: the bytes go straight to a worker process, which
+    decodes them through an ffmpeg pipe into a NumPy array for the model.
+    `quality` is an optional hint (fast/balanced/accurate or tiny/base/small)
+    choosing the Whisper model size. Transcripts are cached by content hash,
+    so re-submitting the same recording skips Whisper entirely. Falls back to
+    demo text if Whisper is not available.
     """
     try:
-        if not audio_base64:
+        if not audio_bytes:
             logger.error("No audio data provided for transcription")
             raise ValueError("Audio data is empty")
         
@@ -160,39 +179,62 @@ async def transcribe_audio(audio_base64: str) -> str:
             logger.warning("Whisper not available - returning demo transcription")
             return "This is a demo transcription. In production with Whisper, this would be the actual audio-to-text conversion of your answer."
         
-        # Decode base64 to audio bytes
-        audio_bytes = base64.b64decode(audio_base64)
         logger.info(f"Received audio data: {len(audio_bytes)} bytes")
         
-        # Use preloaded model or load if needed
-        model = WHISPER_MODEL if WHISPER_MODEL else whisper.load_model("base", device="cpu")
-        logger.info("Whisper model ready for transcription")
+        model_size = resolve_model_size(quality)
+        cache_key = transcript_cache_key(audio_bytes, language, model_size)
+        result = await transcript_cache.get(cache_key)
+        if result is not None:
+            logger.info("✓ Transcript cache hit - skipping Whisper")
+        else:
+            # Transcribe in a worker process so the event loop stays free
+            result = await _transcribe_flight.do(
+                cache_key, lambda: _transcribe(audio_bytes, language, model_size)
+            )
+            await transcript_cache.set(cache_key, result)
+            
+            vad_stats = result.get("vad", {})
+            metrics.incr("vad.audio_seconds", vad_stats.get("audio_seconds", 0))
+            metrics.incr("vad.trimmed_seconds", vad_stats.get("trimmed_seconds", 0))
+            logger.info(f"VAD: {vad_stats.get('trimmed_seconds', 0)}s of {vad_stats.get('audio_seconds', 0)}s trimmed before Whisper")
+        transcription = result["text"]
+        logger.info(f"Transcribed text: {transcription[:100]}...")
         
-        # Save audio bytes to temporary file (Whisper needs a file path)
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_path = tmp_file.name
+        if not transcription:
+            transcription = "[Audio recorded but no speech detected]"
         
-        try:
-            # Transcribe audio using Whisper
-            result = model.transcribe(tmp_path, language="en", verbose=False)
-            transcription = result["text"].strip()
-            logger.info(f"Transcribed text: {transcription[:100]}...")
-            
-            if not transcription:
-                transcription = "[Audio recorded but no speech detected]"
-            
-            return transcription
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+        return transcription
         
+    except TranscriptionQueueFull:
+        # Let routers answer 503 + Retry-After
+        raise
     except Exception as e:
         logger.error(f"Error transcribing audio: {e}")
         raise ValueError(f"Failed to transcribe audio: {str(e)}")
-        # Return error message instead of fake data
-        raise ValueError(f"Transcription failed: {str(e)}")
+
+
+async def transcribe_audio(audio_base64: str) -> str:
+    """
+    Transcribe base64-encoded audio (compatibility path for JSON endpoints).
+    
+    New clients should upload binary audio to /analysis/transcribe instead.
+    """
+    if not audio_base64:
+        logger.error("No audio data provided for transcription")
+        raise ValueError("Audio data is empty")
+    try:
+        audio_bytes = base64.b64decode(audio_base64)
+    except Exception as e:
+        raise ValueError(f"Failed to transcribe audio: invalid base64 ({e})")
+    return await transcribe_audio_bytes(audio_bytes, "en")
+
+
+def transcription_stats() -> dict:
+    """Transcript cache and coalescing counters."""
+    return {
+        "cache": transcript_cache.stats(),
+        "single_flight": _transcribe_flight.stats(),
+    }
 
 
 def generate_voice_feedback(text: str) -> str:
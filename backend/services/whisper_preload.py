@@ -0,0 +1,22 @@
+"""
+Forkserver preload module for the transcription pool.
+
+With WHISPER_START_METHOD=forkserver the pool asks multiprocessing to import
+this module once in the fork server. Importing it loads the default model there
+(with the configured ASR backend). Every pool worker is then forked from that process and inherits
+the weights copy-on-write instead of loading (and holding) its own copy.
+Inference only reads the weight tensors, so their pages stay shared. PSS in
+the pool's memory report shows the split.
+"""
+
+import logging
+
+from services import transcription_worker
+from services.asr_backends import ASR_BACKEND
+from services.transcription_pool import WHISPER_MODEL_SIZE, WHISPER_QUANTIZE_INT8
+
+try:
+    transcription_worker.init_worker(WHISPER_MODEL_SIZE, WHISPER_QUANTIZE_INT8, ASR_BACKEND)
+except Exception as e:
+    # Workers fall back to loading their own model
+    logging.error(f"Whisper preload in fork server failed: {e}")
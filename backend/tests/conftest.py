@@ -0,0 +1,72 @@
+"""
+Shared pytest setup.
+
+Run from backend/: python -m pytest -q tests
+Modules import each other as `services.*` (backend/ is the app root), so
+backend/ goes on sys.path here.
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_real_sleep = asyncio.sleep
+
+
+async def settle(rounds: int = 20):
+    """Let every ready task run until it blocks again."""
+    for _ in range(rounds):
+        await _real_sleep(0)
+
+
+class FakeClock:
+    """
+    Stand-in for a module's `time` (monotonic/time) and `asyncio.sleep`.
+
+    Sleepers block until advance() moves the clock past their wake-up time,
+    so tests control exactly when queued callers get to run.
+    """
+
+    WALL_OFFSET = 1_700_000_000.0
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+        self.sleeps = []
+        self._sleepers = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.WALL_OFFSET + self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        future = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self.now + seconds, future))
+        await future
+
+    async def advance(self, seconds: float):
+        """Move time forward, waking sleepers in wake-up order."""
+        target = self.now + seconds
+        while True:
+            await settle()
+            due = [s for s in self._sleepers if s[0] <= target]
+            if not due:
+                break
+            sleeper = min(due, key=lambda s: s[0])
+            self._sleepers.remove(sleeper)
+            self.now = max(self.now, sleeper[0])
+            if not sleeper[1].done():
+                sleeper[1].set_result(None)
+        self.now = target
+        await settle()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
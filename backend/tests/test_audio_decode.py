@@ -0,0 +1,43 @@
+import io
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+from services import audio_decode
+from services.audio_decode import decode_audio
+
+
+def test_empty_data_is_rejected_before_ffmpeg(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("ffmpeg should not be started")
+
+    monkeypatch.setattr(audio_decode.subprocess, "run", fail)
+    with pytest.raises(ValueError, match="empty"):
+        decode_audio(b"")
+
+
+def test_missing_ffmpeg_is_a_runtime_error(monkeypatch):
+    def missing(*args, **kwargs):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(audio_decode.subprocess, "run", missing)
+    with pytest.raises(RuntimeError, match="ffmpeg"):
+        decode_audio(b"RIFF")
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_wav_round_trip():
+    samples = (np.sin(np.linspace(0, 200 * np.pi, 16000)) * 16000).astype(np.int16)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(samples.tobytes())
+
+    audio = decode_audio(buf.getvalue())
+    assert audio.dtype == np.float32
+    assert len(audio) == 16000
+    assert np.allclose(audio, samples / 32768.0, atol=1e-4)
@@ -0,0 +1,172 @@
+import asyncio
+import types
+
+import pytest
+
+from services import circuit_breaker, rate_limiter
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from services.rate_limiter import AdaptiveRateLimiter
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return CircuitBreaker("m", failure_threshold=3, latency_slo=5, recovery_seconds=30)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.on_failure("boom", breaker.before_call())
+
+
+def test_opens_after_n_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.on_failure("boom", breaker.before_call())
+    assert breaker.state == CLOSED
+
+    breaker.on_failure("boom", breaker.before_call())
+    assert breaker.state == OPEN
+    assert breaker.opened_count == 1
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.before_call()
+    assert exc.value.retry_in == 30
+    assert breaker.short_circuited == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    for _ in range(2):
+        breaker.on_failure("boom", breaker.before_call())
+    breaker.on_success(0.1, breaker.before_call())
+    breaker.on_failure("boom", breaker.before_call())
+    assert breaker.state == CLOSED
+
+
+def test_slow_success_counts_as_failure(breaker):
+    for _ in range(3):
+        breaker.on_success(6.0, breaker.before_call())
+    assert breaker.state == OPEN
+
+
+def test_only_one_half_open_probe(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+
+    probe = breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.on_success(0.1, probe)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_or_slow_probe_reopens(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    breaker.on_failure("still down", breaker.before_call())
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    breaker.on_success(9.0, breaker.before_call())
+    assert breaker.state == OPEN
+    assert breaker.opened_count == 3
+
+
+def test_stale_success_does_not_close_an_open_circuit(breaker, clock):
+    slow_call = breaker.before_call()
+    trip(breaker)
+
+    breaker.on_success(0.1, slow_call)
+    assert breaker.state == OPEN
+
+    # Not even while the half-open probe is out
+    clock.now += 30
+    probe = breaker.before_call()
+    breaker.on_success(0.1, slow_call)
+    assert breaker.state == HALF_OPEN
+    breaker.on_success(0.1, probe)
+    assert breaker.state == CLOSED
+
+
+def test_stale_failure_does_not_reopen_or_count(breaker, clock):
+    old_calls = [breaker.before_call() for _ in range(3)]
+    trip(breaker)
+    clock.now += 30
+    breaker.on_success(0.1, breaker.before_call())
+
+    for generation in old_calls:
+        breaker.on_failure("late", generation)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_release_frees_the_probe_slot(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    probe = breaker.before_call()
+
+    breaker.release(probe)
+    assert breaker.state == HALF_OPEN
+    breaker.on_success(0.1, breaker.before_call())
+    assert breaker.state == CLOSED
+
+
+def test_stale_release_does_not_free_the_probe_slot(breaker, clock):
+    old_call = breaker.before_call()
+    trip(breaker)
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.release(old_call)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+class Upstream429(Exception):
+    status_code = 429
+    response = types.SimpleNamespace(status_code=429, headers={})
+
+
+@pytest.fixture
+def gateway_breaker(clock, monkeypatch):
+    llm_gateway = pytest.importorskip("services.llm_gateway")
+    for module in (rate_limiter, circuit_breaker, llm_gateway):
+        monkeypatch.setattr(module, "time", clock)
+    monkeypatch.setattr(rate_limiter, "asyncio", types.SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    # No budget to retry a 429 - it surfaces straight away
+    monkeypatch.setattr(rate_limiter, "_limiters", {"m": AdaptiveRateLimiter("m", rate=100, burst=100, max_wait=0)})
+    breaker = CircuitBreaker("m", failure_threshold=1, latency_slo=5, recovery_seconds=30)
+    monkeypatch.setattr(circuit_breaker, "_breakers", {"m": breaker})
+    trip(breaker)
+    clock.now += 30
+    return llm_gateway, breaker
+
+
+def test_429_on_the_probe_releases_it(gateway_breaker, clock):
+    llm_gateway, breaker = gateway_breaker
+
+    async def rate_limited():
+        raise Upstream429()
+
+    with pytest.raises(rate_limiter.RateLimitExceeded):
+        asyncio.run(llm_gateway._guarded("m", rate_limited))
+    assert breaker.state == HALF_OPEN
+    clock.now += 1   # let the limiter refill after the 429
+    assert asyncio.run(llm_gateway._guarded("m", lambda: asyncio.sleep(0, "ok"))) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_probe_releases_it(gateway_breaker):
+    llm_gateway, breaker = gateway_breaker
+
+    async def scenario():
+        probe = asyncio.ensure_future(llm_gateway._guarded("m", lambda: asyncio.sleep(60)))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await llm_gateway._guarded("m", lambda: asyncio.sleep(0, "ok"))
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CLOSED
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+
+from conftest import settle
+from services.fanout import SubCall, fan_out
+
+
+class Backpressure(Exception):
+    pass
+
+
+def value(result, delay=0.0):
+    async def fn():
+        await asyncio.sleep(delay)
+        return result
+    return fn
+
+
+def failing(error, delay=0.0):
+    async def fn():
+        await asyncio.sleep(delay)
+        raise error
+    return fn
+
+
+def test_results_and_no_errors_when_everything_succeeds():
+    results, errors = asyncio.run(fan_out(
+        SubCall("analysis", value({"topic": "algebra"}), timeout=1),
+        SubCall("hints", value({"hint_1": "x"}, delay=0.01), timeout=1),
+    ))
+    assert results == {"analysis": {"topic": "algebra"}, "hints": {"hint_1": "x"}}
+    assert errors == {}
+
+
+def test_calls_run_concurrently():
+    started = time.monotonic()
+    asyncio.run(fan_out(
+        SubCall("a", value(1, delay=0.2), timeout=1),
+        SubCall("b", value(2, delay=0.2), timeout=1),
+    ))
+    assert time.monotonic() - started < 0.35
+
+
+def test_timed_out_call_returns_its_fallback_and_is_reported():
+    results, errors = asyncio.run(fan_out(
+        SubCall("analysis", value({"topic": "algebra"}), timeout=1),
+        SubCall("hints", value({"hint_1": "late"}, delay=10), timeout=0.05, fallback={}),
+    ))
+    assert results == {"analysis": {"topic": "algebra"}, "hints": {}}
+    assert errors == {"hints": "timed out after 0.05s"}
+
+
+def test_failed_call_returns_its_fallback_and_is_reported():
+    results, errors = asyncio.run(fan_out(
+        SubCall("analysis", failing(ValueError("bad json")), timeout=1, fallback={"topic": "?"}),
+        SubCall("hints", value({"hint_1": "x"}), timeout=1),
+        propagate=(Backpressure,),
+    ))
+    assert results["analysis"] == {"topic": "?"}
+    assert errors == {"analysis": "ValueError: bad json"}
+
+
+def test_propagating_error_cancels_siblings_immediately():
+    async def scenario():
+        cancelled = asyncio.Event()
+
+        async def slow_sibling():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        started = time.monotonic()
+        with pytest.raises(Backpressure):
+            await fan_out(
+                SubCall("analysis", slow_sibling, timeout=30),
+                SubCall("hints", failing(Backpressure(), delay=0.01), timeout=30),
+                propagate=(Backpressure,),
+            )
+        elapsed = time.monotonic() - started
+        await settle()
+        return elapsed, cancelled.is_set()
+
+    elapsed, cancelled = asyncio.run(scenario())
+    assert elapsed < 1
+    assert cancelled
+
+
+def test_propagating_error_wins_over_plain_failures():
+    with pytest.raises(Backpressure):
+        asyncio.run(fan_out(
+            SubCall("analysis", failing(ValueError("x")), timeout=1),
+            SubCall("hints", failing(Backpressure(), delay=0.01), timeout=1),
+            propagate=(Backpressure,),
+        ))
+
+
+def test_cancelling_the_fan_out_cancels_every_call():
+    async def scenario():
+        cancelled = []
+
+        def tracked(name):
+            async def fn():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(name)
+                    raise
+            return fn
+
+        task = asyncio.ensure_future(fan_out(SubCall("a", tracked("a"), 30), SubCall("b", tracked("b"), 30)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await settle()
+        return sorted(cancelled)
+
+    assert asyncio.run(scenario()) == ["a", "b"]
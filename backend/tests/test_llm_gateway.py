@@ -0,0 +1,110 @@
+import asyncio
+import types
+
+import pytest
+
+from services import circuit_breaker, rate_limiter
+from services.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded
+
+llm_gateway = pytest.importorskip("services.llm_gateway")
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code: int, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = types.SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+@pytest.fixture
+def limiter(clock, monkeypatch):
+    for module in (rate_limiter, circuit_breaker, llm_gateway):
+        monkeypatch.setattr(module, "time", clock)
+    monkeypatch.setattr(rate_limiter, "asyncio", types.SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    limiter = AdaptiveRateLimiter("m", rate=2, burst=1, max_wait=3)
+    monkeypatch.setattr(rate_limiter, "_limiters", {"m": limiter})
+    return limiter
+
+
+def flaky(failures: int, status: int = 429):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise UpstreamError(status)
+        return "ok"
+
+    return fn, calls
+
+
+def test_upstream_429_is_retried_within_the_wait_budget(clock, limiter):
+    fn, calls = flaky(2)
+
+    async def scenario():
+        task = asyncio.ensure_future(llm_gateway._guarded("m", fn))
+        # 429 -> rate 1/s, wait 1s; 429 -> rate 0.5/s, wait 2s (exactly the 2s left)
+        await clock.advance(3)
+        return await task
+
+    assert asyncio.run(scenario()) == "ok"
+    assert len(calls) == 3
+    assert limiter.rate_limited_count == 2
+
+
+def test_upstream_429_raises_once_the_budget_is_spent(clock, limiter):
+    fn, calls = flaky(10)
+
+    async def scenario():
+        task = asyncio.ensure_future(llm_gateway._guarded("m", fn))
+        await clock.advance(3)
+        return await task
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        asyncio.run(scenario())
+    # Third 429 at t=3: next token 4s away, no budget left
+    assert len(calls) == 3
+    assert isinstance(exc.value.__cause__, UpstreamError)
+    assert circuit_breaker.get_breaker("m").state == circuit_breaker.CLOSED
+
+
+def test_other_errors_are_not_retried(clock, limiter):
+    fn, calls = flaky(1, status=500)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(llm_gateway._guarded("m", fn))
+    assert len(calls) == 1
+    assert circuit_breaker.get_breaker("m").stats()["consecutive_failures"] == 1
+
+
+def test_can_retry_budget_math(clock, limiter):
+    limiter.on_rate_limited()   # rate 1/s, bucket empty: next token in 1s
+    error = RateLimitExceeded("m", 1)
+
+    assert llm_gateway._can_retry("m", error, deadline=clock.now + 1)
+    assert not llm_gateway._can_retry("m", error, deadline=clock.now + 0.9)
+    assert not llm_gateway._can_retry("m", ValueError("boom"), deadline=clock.now + 60)
+
+
+def test_response_hook_feeds_rate_limit_headers(clock, limiter):
+    hook = llm_gateway._rate_limit_hook("m")
+    response = types.SimpleNamespace(headers={"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "5"})
+
+    asyncio.run(hook(response))
+
+    # Blocked until the reset, then one token interval (0.5s at 2/s)
+    assert limiter.estimated_wait() == pytest.approx(5.5)
+
+
+def test_langchain_chat_model_observes_rate_limit_headers(clock, limiter, monkeypatch):
+    pytest.importorskip("langchain_mistralai")
+    monkeypatch.setenv("MISTRAL_API_KEY", "test-key")
+    monkeypatch.setattr(llm_gateway, "_chat_models", {})
+
+    chat_model = llm_gateway.get_chat_model("m")
+    hooks = chat_model.async_client.event_hooks["response"]
+    response = types.SimpleNamespace(headers={"retry-after": "4"})
+    asyncio.run(hooks[-1](response))
+
+    assert limiter.estimated_wait() == pytest.approx(4)
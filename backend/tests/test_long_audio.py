@@ -0,0 +1,151 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services import long_audio, transcription_worker, vad
+from services.long_audio import merge_chunks, split_long_audio, transcribe_chunks
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(autouse=True)
+def defaults(monkeypatch):
+    monkeypatch.setattr(long_audio, "LONG_AUDIO_ENABLED", True)
+    monkeypatch.setattr(long_audio, "LONG_AUDIO_MIN_SECONDS", 60.0)
+    monkeypatch.setattr(long_audio, "LONG_AUDIO_CHUNK_SECONDS", 30.0)
+    monkeypatch.setattr(long_audio, "LONG_AUDIO_OVERLAP_SECONDS", 1.0)
+    monkeypatch.setattr(vad, "VAD_ENABLED", True)
+    monkeypatch.setattr(vad, "VAD_BACKEND", "energy")
+    monkeypatch.setattr(vad, "VAD_PADDING_SECONDS", 0.2)
+    monkeypatch.setattr(vad, "VAD_MAX_GAP_SECONDS", 1.0)
+    monkeypatch.setattr(vad, "VAD_KEEP_GAP_SECONDS", 0.3)
+
+
+def quiet(seconds: float):
+    return (np.random.default_rng(0).standard_normal(int(seconds * SAMPLE_RATE)) * 1e-4).astype(np.float32)
+
+
+def ramp(seconds: float):
+    """A loud tone whose amplitude rises steadily, so every sample position is recognisable."""
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    return (np.linspace(0.1, 0.9, n) * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def pcm_seconds(chunk) -> float:
+    return len(chunk["pcm"]) / 2 / SAMPLE_RATE
+
+
+def test_short_audio_is_not_split():
+    assert split_long_audio(ramp(59)) is None
+
+
+def test_disabled_long_audio_is_not_split(monkeypatch):
+    monkeypatch.setattr(long_audio, "LONG_AUDIO_ENABLED", False)
+    assert split_long_audio(ramp(90)) is None
+
+
+def test_splits_at_pauses_and_packs_regions_into_chunks():
+    # Six 10 s answers separated by 2 s thinking pauses
+    parts = [quiet(1.0)]
+    for _ in range(6):
+        parts += [ramp(10.0), quiet(2.0)]
+    audio = np.concatenate(parts)
+
+    chunks, stats = split_long_audio(audio)
+
+    assert stats["regions"] == 6
+    assert stats["chunks"] == 3
+    # Two padded regions plus one kept gap per chunk, no overlap at pause cuts
+    for chunk in chunks:
+        assert chunk["overlap"] == 0
+        assert chunk["seconds"] == pytest.approx(2 * 10.4 + 0.3, abs=0.1)
+        assert chunk["seconds"] <= 30
+        assert pcm_seconds(chunk) == pytest.approx(chunk["seconds"])
+    assert stats["speech_seconds"] == pytest.approx(6 * 10.4, abs=0.3)
+
+
+def test_hard_cut_with_overlap_when_there_is_no_pause():
+    audio = ramp(70.0)
+
+    chunks, stats = split_long_audio(audio)
+
+    assert [round(c["seconds"], 2) for c in chunks] == [30.0, 30.0, 12.0]
+    assert [c["overlap"] for c in chunks] == [0.0, 1.0, 1.0]
+    # Each piece starts with the last second of the one before it
+    samples = [np.frombuffer(c["pcm"], np.int16) for c in chunks]
+    for previous, current in zip(samples, samples[1:]):
+        assert np.array_equal(previous[-SAMPLE_RATE:], current[:SAMPLE_RATE])
+    assert stats["regions"] == 1
+
+
+def test_long_region_between_pauses_is_hard_cut_in_its_own_chunks():
+    audio = np.concatenate([ramp(5.0), quiet(2.0), ramp(45.0), quiet(2.0), ramp(10.0)])
+
+    chunks, _ = split_long_audio(audio)
+
+    # The 45 s region is cut at 30 s; its overlapping rest starts a chunk
+    # that the following region is packed into
+    assert [c["overlap"] for c in chunks] == [0.0, 0.0, 1.0]
+    assert [round(c["seconds"], 1) for c in chunks] == [5.2, 30.0, 16.4 + 0.3 + 10.2]
+
+
+def segment(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+
+def test_merge_keeps_each_side_of_the_overlap_midpoint():
+    chunks = [{"seconds": 30.0, "overlap": 0.0}, {"seconds": 10.0, "overlap": 1.0}]
+    results = [
+        {"segments": [segment(0, 12, "we cut"), segment(12, 29.6, "costs by"), segment(29.6, 30, "half")]},
+        {"segments": [segment(0, 0.4, "half"), segment(0.4, 10, "in a quarter")]},
+    ]
+
+    # "half" ends before the midpoint in chunk 2 and starts after it in chunk 1
+    assert merge_chunks(chunks, results) == "we cut costs by in a quarter"
+
+
+def test_merge_stitches_words_of_a_segment_straddling_the_midpoint():
+    chunks = [{"seconds": 30.0, "overlap": 0.0}, {"seconds": 10.0, "overlap": 1.0}]
+    results = [
+        {"segments": [segment(0, 25, "we cut costs"), segment(25, 29.8, "by half in")]},
+        {"segments": [segment(0, 1.2, "half in a"), segment(1.2, 10, "quarter")]},
+    ]
+
+    assert merge_chunks(chunks, results) == "we cut costs by half in a quarter"
+
+
+def test_merge_without_segments_uses_chunk_text_in_order():
+    chunks = [{"seconds": 20.0, "overlap": 0.0}, {"seconds": 20.0, "overlap": 0.0}, {"seconds": 5.0, "overlap": 0.0}]
+    results = [{"text": "first answer"}, {"text": ""}, {"text": "third answer"}]
+
+    assert merge_chunks(chunks, results) == "first answer third answer"
+
+
+class InlinePool:
+    workers = 2
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def submit(self, fn, *args):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return fn(*args)
+
+
+def test_transcribe_chunks_runs_at_most_one_chunk_per_worker_and_merges_in_order(monkeypatch):
+    pool = InlinePool()
+    monkeypatch.setattr(long_audio, "transcription_pool", pool)
+    monkeypatch.setattr(transcription_worker, "_BACKEND", "stub")
+    monkeypatch.setattr(transcription_worker, "_MODELS", {})
+    chunks, _ = split_long_audio(ramp(100.0))
+
+    text = asyncio.run(transcribe_chunks(chunks, "en", "base"))
+
+    assert pool.peak == 2
+    assert text == " ".join(f"Stub transcript of {round(c['seconds'], 2)} seconds of en audio." for c in chunks)
@@ -0,0 +1,162 @@
+import asyncio
+import types
+
+import pytest
+
+from conftest import FakeClock, settle
+from services import rate_limiter
+from services.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(rate_limiter, "asyncio", types.SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_burst_is_served_immediately_then_paced(clock):
+    limiter = AdaptiveRateLimiter("m", rate=2, burst=2, max_wait=10)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+        assert clock.sleeps == []
+        third = asyncio.ensure_future(limiter.acquire())
+        await settle()
+        assert not third.done()
+        await clock.advance(0.5)
+        assert third.done()
+
+    run(scenario())
+    assert clock.sleeps == [0.5]
+
+
+def test_waiters_are_served_fifo_one_token_interval_apart(clock):
+    limiter = AdaptiveRateLimiter("m", rate=1, burst=1, max_wait=10)
+    served = []
+
+    async def caller(i):
+        await limiter.acquire()
+        served.append((i, clock.now - 1000.0))
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(caller(i)) for i in range(4)]
+        await settle()
+        assert limiter.queue_depth == 3
+        await clock.advance(3)
+        await asyncio.gather(*tasks)
+
+    run(scenario())
+    assert served == [(0, 0.0), (1, 1.0), (2, 2.0), (3, 3.0)]
+    assert limiter.queue_depth == 0
+
+
+def test_queue_deeper_than_max_wait_is_rejected_without_queueing(clock):
+    limiter = AdaptiveRateLimiter("m", rate=1, burst=1, max_wait=2)
+
+    async def scenario():
+        first = asyncio.ensure_future(limiter.acquire())
+        second = asyncio.ensure_future(limiter.acquire())   # waits 1s
+        third = asyncio.ensure_future(limiter.acquire())    # waits 2s - still allowed
+        await settle()
+        assert first.done() and limiter.queue_depth == 2
+        with pytest.raises(RateLimitExceeded) as exc:
+            await limiter.acquire()                          # would wait 3s
+        assert exc.value.queue_depth == 2
+        assert exc.value.retry_after == 3
+        await clock.advance(2)
+        await asyncio.gather(second, third)
+
+    run(scenario())
+    assert limiter.rejected_count == 1
+
+
+def test_max_wait_override_bounds_a_single_acquire(clock):
+    limiter = AdaptiveRateLimiter("m", rate=1, burst=1, max_wait=10)
+
+    async def scenario():
+        await limiter.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire(max_wait=0.5)
+        waiter = asyncio.ensure_future(limiter.acquire(max_wait=1))
+        await clock.advance(1)
+        await waiter
+
+    run(scenario())
+
+
+def test_429_halves_rate_down_to_floor_and_success_creeps_back(clock):
+    limiter = AdaptiveRateLimiter("m", rate=4, burst=4, max_wait=10)
+
+    limiter.on_rate_limited()
+    assert limiter.rate == 2
+    assert limiter.estimated_wait() == pytest.approx(0.5)   # bucket emptied
+    for _ in range(10):
+        limiter.on_rate_limited()
+    assert limiter.rate == limiter.min_rate == pytest.approx(0.2)
+    assert limiter.rate_limited_count == 11
+
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(0.4)   # + 5% of the configured rate
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate == 4
+
+
+def test_retry_after_blocks_the_bucket(clock):
+    limiter = AdaptiveRateLimiter("m", rate=4, burst=4, max_wait=10)
+
+    limiter.on_rate_limited(retry_after=30)
+    assert limiter.estimated_wait() == pytest.approx(30.5)
+    with pytest.raises(RateLimitExceeded) as exc:
+        run(limiter.acquire())
+    assert exc.value.retry_after == 31
+
+    async def scenario():
+        clock.now += 29.5   # half a second of blocking left, bucket refilled meanwhile
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await clock.advance(0.25)
+        assert not waiter.done()
+        await clock.advance(0.25)
+        assert waiter.done()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("headers, wait", [
+    # Blocked 7s; the bucket still holds tokens
+    ({"Retry-After": "7"}, 7),
+    # Blocked until the reset, then one token interval for the emptied bucket
+    ({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "12"}, 12 + 1),
+    # Epoch timestamp instead of seconds
+    ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(FakeClock.WALL_OFFSET) + 1000 + 20)}, 20 + 1),
+])
+def test_headers_block_until_reset(clock, headers, wait):
+    limiter = AdaptiveRateLimiter("m", rate=1, burst=5, max_wait=60)
+
+    limiter.observe_headers(headers)
+
+    assert limiter.estimated_wait() == pytest.approx(wait)
+
+
+def test_remaining_header_caps_local_tokens(clock):
+    limiter = AdaptiveRateLimiter("m", rate=1, burst=5, max_wait=60)
+
+    limiter.observe_headers({"x-ratelimit-remaining-requests": "1", "x-ratelimit-reset-requests": "60"})
+    assert limiter.estimated_wait() == 0
+    assert limiter.estimated_wait(position=1) == pytest.approx(1)
+
+    limiter.observe_headers({"content-type": "application/json", "x-ratelimit-remaining-requests": "oops"})
+    assert limiter.estimated_wait(position=1) == pytest.approx(1)
+
+
+def test_per_model_overrides_are_parsed():
+    assert rate_limiter._parse_rate_overrides("mistral-large-latest=1, mathstral-7b=2.5,bad=x,junk") == {
+        "mistral-large-latest": 1.0,
+        "mathstral-7b": 2.5,
+    }
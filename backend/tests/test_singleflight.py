@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from conftest import settle
+from services.singleflight import SingleFlight
+
+
+class Upstream:
+    """Counts calls; each call blocks until release() and records cancellation."""
+
+    def __init__(self, result="answer", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+        self.gate = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+    def release(self):
+        self.gate.set()
+
+
+def test_concurrent_callers_share_one_call_and_its_result():
+    async def scenario():
+        flight = SingleFlight("test")
+        upstream = Upstream()
+        callers = [asyncio.ensure_future(flight.do("k", upstream)) for _ in range(3)]
+        await settle()
+        upstream.release()
+        return flight, upstream, await asyncio.gather(*callers)
+
+    flight, upstream, results = asyncio.run(scenario())
+    assert results == ["answer"] * 3
+    assert upstream.calls == 1
+    assert flight.stats()["upstream_calls"] == 1
+    assert flight.stats()["coalesced_calls"] == 2
+
+
+def test_concurrent_callers_share_the_error():
+    error = ValueError("upstream down")
+
+    async def scenario():
+        flight = SingleFlight("test")
+        upstream = Upstream(error=error)
+        callers = [asyncio.ensure_future(flight.do("k", upstream)) for _ in range(2)]
+        await settle()
+        upstream.release()
+        return upstream, await asyncio.gather(*callers, return_exceptions=True)
+
+    upstream, results = asyncio.run(scenario())
+    assert results == [error, error]
+    assert upstream.calls == 1
+
+
+def test_different_keys_do_not_coalesce():
+    async def scenario():
+        flight = SingleFlight("test")
+        upstream = Upstream()
+        callers = [asyncio.ensure_future(flight.do(key, upstream)) for key in ("a", "b")]
+        await settle()
+        upstream.release()
+        await asyncio.gather(*callers)
+        return upstream
+
+    assert asyncio.run(scenario()).calls == 2
+
+
+def test_cancelling_one_waiter_keeps_the_call_for_the_others():
+    async def scenario():
+        flight = SingleFlight("test")
+        upstream = Upstream()
+        first = asyncio.ensure_future(flight.do("k", upstream))
+        second = asyncio.ensure_future(flight.do("k", upstream))
+        await settle()
+        first.cancel()
+        await settle()
+        assert upstream.cancelled == 0
+        upstream.release()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return flight, upstream, await second
+
+    flight, upstream, result = asyncio.run(scenario())
+    assert result == "answer"
+    assert upstream.cancelled == 0
+    assert flight.stats()["cancelled_calls"] == 0
+
+
+def test_cancelling_the_last_waiter_cancels_the_call():
+    async def scenario():
+        flight = SingleFlight("test")
+        upstream = Upstream()
+        callers = [asyncio.ensure_future(flight.do("k", upstream)) for _ in range(2)]
+        await settle()
+        callers[0].cancel()
+        await settle()
+        assert upstream.cancelled == 0
+        callers[1].cancel()
+        await settle()
+        return flight, upstream
+
+    flight, upstream = asyncio.run(scenario())
+    assert upstream.cancelled == 1
+    assert flight.stats()["cancelled_calls"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("error", [None, ValueError("boom")])
+def test_key_is_released_once_the_call_completes(error):
+    async def scenario():
+        flight = SingleFlight("test")
+        first = Upstream(error=error)
+        first.release()
+        await asyncio.gather(flight.do("k", first), return_exceptions=True)
+        assert flight.stats()["in_flight"] == 0
+
+        # A later caller starts a fresh call instead of reusing the old one
+        second = Upstream(result="fresh")
+        second.release()
+        return flight, await flight.do("k", second)
+
+    flight, result = asyncio.run(scenario())
+    assert result == "fresh"
+    assert flight.stats()["upstream_calls"] == 2
+    assert flight.stats()["coalesced_calls"] == 0
+
+
+def test_key_is_released_after_cancellation():
+    async def scenario():
+        flight = SingleFlight("test")
+        abandoned = asyncio.ensure_future(flight.do("k", Upstream()))
+        await settle()
+        abandoned.cancel()
+        await settle()
+        second = Upstream(result="fresh")
+        second.release()
+        return await flight.do("k", second)
+
+    assert asyncio.run(scenario()) == "fresh"
@@ -0,0 +1,126 @@
+import asyncio
+import math
+
+import pytest
+
+from services import stream_transcriber, transcription_worker
+from services.stream_transcriber import BYTES_PER_SAMPLE, StreamingTranscriber, stitch
+
+SAMPLE_RATE = 16000
+
+
+def silence(seconds: float) -> bytes:
+    return b"\0\0" * int(seconds * SAMPLE_RATE)
+
+
+@pytest.mark.parametrize("committed, new_text, expected", [
+    ("we shipped the new cache", "the new cache cut latency", "cut latency"),
+    # Case and punctuation are ignored when matching
+    ("We shipped the new cache.", "The new cache, cut latency", "cut latency"),
+    ("so I led the team", "team of five", "of five"),
+    ("nothing in common", "fresh words here", "fresh words here"),
+    ("", "first words", "first words"),
+    ("all of this repeats", "all of this repeats", ""),
+])
+def test_stitch_drops_the_repeated_overlap(committed, new_text, expected):
+    assert stitch(committed, new_text) == expected
+
+
+def test_stitch_prefers_the_longest_overlap():
+    assert stitch("a b a b", "a b a b c") == "c"
+
+
+def test_stitch_only_looks_max_overlap_words_back():
+    committed = "x y z " + " ".join(f"w{i}" for i in range(12))
+    assert stitch(committed, "x y z w0 tail", max_overlap=12) == "x y z w0 tail"
+
+
+# A scripted recording: 2 s segments of four words each
+SCRIPT = [(2.0 * i, 2.0 * (i + 1), [f"s{i}w{j}" for j in range(4)]) for i in range(10)]
+
+
+def scripted_transcribe(transcriber):
+    """
+    Fake Whisper pass over the current window: segments of the script that
+    fall in it, with a segment cut by the window start re-decoded as its
+    last words merged into the next segment (as Whisper does on overlaps).
+    """
+    async def transcribe(pcm: bytes):
+        window_seconds = len(pcm) / BYTES_PER_SAMPLE / SAMPLE_RATE
+        start = transcriber.total_samples / SAMPLE_RATE - window_seconds
+        segments, carry = [], []
+        for seg_start, seg_end, words in SCRIPT:
+            if seg_end <= start or seg_start >= start + window_seconds:
+                continue
+            if seg_start < start:
+                covered = (seg_end - start) / (seg_end - seg_start)
+                carry = words[-math.ceil(covered * len(words)):]
+                continue
+            end = min(seg_end, start + window_seconds)
+            heard = words[:math.ceil((end - seg_start) / (seg_end - seg_start) * len(words))]
+            segments.append({"start": 0.0 if carry else seg_start - start, "end": end - start,
+                             "text": " ".join(carry + heard)})
+            carry = []
+        return {"text": " ".join(s["text"] for s in segments), "segments": segments}
+    return transcribe
+
+
+def test_overlap_is_stitched_so_every_word_appears_once():
+    transcriber = StreamingTranscriber()
+    transcriber._transcribe = scripted_transcribe(transcriber)
+
+    async def scenario():
+        events = []
+        for _ in range(20):
+            transcriber.feed(silence(1))
+            events += await transcriber.step()
+        events += await transcriber.finish()
+        return events
+
+    events = asyncio.run(scenario())
+
+    every_word = " ".join(" ".join(words) for _, _, words in SCRIPT)
+    assert events[-1]["type"] == "final"
+    assert events[-1]["text"] == every_word
+    segment_text = " ".join(e["text"] for e in events if e["type"] == "segment")
+    assert segment_text == every_word
+    assert any(e["type"] == "partial" for e in events)
+
+
+class InlinePool:
+    async def submit(self, fn, *args):
+        return fn(*args)
+
+
+@pytest.fixture
+def stub_asr(monkeypatch):
+    monkeypatch.setattr(stream_transcriber, "transcription_pool", InlinePool())
+    monkeypatch.setattr(transcription_worker, "_BACKEND", "stub")
+    monkeypatch.setattr(transcription_worker, "_MODELS", {})
+
+
+def test_single_segment_spanning_the_window_is_force_committed(stub_asr):
+    # The stub backend returns one segment covering the whole window - no boundary to commit at
+    transcriber = StreamingTranscriber()
+
+    async def scenario():
+        events = []
+        for _ in range(60):
+            transcriber.feed(silence(1))
+            events += await transcriber.step()
+            window = len(transcriber._pcm) / BYTES_PER_SAMPLE / SAMPLE_RATE
+            assert window <= stream_transcriber.STREAM_WINDOW_SECONDS + 2
+        return events
+
+    events = asyncio.run(scenario())
+
+    segments = [e for e in events if e["type"] == "segment"]
+    assert segments, "nothing was ever committed"
+    # First cut once the window passes STREAM_WINDOW_SECONDS, at the window edge minus the overlap
+    assert segments[0]["start"] == 0.0
+    assert segments[0]["end"] == 15.0
+    assert segments[0]["text"] == "Stub transcript of 16.0 seconds of en audio."
+    # Later cuts continue from where the previous one stopped
+    for previous, current in zip(segments, segments[1:]):
+        assert current["start"] == previous["end"]
+    assert transcriber.committed_text.startswith(segments[0]["text"])
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from services.streaming import IncrementalJSONParser, sse_event
+
+
+def parse_in_two(text: str, cut: int):
+    """Feed text split at one offset; return (field events, parser)."""
+    parser = IncrementalJSONParser()
+    events = parser.feed(text[:cut]) + parser.feed(text[cut:])
+    return events, parser
+
+
+def parse_by_char(text: str):
+    parser = IncrementalJSONParser()
+    events = []
+    for char in text:
+        events += parser.feed(char)
+    return events, parser
+
+
+def assert_every_split(text: str, expected_events, expected_fields, done=True):
+    for cut in range(len(text) + 1):
+        events, parser = parse_in_two(text, cut)
+        assert events == expected_events, f"split at {cut}: {text[:cut]!r} | {text[cut:]!r}"
+        assert parser.fields == expected_fields
+        assert parser.done is done
+    events, parser = parse_by_char(text)
+    assert events == expected_events
+    assert parser.fields == expected_fields
+    assert parser.done is done
+
+
+def test_fields_in_order_with_structural_chars_inside_strings():
+    text = '{"tip": "Say {what}, [then] why: it\'s fine", "overall": 75, "star_used": true}'
+    assert_every_split(
+        text,
+        [("tip", "Say {what}, [then] why: it's fine"), ("overall", 75), ("star_used", True)],
+        {"tip": "Say {what}, [then] why: it's fine", "overall": 75, "star_used": True},
+    )
+
+
+def test_escaped_quotes_backslashes_and_unicode_escapes():
+    text = r'{"quote": "she said \"hi, {you}\"", "path": "C:\\dir\\", "word": "caf\u00e9 \ud83d\ude00"}'
+    expected = json.loads(text)
+    assert expected["word"] == "café 😀"
+    assert_every_split(text, list(expected.items()), expected)
+
+
+def test_nested_objects_and_arrays_are_emitted_whole():
+    text = '{"scores": {"clarity": 8, "star": [1, 2, {"tag": "]}"}]}, "filler_words": ["um", "like"], "overall": 7}'
+    expected = json.loads(text)
+    assert_every_split(text, list(expected.items()), expected)
+
+
+@pytest.mark.parametrize("prefix, suffix", [
+    ("```json\n", "\n```"),
+    ('Sure! Here is the "feedback" you asked for:\n\n', "\nHope this helps."),
+])
+def test_text_around_the_object_is_ignored(prefix, suffix):
+    text = prefix + '{"overall": 7, "tip": "Add metrics"}' + suffix
+    assert_every_split(
+        text,
+        [("overall", 7), ("tip", "Add metrics")],
+        {"overall": 7, "tip": "Add metrics"},
+    )
+
+
+def test_truncated_stream_keeps_only_finished_fields():
+    text = '{"overall": 7, "clarity": 8, "tip": "Use the STAR'
+    assert_every_split(text, [("overall", 7), ("clarity", 8)], {"overall": 7, "clarity": 8}, done=False)
+
+
+def test_truncated_inside_nested_value():
+    text = '{"overall": 7, "scores": {"clarity": 8, "star": [1,'
+    assert_every_split(text, [("overall", 7)], {"overall": 7}, done=False)
+
+
+def test_input_after_the_closing_brace_is_ignored():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1}') == [("a", 1)]
+    assert parser.feed(', "b": 2}') == []
+    assert parser.fields == {"a": 1}
+
+
+def test_empty_object():
+    assert_every_split("{}", [], {})
+
+
+def test_sse_event_frame():
+    frame = sse_event("field", {"name": "tip", "value": "café"})
+    assert frame == 'event: field\ndata: {"name": "tip", "value": "café"}\n\n'
+
+
+FEEDBACK = {
+    "clarity_score": 8,
+    "structure_score": 6,
+    "impact_score": 7,
+    "overall_score": 7,
+    "key_strengths": ["Concrete example", "Clear \"why\""],
+    "areas_for_improvement": ["Quantify the result"],
+    "coaching_tip": "Lead with the outcome: \"cut p99 by 40%\".",
+    "filler_words_noticed": ["um"],
+    "star_method_evaluation": {"situation": "detected", "task": "detected", "action": "detected", "result": "missing"},
+}
+
+
+@pytest.mark.parametrize("token_size", [1, 3, 7, 50])
+def test_stream_coaching_feedback_emits_fields_then_complete(monkeypatch, token_size):
+    mistral_service = pytest.importorskip("services.mistral_service")
+
+    raw = "```json\n" + json.dumps(FEEDBACK, indent=2) + "\n```"
+
+    async def fake_stream_chain(chain, inputs, model="mistral-large-latest"):
+        for i in range(0, len(raw), token_size):
+            yield raw[i:i + token_size]
+
+    monkeypatch.setattr(mistral_service, "coaching_stream_chain", object())
+    monkeypatch.setattr(mistral_service.llm_gateway, "stream_chain", fake_stream_chain)
+
+    async def collect():
+        return [event async for event in mistral_service.stream_coaching_feedback("Q", "A", "Engineer")]
+
+    events = asyncio.run(collect())
+
+    assert [e["data"] for e in events[:-1]] == [{"name": k, "value": v} for k, v in FEEDBACK.items()]
+    assert all(e["event"] == "field" for e in events[:-1])
+    assert events[-1] == {"event": "complete", "data": FEEDBACK}
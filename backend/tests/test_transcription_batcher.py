@@ -0,0 +1,89 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services import audio_decode, transcription_batcher, transcription_worker
+from services.transcription_batcher import TranscriptionBatcher
+
+
+def tone(seconds: float):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+class InlinePool:
+    """Runs jobs in-process and records which worker function each one used."""
+
+    def __init__(self):
+        self.jobs = []
+
+    async def submit(self, fn, *args):
+        self.jobs.append(fn.__name__)
+        return fn(*args)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = InlinePool()
+    monkeypatch.setattr(transcription_batcher, "transcription_pool", pool)
+    monkeypatch.setattr(transcription_worker, "_BACKEND", "stub")
+    monkeypatch.setattr(transcription_worker, "_MODELS", {})
+    # No ffmpeg needed: every byte of "audio" is a tenth of a second of tone
+    monkeypatch.setattr(audio_decode, "decode_audio", lambda data: tone(len(data) / 10))
+    return pool
+
+
+def test_lone_request_takes_single_pass(pool):
+    batcher = TranscriptionBatcher(max_batch=4, max_wait_ms=5)
+
+    result = asyncio.run(batcher.submit(b"x" * 10, "en", "base"))
+
+    assert pool.jobs == ["transcribe"]
+    assert result["text"] == "Stub transcript of 1.0 seconds of en audio."
+
+
+def test_concurrent_requests_share_one_batch(pool):
+    batcher = TranscriptionBatcher(max_batch=4, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit(b"x" * 10, "en", "base"),
+            batcher.submit(b"x" * 20, "en", "base"),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert pool.jobs == ["transcribe_batch"]
+    assert first["text"] == "Stub transcript of 1.0 seconds of en audio."
+    assert second["text"] == "Stub transcript of 2.0 seconds of en audio."
+    assert batcher.stats()["avg_batch_size"] == 2.0
+
+
+def test_full_batch_flushes_without_waiting(pool):
+    batcher = TranscriptionBatcher(max_batch=2, max_wait_ms=60_000)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.submit(b"x" * 10, "en", "base"),
+            batcher.submit(b"x" * 10, "en", "base"),
+        ), timeout=5)
+
+    assert len(asyncio.run(run())) == 2
+    assert pool.jobs == ["transcribe_batch"]
+
+
+def test_groups_are_batched_separately(pool):
+    batcher = TranscriptionBatcher(max_batch=4, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit(b"x" * 10, "en", "base"),
+            batcher.submit(b"x" * 10, "fr", "base"),
+        )
+
+    en, fr = asyncio.run(run())
+
+    assert sorted(pool.jobs) == ["transcribe", "transcribe"]
+    assert en["text"].endswith("of en audio.")
+    assert fr["text"].endswith("of fr audio.")
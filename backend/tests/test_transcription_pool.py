@@ -0,0 +1,79 @@
+import asyncio
+import concurrent.futures
+import gc
+
+import numpy as np
+import pytest
+
+from conftest import settle
+from services import transcription_worker
+from services.transcription_pool import TranscriptionNotReady, TranscriptionPool
+
+
+class StalledExecutor:
+    """Executor whose jobs never finish - the pool stays in "loading"."""
+
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        return concurrent.futures.Future()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def stalled_pool(monkeypatch):
+    pool = TranscriptionPool(2, 0, "base", backend="stub")
+    executor = StalledExecutor()
+    monkeypatch.setattr(pool, "_get_executor", lambda: executor)
+    pool._executor = executor
+    return pool
+
+
+def test_warm_up_task_is_kept_on_the_pool(monkeypatch):
+    async def scenario():
+        pool = stalled_pool(monkeypatch)
+        task = pool.start()
+        assert pool._warm_task is task
+        assert pool.start() is None   # already loading
+        # Dropping the caller's reference must not let the load be collected
+        del task
+        gc.collect()
+        await settle()
+        assert not pool._warm_task.done()
+        with pytest.raises(TranscriptionNotReady):
+            await pool.submit(transcription_worker.warmup)
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_cancels_a_warm_up_in_progress(monkeypatch):
+    async def scenario():
+        pool = stalled_pool(monkeypatch)
+        task = pool.start()
+        await settle()
+        pool.shutdown()
+        await settle()
+        return pool, task
+
+    pool, task = asyncio.run(scenario())
+    assert task.cancelled()
+    assert pool._warm_task is None
+    assert pool.state == "idle"
+
+
+def test_stub_workers_load_and_transcribe():
+    async def scenario():
+        pool = TranscriptionPool(1, 2, "base", backend="stub")
+        try:
+            await pool.start()
+            assert pool.state == "ready"
+            pcm = (np.zeros(16000, dtype=np.int16)).tobytes()
+            return await pool.submit(transcription_worker.transcribe_pcm, pcm, "en")
+        finally:
+            pool.shutdown()
+
+    result = asyncio.run(scenario())
+    assert result["text"] == "Stub transcript of 1.0 seconds of en audio."
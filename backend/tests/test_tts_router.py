@@ -0,0 +1,97 @@
+import pytest
+
+tts = pytest.importorskip("routers.tts")
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from routers.tts import etag_matches, parse_byte_range  # noqa: E402
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-", (0, 999)),
+    ("bytes=100-199", (100, 199)),
+    ("bytes=999-999", (999, 999)),
+    (" bytes=5-9 ", (5, 9)),
+    # Suffix ranges: the last N bytes, clamped to the whole file
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    # End beyond the size is clamped
+    ("bytes=900-5000", (900, 999)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_byte_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-2000", "bytes=5000-", "bytes=-0"])
+def test_unsatisfiable_ranges_are_416(header):
+    assert parse_byte_range(header, SIZE) is None
+
+
+@pytest.mark.parametrize("header", [
+    "",
+    "bytes=",
+    "bytes=-",
+    "bytes=abc-def",
+    "bytes=0-1,5-6",          # multi-range: served in full
+    "items=0-10",
+    "bytes=10-5",             # last < first: invalid, ignored
+    "bytes 0-10",
+])
+def test_malformed_or_multi_range_headers_are_ignored(header):
+    assert parse_byte_range(header, SIZE) == "ignore"
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    ('"abc"', True),
+    ('"x", "abc"', True),
+    ('W/"abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ('"ab"', False),
+    ('"x", W/"abcd"', False),
+    ("", False),
+])
+def test_etag_matches_whole_tokens(if_none_match, matches):
+    assert etag_matches('"abc"', if_none_match) is matches
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / ("a" * 64 + ".mp3")
+    path.write_bytes(bytes(range(256)) * 4)
+    app = FastAPI()
+
+    @app.get("/clip")
+    async def clip(request: Request):
+        return await tts.clip_response(path, request)
+
+    return TestClient(app)
+
+
+def test_clip_is_served_whole_with_long_caching(client):
+    response = client.get("/clip")
+    assert response.status_code == 200
+    assert len(response.content) == 1024
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_clip_range_request_is_206(client):
+    response = client.get("/clip", headers={"Range": "bytes=-4"})
+    assert response.status_code == 206
+    assert response.content == bytes([252, 253, 254, 255])
+    assert response.headers["content-range"] == "bytes 1020-1023/1024"
+
+
+def test_clip_unsatisfiable_range_is_416(client):
+    response = client.get("/clip", headers={"Range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+
+def test_clip_if_none_match_is_304(client):
+    etag = client.get("/clip").headers["etag"]
+    assert client.get("/clip", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get("/clip", headers={"If-None-Match": etag[:-2] + '"'}).status_code == 200
@@ -0,0 +1,118 @@
+import asyncio
+import functools
+
+import pytest
+
+tts_service = pytest.importorskip("services.tts_service")
+from services.tts_service import TTSService, split_sentences  # noqa: E402
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Dr. Lee reviewed it. Then we shipped.", ["Dr. Lee reviewed it.", "Then we shipped."]),
+    ("Ask Mrs. Jones vs. Mr. Brown. Done.", ["Ask Mrs. Jones vs. Mr. Brown.", "Done."]),
+    ("Add numbers, e.g. revenue. And i.e. growth. Good.", ["Add numbers, e.g. revenue.", "And i.e. growth.", "Good."]),
+    ("J. K. Rowling wrote it. Next.", ["J. K. Rowling wrote it.", "Next."]),
+    ("It costs 3.5 dollars. Latency fell 12.75%. Great.", ["It costs 3.5 dollars.", "Latency fell 12.75%.", "Great."]),
+    ("So did I. Then it worked.", ["So did I.", "Then it worked."]),
+    ("Use the approx. value here. Fine.", ["Use the approx. value here.", "Fine."]),
+    ('"Great answer." Now add numbers! Really? Yes.', ['"Great answer."', "Now add numbers!", "Really?", "Yes."]),
+    ("你好。世界！好吗？", ["你好。", "世界！", "好吗？"]),
+    ("  No boundary at all  ", ["No boundary at all"]),
+    ("", []),
+])
+def test_sentence_boundaries(text, expected):
+    assert split_sentences(text, chunk_chars=1) == expected
+
+
+def test_first_sentence_is_kept_alone_and_the_rest_grouped_up_to_chunk_chars():
+    text = "Hi. One two. Three four. Five six. Seven eight."
+
+    assert split_sentences(text, chunk_chars=25) == ["Hi.", "One two. Three four.", "Five six. Seven eight."]
+    assert split_sentences(text, chunk_chars=1000) == ["Hi.", "One two. Three four. Five six. Seven eight."]
+
+
+def test_a_sentence_longer_than_chunk_chars_is_not_cut():
+    long = "Word " + "word " * 80 + "end."
+    assert split_sentences(f"Intro. {long} Tail.", chunk_chars=50) == ["Intro.", long.strip(), "Tail."]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(tts_service, "split_sentences", functools.partial(split_sentences, chunk_chars=1))
+    return TTSService()
+
+
+def fake_speak(delays, log):
+    """speak() stand-in: each sentence takes delays[sentence] seconds and yields two chunks."""
+    async def speak(text, voice_id=None, language="en"):
+        log.append(("start", text))
+        await asyncio.sleep(delays.get(text, 0))
+        yield f"<{text}".encode()
+        await asyncio.sleep(0)
+        yield b">"
+        log.append(("end", text))
+    return speak
+
+
+def test_pipelined_output_is_in_order_when_later_sentences_finish_first(service, monkeypatch):
+    text = "First one. Second one. Third one."
+    log = []
+    monkeypatch.setattr(service, "speak", fake_speak({"First one.": 0.1, "Second one.": 0.05}, log))
+
+    async def collect():
+        return b"".join([chunk async for chunk in service.speak_pipelined(text, concurrency=3)])
+
+    audio = asyncio.run(collect())
+
+    assert audio == b"<First one.><Second one.><Third one.>"
+    finished = [sentence for event, sentence in log if event == "end"]
+    assert finished == ["Third one.", "Second one.", "First one."]
+
+
+def test_pipelined_requests_respect_the_concurrency_limit(service, monkeypatch):
+    text = " ".join(f"Sentence {i}." for i in range(6))
+    running = peak = 0
+
+    async def speak(sentence, voice_id=None, language="en"):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        yield sentence.encode()
+
+    monkeypatch.setattr(service, "speak", speak)
+
+    async def collect():
+        return [chunk async for chunk in service.speak_pipelined(text, concurrency=2)]
+
+    assert len(asyncio.run(collect())) == 6
+    assert peak == 2
+
+
+def test_pipelined_error_surfaces_at_its_turn_after_earlier_audio(service, monkeypatch):
+    async def speak(sentence, voice_id=None, language="en"):
+        if sentence.startswith("Bad"):
+            raise tts_service.TTSRequestError(429, "slow down")
+        yield sentence.encode()
+
+    monkeypatch.setattr(service, "speak", speak)
+    received = []
+
+    async def collect():
+        async for chunk in service.speak_pipelined("Good one. Bad two. Never three."):
+            received.append(chunk)
+
+    with pytest.raises(tts_service.TTSRequestError):
+        asyncio.run(collect())
+    assert received == [b"Good one."]
+
+
+def test_single_sentence_goes_straight_to_speak(service, monkeypatch):
+    log = []
+    monkeypatch.setattr(service, "speak", fake_speak({}, log))
+
+    async def collect():
+        return b"".join([chunk async for chunk in service.speak_pipelined("Only one sentence here")])
+
+    assert asyncio.run(collect()) == b"<Only one sentence here>"
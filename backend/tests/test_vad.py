@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from services import vad
+from services.vad import trim_silence
+
+SAMPLE_RATE = 16000
+FRAME = vad.FRAME_SECONDS
+
+
+@pytest.fixture(autouse=True)
+def defaults(monkeypatch):
+    monkeypatch.setattr(vad, "VAD_ENABLED", True)
+    monkeypatch.setattr(vad, "VAD_BACKEND", "energy")
+    monkeypatch.setattr(vad, "VAD_PADDING_SECONDS", 0.2)
+    monkeypatch.setattr(vad, "VAD_MAX_GAP_SECONDS", 1.0)
+    monkeypatch.setattr(vad, "VAD_KEEP_GAP_SECONDS", 0.3)
+
+
+def quiet(seconds: float, seed: int = 0):
+    """Room noise around -80 dBFS."""
+    return (np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE)) * 1e-4).astype(np.float32)
+
+
+def tone(seconds: float, freq: float = 220.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def signal(*parts):
+    return np.concatenate(parts)
+
+
+def seconds(audio) -> float:
+    return len(audio) / SAMPLE_RATE
+
+
+def test_leading_and_trailing_silence_is_trimmed():
+    audio = signal(quiet(1.0), tone(2.0), quiet(1.5))
+
+    trimmed, stats = trim_silence(audio)
+
+    # The tone plus padding on each side (to frame precision)
+    assert seconds(trimmed) == pytest.approx(2.0 + 2 * 0.2, abs=2 * FRAME)
+    assert stats["regions"] == 1
+    assert stats["audio_seconds"] == 4.5
+    assert stats["trimmed_seconds"] == pytest.approx(4.5 - 2.4, abs=2 * FRAME)
+    # What is kept is the tone, not the noise around it
+    assert np.abs(trimmed).max() == pytest.approx(0.3, abs=0.01)
+    assert np.abs(trimmed[:int(0.1 * SAMPLE_RATE)]).max() < 0.01
+
+
+def test_long_gap_is_shortened_to_keep_gap():
+    audio = signal(quiet(1.0), tone(1.0), quiet(3.0), tone(1.0), quiet(1.0))
+
+    trimmed, stats = trim_silence(audio)
+
+    assert stats["regions"] == 2
+    assert seconds(trimmed) == pytest.approx(2 * (1.0 + 2 * 0.2) + 0.3, abs=4 * FRAME)
+    # The inserted gap is exact digital silence
+    assert np.count_nonzero(trimmed == 0) >= int(0.3 * SAMPLE_RATE)
+
+
+def test_short_gap_is_kept_in_place():
+    audio = signal(quiet(1.0), tone(1.0), quiet(0.5), tone(1.0), quiet(1.0))
+
+    trimmed, stats = trim_silence(audio)
+
+    assert stats["regions"] == 1
+    assert seconds(trimmed) == pytest.approx(2.5 + 2 * 0.2, abs=2 * FRAME)
+
+
+def test_gap_just_over_max_gap_is_shortened(monkeypatch):
+    monkeypatch.setattr(vad, "VAD_MAX_GAP_SECONDS", 0.5)
+    audio = signal(quiet(1.0), tone(1.0), quiet(1.5), tone(1.0), quiet(1.0))
+
+    trimmed, stats = trim_silence(audio)
+
+    # 1.5 s of silence minus padding leaves a 1.1 s gap > 0.5 s
+    assert stats["regions"] == 2
+    assert seconds(trimmed) == pytest.approx(2 * 1.4 + 0.3, abs=4 * FRAME)
+
+
+@pytest.mark.parametrize("audio", [np.zeros(3 * SAMPLE_RATE, dtype=np.float32), quiet(3.0)])
+def test_all_silence_returns_no_speech(audio):
+    trimmed, stats = trim_silence(audio)
+
+    assert len(trimmed) == 0
+    assert stats["regions"] == 0
+    assert stats["speech_seconds"] == 0
+    assert stats["trimmed_seconds"] == 3.0
+
+
+@pytest.mark.parametrize("freq, kept", [(3000.0, True), (200.0, False)])
+def test_quiet_high_zcr_sounds_count_as_speech(freq, kept):
+    # ~-53 dBFS: under the energy threshold, but a fricative-like zero-crossing rate is enough
+    t = np.arange(int(0.5 * SAMPLE_RATE)) / SAMPLE_RATE
+    soft = (0.003 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    audio = signal(quiet(1.0), tone(1.0), quiet(2.0), soft, quiet(1.0))
+    soft_start, soft_end = 4 * SAMPLE_RATE, int(4.5 * SAMPLE_RATE)
+
+    regions = vad.speech_regions(audio)
+    covered = sum(max(0, min(e, soft_end) - max(s, soft_start)) for s, e in regions) / SAMPLE_RATE
+
+    if kept:
+        assert covered == pytest.approx(0.5)
+    else:
+        # At most the frame where noise and tone meet, plus its padding
+        assert covered <= 2 * FRAME + vad.VAD_PADDING_SECONDS
+
+
+def test_disabled_vad_returns_audio_unchanged(monkeypatch):
+    monkeypatch.setattr(vad, "VAD_ENABLED", False)
+    audio = signal(quiet(1.0), tone(1.0))
+
+    trimmed, stats = trim_silence(audio)
+
+    assert trimmed is audio
+    assert stats["trimmed_seconds"] == 0.0
+
+
+def test_empty_audio():
+    trimmed, stats = trim_silence(np.zeros(0, dtype=np.float32))
+    assert len(trimmed) == 0
+    assert stats["audio_seconds"] == 0.0